@@ -1,7 +1,7 @@
 from dash import html, dcc, dash_table, dash, callback_context
 import dash_bootstrap_components as dbc
 from dash.dependencies import Input, Output, State
-import sqlite3
+from db import get_connection
 import pandas as pd
 from flask import session as flask_session
 from login import app, login_layout
@@ -421,7 +421,7 @@ def register_admin_callbacks(app):
         
         try:
             # Connect to database
-            conn = sqlite3.connect('data/USDH.db')
+            conn = get_connection()
             cursor = conn.cursor()
             
             # Fetch admin details
@@ -469,7 +469,7 @@ def register_admin_callbacks(app):
         
         try:
             # Connect to database
-            conn = sqlite3.connect('data/USDH.db')
+            conn = get_connection()
             cursor = conn.cursor()
             
             # Verify current password
@@ -2,63 +2,46 @@
 from dash import html, dcc, dash_table
 import dash_bootstrap_components as dbc
 from dash.dependencies import Input, Output, State
-import sqlite3
+from stats import get_table_counts, get_value_counts
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objs as go
 import dash
 from dash.exceptions import PreventUpdate
 from flask import session
 import datetime
 
-def analytics_layout():
-    # Connect to the database to get stats
-    conn = sqlite3.connect('data/USDH.db')
+# Stat cards and graphs of the analytics page, in the order update_analytics
+# fills them
+ANALYTICS_STATS = ('analytics-courses-count', 'analytics-k12-count', 'analytics-resources-count',
+                   'analytics-schemes-count', 'analytics-users-count')
+ANALYTICS_GRAPHS = ('content-distribution', 'discipline-distribution', 'subject-distribution',
+                    'state-distribution', 'user-activity', 'preference-distribution', 'tables-distribution')
+
+def analytics_data():
+    """Stat card values and figures for the analytics page"""
+    # plotly.express is slow to import and only this callback draws charts
+    import plotly.express as px
     
-    # Get counts from each table
-    courses_count = pd.read_sql_query("SELECT COUNT(*) as count FROM courses", conn).iloc[0]['count']
-    resources_count = pd.read_sql_query("SELECT COUNT(*) as count FROM ebooks", conn).iloc[0]['count']
-    schemes_count = pd.read_sql_query("SELECT COUNT(*) as count FROM schemes", conn).iloc[0]['count']
-    k12_count = pd.read_sql_query("SELECT COUNT(*) as count FROM courses2", conn).iloc[0]['count']
+    # Counts and distributions are maintained by triggers (see stats.py)
+    counts = get_table_counts()
+    courses_count = counts['courses']
+    resources_count = counts['ebooks']
+    schemes_count = counts['schemes']
+    k12_count = counts['courses2']
     
     # Get user count
-    users_count = pd.read_sql_query("SELECT COUNT(*) as count FROM users", conn).iloc[0]['count']
+    users_count = counts['users']
     
     # Get discipline distribution from courses
-    discipline_df = pd.read_sql_query(
-        "SELECT dispcipline as discipline, COUNT(*) as count FROM courses GROUP BY dispcipline", 
-        conn
-    )
-    # Filter out empty or null values
-    discipline_df = discipline_df.dropna(subset=['discipline'])
-    discipline_df = discipline_df[discipline_df['discipline'] != '']
+    discipline_df = get_value_counts('courses', 'dispcipline').rename(columns={'value': 'discipline'})
     
     # Get subject distribution from courses2
-    subject_df = pd.read_sql_query(
-        "SELECT subjects, COUNT(*) as count FROM courses2 GROUP BY subjects", 
-        conn
-    )
-    # Filter out empty or null values
-    subject_df = subject_df.dropna(subset=['subjects'])
-    subject_df = subject_df[subject_df['subjects'] != '']
+    subject_df = get_value_counts('courses2', 'subjects').rename(columns={'value': 'subjects'})
     
     # Get state distribution from ebooks
-    state_df = pd.read_sql_query(
-        "SELECT states, COUNT(*) as count FROM ebooks GROUP BY states", 
-        conn
-    )
-    # Filter out empty or null values
-    state_df = state_df.dropna(subset=['states'])
-    state_df = state_df[state_df['states'] != '']
+    state_df = get_value_counts('ebooks', 'states').rename(columns={'value': 'states'})
     
     # Get preference distribution from ebooks
-    preference_df = pd.read_sql_query(
-        "SELECT preference, COUNT(*) as count FROM ebooks GROUP BY preference", 
-        conn
-    )
-    # Filter out empty or null values
-    preference_df = preference_df.dropna(subset=['preference'])
-    preference_df = preference_df[preference_df['preference'] != '']
+    preference_df = get_value_counts('ebooks', 'preference').rename(columns={'value': 'preference'})
     
     # Generate content distribution data
     content_distribution = pd.DataFrame({
@@ -71,14 +54,7 @@ def analytics_layout():
         'users', 'certificates', 'courses', 'courses2', 'ebooks', 
         'schemes', 'resumes', 'study_plans', 'documents', 'folders'
     ]
-    tables_counts = []
-    
-    for table in tables_list:
-        try:
-            count = pd.read_sql_query(f"SELECT COUNT(*) as count FROM {table}", conn).iloc[0]['count']
-            tables_counts.append(count)
-        except:
-            tables_counts.append(0)
+    tables_counts = [counts[table] for table in tables_list]
     
     tables_distribution = pd.DataFrame({
         'Table': tables_list,
@@ -89,16 +65,14 @@ def analytics_layout():
     user_activity = pd.DataFrame({
         'Activity Type': ['Certificates', 'Resumes', 'Study Plans', 'Documents', 'Folders'],
         'Count': [
-            pd.read_sql_query("SELECT COUNT(*) as count FROM certificates", conn).iloc[0]['count'],
-            pd.read_sql_query("SELECT COUNT(*) as count FROM resumes", conn).iloc[0]['count'],
-            pd.read_sql_query("SELECT COUNT(*) as count FROM study_plans", conn).iloc[0]['count'],
-            pd.read_sql_query("SELECT COUNT(*) as count FROM documents", conn).iloc[0]['count'],
-            pd.read_sql_query("SELECT COUNT(*) as count FROM folders", conn).iloc[0]['count']
+            counts['certificates'],
+            counts['resumes'],
+            counts['study_plans'],
+            counts['documents'],
+            counts['folders']
         ]
     })
     
-    conn.close()
-    
     # Create visualizations from the database data
     content_fig = px.bar(
         content_distribution,
@@ -211,6 +185,12 @@ def analytics_layout():
     )
     tables_fig.update_xaxes(tickangle=45)
     
+    stats = [courses_count, k12_count, resources_count, schemes_count, users_count]
+    figures = [content_fig, discipline_fig, subject_fig, state_fig, user_activity_fig, preference_fig, tables_fig]
+    return [str(count) for count in stats] + figures
+
+def analytics_layout():
+    # The numbers and figures are filled in by update_analytics
     layout = html.Div([
         # Background with floating particles
         html.Div([
@@ -244,7 +224,7 @@ def analytics_layout():
                 html.Div(className="icon-circle mb-3", children=[
                     html.I(className="fas fa-book-open fa-2x", style={'color': '#1a73e8'})
                 ]),
-                html.H3(f"{courses_count}", className="stat-number", style={'color': '#1a73e8', 'fontSize': '2.5rem', 'fontWeight': '600'}),
+                html.H3("-", id="analytics-courses-count", className="stat-number", style={'color': '#1a73e8', 'fontSize': '2.5rem', 'fontWeight': '600'}),
                 html.P("UG/PG Courses", className="stat-label", style={'color': '#1a73e8'})
             ], className="edu-stat-card"),
             
@@ -252,7 +232,7 @@ def analytics_layout():
                 html.Div(className="icon-circle mb-3", children=[
                     html.I(className="fas fa-child fa-2x", style={'color': '#1a73e8'})
                 ]),
-                html.H3(f"{k12_count}", className="stat-number", style={'color': '#1a73e8', 'fontSize': '2.5rem', 'fontWeight': '600'}),
+                html.H3("-", id="analytics-k12-count", className="stat-number", style={'color': '#1a73e8', 'fontSize': '2.5rem', 'fontWeight': '600'}),
                 html.P("K-12 Courses", className="stat-label", style={'color': '#1a73e8'})
             ], className="edu-stat-card"),
             
@@ -260,7 +240,7 @@ def analytics_layout():
                 html.Div(className="icon-circle mb-3", children=[
                     html.I(className="fas fa-laptop-code fa-2x", style={'color': '#1a73e8'})
                 ]),
-                html.H3(f"{resources_count}", className="stat-number", style={'color': '#1a73e8', 'fontSize': '2.5rem', 'fontWeight': '600'}),
+                html.H3("-", id="analytics-resources-count", className="stat-number", style={'color': '#1a73e8', 'fontSize': '2.5rem', 'fontWeight': '600'}),
                 html.P("E-Books", className="stat-label", style={'color': '#1a73e8'})
             ], className="edu-stat-card"),
             
@@ -268,7 +248,7 @@ def analytics_layout():
                 html.Div(className="icon-circle mb-3", children=[
                     html.I(className="fas fa-graduation-cap fa-2x", style={'color': '#1a73e8'})
                 ]),
-                html.H3(f"{schemes_count}", className="stat-number", style={'color': '#1a73e8', 'fontSize': '2.5rem', 'fontWeight': '600'}),
+                html.H3("-", id="analytics-schemes-count", className="stat-number", style={'color': '#1a73e8', 'fontSize': '2.5rem', 'fontWeight': '600'}),
                 html.P("Scholarship Schemes", className="stat-label", style={'color': '#1a73e8'})
             ], className="edu-stat-card"),
             
@@ -276,7 +256,7 @@ def analytics_layout():
                 html.Div(className="icon-circle mb-3", children=[
                     html.I(className="fas fa-users fa-2x", style={'color': '#1a73e8'})
                 ]),
-                html.H3(f"{users_count}", className="stat-number", style={'color': '#1a73e8', 'fontSize': '2.5rem', 'fontWeight': '600'}),
+                html.H3("-", id="analytics-users-count", className="stat-number", style={'color': '#1a73e8', 'fontSize': '2.5rem', 'fontWeight': '600'}),
                 html.P("Registered Users", className="stat-label", style={'color': '#1a73e8'})
             ], className="edu-stat-card"),
         ], className="stats-grid mb-4"),
@@ -290,7 +270,6 @@ def analytics_layout():
                         type="circle",
                         children=dcc.Graph(
                             id='content-distribution',
-                            figure=content_fig,
                             config={'displayModeBar': False},
                             className="edu-graph"
                         )
@@ -305,7 +284,6 @@ def analytics_layout():
             html.Div([
                 dcc.Graph(
                     id='discipline-distribution',
-                    figure=discipline_fig,
                     config={'displayModeBar': False},
                     className="edu-graph"
                 )
@@ -315,7 +293,6 @@ def analytics_layout():
             html.Div([
                 dcc.Graph(
                     id='subject-distribution',
-                    figure=subject_fig,
                     config={'displayModeBar': False},
                     className="edu-graph"
                 )
@@ -327,7 +304,6 @@ def analytics_layout():
             html.Div([
                 dcc.Graph(
                     id='state-distribution',
-                    figure=state_fig,
                     config={'displayModeBar': False},
                     className="edu-graph"
                 )
@@ -340,7 +316,6 @@ def analytics_layout():
             html.Div([
                 dcc.Graph(
                     id='user-activity',
-                    figure=user_activity_fig,
                     config={'displayModeBar': False},
                     className="edu-graph"
                 )
@@ -350,7 +325,6 @@ def analytics_layout():
             html.Div([
                 dcc.Graph(
                     id='preference-distribution',
-                    figure=preference_fig,
                     config={'displayModeBar': False},
                     className="edu-graph"
                 )
@@ -362,7 +336,6 @@ def analytics_layout():
             html.Div([
                 dcc.Graph(
                     id='tables-distribution',
-                    figure=tables_fig,
                     config={'displayModeBar': False},
                     className="edu-graph"
                 )
@@ -383,6 +356,19 @@ def analytics_layout():
     return layout
 
 def register_callbacks(app):
+    # Fill in the stat cards and graphs on load and on every interval tick
+    @app.callback(
+        [Output(stat_id, "children") for stat_id in ANALYTICS_STATS] +
+        [Output(graph_id, "figure") for graph_id in ANALYTICS_GRAPHS],
+        [Input("interval-component", "n_intervals")]
+    )
+    def update_analytics(n_intervals):
+        try:
+            return analytics_data()
+        except Exception as e:
+            print(f"Error updating analytics: {e}")
+            raise PreventUpdate
+
     @app.callback(
         Output("analytics-redirect", "data"),
         [Input("back-to-admin", "n_clicks"),
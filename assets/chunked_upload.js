@@ -0,0 +1,122 @@
+// Sends files dropped on or picked in a ".chunked-upload" field to /uploads
+// in chunks, so large files stream to disk on the server instead of
+// travelling through a Dash callback as base64. The events are caught in the
+// capture phase, before dcc.Upload's own handlers can read the files.
+// Progress goes to the component named in the field's data-progress
+// attribute; when every file is done the upload ids are handed to Dash
+// through the store named in data-store.
+(function () {
+    var MAX_RETRIES = 3;
+
+    function resumeKey(file) {
+        return 'upload:' + file.name + ':' + file.size + ':' + file.lastModified;
+    }
+
+    function send(method, url, body, headers) {
+        return fetch(url, {method: method, body: body, headers: headers, credentials: 'same-origin'})
+            .then(function (resp) {
+                return resp.json().then(function (data) {
+                    if (!resp.ok) {
+                        throw new Error(data.error || resp.statusText);
+                    }
+                    return data;
+                });
+            });
+    }
+
+    function startUpload(file) {
+        function fresh() {
+            return send('POST', '/uploads', JSON.stringify({filename: file.name, size: file.size}),
+                        {'Content-Type': 'application/json'});
+        }
+        // Pick up where an interrupted upload of the same file stopped
+        var saved = localStorage.getItem(resumeKey(file));
+        return saved ? send('GET', '/uploads/' + saved).catch(fresh) : fresh();
+    }
+
+    function uploadFile(file, onProgress) {
+        return startUpload(file).then(function (status) {
+            localStorage.setItem(resumeKey(file), status.upload_id);
+
+            function next(status, retries) {
+                onProgress(status.offset);
+                if (status.complete) {
+                    localStorage.removeItem(resumeKey(file));
+                    return status;
+                }
+                var url = '/uploads/' + status.upload_id + '?offset=' + status.offset;
+                var chunk = file.slice(status.offset, status.offset + status.chunk_size);
+                return send('PUT', url, chunk)
+                    .then(function (s) { return next(s, 0); })
+                    .catch(function (err) {
+                        if (retries >= MAX_RETRIES) {
+                            throw err;
+                        }
+                        // Ask the server how much it has before trying again
+                        return send('GET', '/uploads/' + status.upload_id)
+                            .then(function (s) { return next(s, retries + 1); });
+                    });
+            }
+            return next(status, 0);
+        });
+    }
+
+    function setProps(id, props) {
+        if (id && window.dash_clientside && window.dash_clientside.set_props) {
+            window.dash_clientside.set_props(id, props);
+        }
+    }
+
+    function uploadFiles(field, fileList) {
+        var files = Array.prototype.slice.call(fileList);
+        var storeId = field.getAttribute('data-store');
+        var progressId = field.getAttribute('data-progress');
+        var total = files.reduce(function (sum, f) { return sum + f.size; }, 0);
+        var done = 0;
+        var results = [];
+
+        function showProgress(bytes) {
+            var pct = total ? Math.floor((done + bytes) * 100 / total) : 100;
+            setProps(progressId, {value: pct, label: pct + '%'});
+        }
+
+        // One file at a time keeps a folder upload from opening dozens of requests
+        files.reduce(function (chain, file) {
+            return chain.then(function () {
+                return uploadFile(file, showProgress).then(function (status) {
+                    done += file.size;
+                    results.push(status);
+                });
+            });
+        }, Promise.resolve()).then(function () {
+            setProps(storeId, {data: {
+                upload_ids: results.map(function (s) { return s.upload_id; }),
+                filenames: results.map(function (s) { return s.filename; })
+            }});
+        }).catch(function (err) {
+            setProps(storeId, {data: {error: err.message}});
+        });
+    }
+
+    function fieldFor(event) {
+        return event.target.closest ? event.target.closest('.chunked-upload') : null;
+    }
+
+    document.addEventListener('change', function (event) {
+        var field = fieldFor(event);
+        if (field && event.target.files && event.target.files.length) {
+            event.stopPropagation();
+            uploadFiles(field, event.target.files);
+            event.target.value = '';
+        }
+    }, true);
+
+    document.addEventListener('drop', function (event) {
+        var field = fieldFor(event);
+        if (field && event.dataTransfer && event.dataTransfer.files.length) {
+            event.preventDefault();
+            event.stopPropagation();
+            uploadFiles(field, event.dataTransfer.files);
+        }
+    }, true);
+})();
@@ -0,0 +1,24 @@
+// Clicks the dashboard "Load more" button when it scrolls into view, so the
+// card grids load the next page as the user reaches the bottom.
+(function () {
+    var THRESHOLD_PX = 300;
+    var MIN_INTERVAL_MS = 500;
+    var lastClick = 0;
+
+    function maybeLoadMore() {
+        var btn = document.getElementById('load-more-btn');
+        if (!btn || btn.offsetParent === null) {
+            return;
+        }
+        // Wait for the previous page to arrive before asking for another
+        if (btn.getAttribute('data-dash-is-loading') || Date.now() - lastClick < MIN_INTERVAL_MS) {
+            return;
+        }
+        if (btn.getBoundingClientRect().top - window.innerHeight < THRESHOLD_PX) {
+            lastClick = Date.now();
+            btn.click();
+        }
+    }
+
+    window.addEventListener('scroll', maybeLoadMore, {passive: true, capture: true});
+})();
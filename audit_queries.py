@@ -0,0 +1,157 @@
+"""Run EXPLAIN QUERY PLAN over every SQL statement in the codebase and flag full scans.
+
+Usage: python audit_queries.py [database]
+
+Finds the SQL passed to execute()/executemany()/read_sql()/read_sql_query()
+in the project's modules and asks SQLite how it would run each one against
+the (already migrated) database, opened read-only. A statement is flagged
+when it scans a whole table or sorts with a temporary B-tree. Statements
+built from f-strings are planned with each placeholder replaced by the
+value it takes, where a module spells those out in SQL_PARAMETERS below;
+the rest are listed as not audited. Exits 1 if anything unexpected scans.
+Mark statements whose scans are deliberate with a "# scan-ok" comment.
+"""
+import ast
+import glob
+import os
+import re
+import sqlite3
+import sys
+from db import DB_PATH
+
+SQL_CALLS = ('execute', 'executemany', 'read_sql', 'read_sql_query')
+SQL_START = re.compile(r'^\s*(SELECT|WITH|UPDATE|DELETE|INSERT|REPLACE)\b', re.IGNORECASE)
+
+# Catalog tables are read whole into memory once per process (catalog.py)
+# and the admin pages list every user, so scans of them are intended; the
+# others are startup-only or hold a handful of rows (catalog_versions has
+# one per catalog table).
+CATALOG_TABLES = ('courses', 'courses2', 'ebooks', 'schemes', 'live')
+EXPECTED_SCANS = CATALOG_TABLES + ('users', 'sqlite_master', 'table_counts', 'catalog_versions')
+
+# Put this comment on the line above a statement to accept its scans, e.g.
+# one-off passes in migrations
+SCAN_OK = '# scan-ok'
+
+# Values for the {placeholders} of dynamic SQL, so it can be planned too
+SQL_PARAMETERS = {
+    'kind': ('documents', 'study_materials', 'certificates', 'folder_files'),
+    'table': ('documents', 'study_materials', 'certificates', 'folder_files'),
+    'table_name': CATALOG_TABLES,
+    'ENTRY_COLUMNS': ('kind, item_id, folder_id, name, description, file_name, blob_hash, size, modified',),
+}
+
+SKIP_FILES = ('audit_queries.py', 'bench_formatters.py')
+
+
+def _sql_templates(node):
+    """SQL strings a call's first argument can produce; [None] if they cannot be resolved"""
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return [node.value]
+    if not isinstance(node, ast.JoinedStr):
+        return []
+
+    names = []
+    for part in node.values:
+        if isinstance(part, ast.FormattedValue):
+            names.append(part.value.id if isinstance(part.value, ast.Name) else None)
+    if not names or any(name not in SQL_PARAMETERS for name in names):
+        return [None]
+
+    # One candidate per value; placeholders with the same name take the same value
+    templates = []
+    for i in range(max(len(SQL_PARAMETERS[name]) for name in names)):
+        sql = ''
+        for part in node.values:
+            if isinstance(part, ast.Constant):
+                sql += part.value
+            else:
+                values = SQL_PARAMETERS[part.value.id]
+                sql += values[min(i, len(values) - 1)]
+        templates.append(sql)
+    return templates
+
+
+def find_statements(paths):
+    """(file, line, sql or None) for each SQL call; None marks SQL that cannot be resolved"""
+    statements = []
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            source = f.read()
+        lines = source.splitlines()
+        for node in ast.walk(ast.parse(source, filename=path)):
+            if not (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)
+                    and node.func.attr in SQL_CALLS and node.args):
+                continue
+            if node.lineno > 1 and lines[node.lineno - 2].strip().startswith(SCAN_OK):
+                continue
+            for sql in _sql_templates(node.args[0]):
+                if sql is None:
+                    statements.append((path, node.lineno, None))
+                elif SQL_START.match(sql):
+                    statements.append((path, node.lineno, sql))
+    return statements
+
+
+def explain(conn, sql):
+    """Plan details for a statement, with every parameter bound to NULL"""
+    named = re.findall(r'(?<!:):(\w+)', sql)
+    params = {name: None for name in named} if named else [None] * sql.count('?')
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+
+def partial_indexes(conn):
+    """Names of indexes with a WHERE clause; scanning one only reads matching rows"""
+    rows = conn.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND sql LIKE '% WHERE %'")
+    return {row[0] for row in rows}
+
+
+def problems(plan, partial):
+    """Plan lines that mean a full scan or an extra sort"""
+    flagged = []
+    for detail in plan:
+        scan = re.match(r'SCAN (\w+)(?:.* INDEX (\w+))?', detail)
+        if (scan and scan.group(1).lower() not in EXPECTED_SCANS and scan.group(2) not in partial
+                and 'VIRTUAL TABLE' not in detail):
+            flagged.append(detail)
+        elif detail.startswith('USE TEMP B-TREE'):
+            flagged.append(detail)
+    return flagged
+
+
+def main():
+    db_path = sys.argv[1] if len(sys.argv) > 1 else DB_PATH
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    partial = partial_indexes(conn)
+
+    root = os.path.dirname(os.path.abspath(__file__))
+    paths = sorted(p for p in glob.glob(os.path.join(root, '*.py')) if os.path.basename(p) not in SKIP_FILES)
+
+    flagged, unresolved, errors, planned = [], [], [], 0
+    for path, line, sql in find_statements(paths):
+        where = f"{os.path.basename(path)}:{line}"
+        if sql is None:
+            unresolved.append(where)
+            continue
+        try:
+            plan = explain(conn, sql)
+        except sqlite3.Error as e:
+            errors.append((where, str(e)))
+            continue
+        planned += 1
+        for detail in problems(plan, partial):
+            flagged.append((where, detail, ' '.join(sql.split())))
+    conn.close()
+
+    print(f"{planned} statements planned")
+    for where, detail, sql in flagged:
+        print(f"FLAG  {where}  {detail}\n      {sql[:120]}")
+    for where, error in errors:
+        print(f"ERROR {where}  {error}")
+    if unresolved:
+        print(f"Not audited (dynamic SQL): {', '.join(unresolved)}")
+    return 1 if flagged else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
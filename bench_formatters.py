@@ -0,0 +1,70 @@
+"""Benchmark the dashboard card formatters on a synthetic catalog.
+
+Usage: python bench_formatters.py [rows]
+"""
+import json
+import sys
+import time
+import pandas as pd
+import plotly
+from courses_formatter import build_course_card, build_course_cards, COURSE_CARD_COLUMNS
+from ebooks_formatter import build_ebook_card, build_ebook_cards, EBOOK_CARD_COLUMNS
+from school_courses_formatter import build_courses2_card, build_courses2_cards, COURSES2_CARD_COLUMNS
+from user_dashboard import build_scheme_card, build_scheme_cards, SCHEME_CARD_COLUMNS
+
+DEFAULT_ROWS = 10000
+
+
+def make_frame(columns, rows):
+    """Synthetic catalog rows with realistic-looking text"""
+    data = {}
+    for col in columns:
+        if col == 'search_snippet':
+            continue
+        data[col] = [f"{col.replace('_', ' ').title()} {i % 997} lorem ipsum dolor" for i in range(rows)]
+    return pd.DataFrame(data)
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def uncached_iterrows(card_fn, columns, df):
+    """Every card rebuilt, with rows boxed into Series by iterrows()
+
+    Calls the current card builders with their cache bypassed. It is not the
+    pre-memoization code, which also rebuilt its style dicts for every card.
+    """
+    build = card_fn.__wrapped__
+    return [build(i, *(row.get(col) for col in columns)) for i, row in df.iterrows()]
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS
+    formatters = [
+        ("courses", build_course_card, build_course_cards, COURSE_CARD_COLUMNS),
+        ("courses2", build_courses2_card, build_courses2_cards, COURSES2_CARD_COLUMNS),
+        ("ebooks", build_ebook_card, build_ebook_cards, EBOOK_CARD_COLUMNS),
+        ("schemes", build_scheme_card, build_scheme_cards, SCHEME_CARD_COLUMNS),
+    ]
+
+    print(f"{rows} rows, microseconds per row")
+    print(f"{'table':<10}{'uncached':>12}{'cold':>12}{'warm':>12}{'to_json':>12}")
+    for name, card_fn, build_fn, columns in formatters:
+        df = make_frame(columns, rows)
+
+        _, baseline = timed(uncached_iterrows, card_fn, columns, df)
+        card_fn.cache_clear()
+        cards, cold = timed(build_fn, df)
+        _, warm = timed(build_fn, df)
+        _, encode = timed(json.dumps, cards, cls=plotly.utils.PlotlyJSONEncoder)
+
+        per_row = lambda seconds: seconds / rows * 1e6
+        print(f"{name:<10}{per_row(baseline):>12.1f}{per_row(cold):>12.1f}"
+              f"{per_row(warm):>12.1f}{per_row(encode):>12.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,194 @@
+import hashlib
+import os
+import shutil
+import uuid
+from datetime import datetime
+from db import get_connection
+
+# User files are stored once per distinct content under BLOB_DIR, sharded by
+# the first two bytes of their SHA-256 (ab/cd/abcd...). Rows that own a file
+# carry its blob_hash; triggers keep blobs.ref_count in step with those rows
+# and collect() deletes blobs that nothing refers to any more.
+BLOB_DIR = 'data/blobs'
+HASH_BUFFER = 1024 * 1024
+
+# Tables whose rows own a blob. file_path holds the original file name.
+BLOB_OWNERS = ('documents', 'study_materials', 'certificates', 'folder_files')
+
+# Where each owner's files lived before the blob store
+LEGACY_DIRS = {
+    'documents': 'static/documents',
+    'study_materials': 'static/study_materials',
+    'certificates': 'static/certificates',
+}
+
+def blob_path(blob_hash):
+    return os.path.join(BLOB_DIR, blob_hash[:2], blob_hash[2:4], blob_hash)
+
+
+def file_hash(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BUFFER), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def ingest(cursor, src_path):
+    """Register a file's content in the store and return its hash
+
+    Call this in the transaction that inserts the owning row, and place() the
+    file once that transaction has committed. The blob row is written first,
+    which takes SQLite's write lock, so collect() cannot drop the blob before
+    the owner's reference is committed; and as the file only enters the store
+    after the commit, a transaction that rolls back leaves nothing behind.
+    """
+    blob_hash = file_hash(src_path)
+    cursor.execute('''
+        INSERT INTO blobs (hash, size, ref_count, created_at) VALUES (?, ?, 0, ?)
+        ON CONFLICT (hash) DO NOTHING
+    ''', (blob_hash, os.path.getsize(src_path), datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+    return blob_hash
+
+
+def place(src_path, blob_hash, move=True):
+    """Put an ingested file into the store, after its owner has committed"""
+    path = blob_path(blob_hash)
+    if os.path.exists(path):
+        # Same content is already stored
+        if move:
+            os.remove(src_path)
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    if move:
+        shutil.move(src_path, tmp_path)
+    else:
+        shutil.copyfile(src_path, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def collect():
+    """Delete blobs that no row refers to any more"""
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM blobs WHERE ref_count <= 0 RETURNING hash")
+        hashes = [row[0] for row in cursor.fetchall()]
+        for blob_hash in hashes:
+            path = blob_path(blob_hash)
+            if os.path.exists(path):
+                os.remove(path)
+        conn.commit()
+    finally:
+        conn.close()
+    return len(hashes)
+
+
+def get_owned_file(kind, file_id, user_id):
+    """(blob path, original file name, blob hash) of a user's file, or None"""
+    if kind not in BLOB_OWNERS:
+        return None
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT blob_hash, file_path FROM {kind} WHERE id = ? AND user_id = ?", (file_id, user_id))
+    row = cursor.fetchone()
+    conn.close()
+    if row is None or row[0] is None:
+        return None
+    return blob_path(row[0]), row[1], row[0]
+
+
+def user_usage(user_id):
+    """Bytes of files owned by a user, counting shared content once per owner row"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    owned = " UNION ALL ".join(f"SELECT blob_hash FROM {t} WHERE user_id = ?" for t in BLOB_OWNERS)
+    cursor.execute(f'''
+        SELECT COALESCE(SUM(b.size), 0)
+        FROM ({owned}) o JOIN blobs b ON b.hash = o.blob_hash
+    ''', (user_id,) * len(BLOB_OWNERS))
+    total = cursor.fetchone()[0]
+    conn.close()
+    return total
+
+
+def _migrate_legacy_files(cursor):
+    """Register files saved under static/ before the blob store
+
+    Returns the (path, blob hash) pairs to place() once the rows are committed.
+    """
+    pending = []
+    for table, legacy_dir in LEGACY_DIRS.items():
+        # scan-ok: one-off pass over rows from before the blob store
+        cursor.execute(f"SELECT id, user_id, file_path FROM {table} WHERE blob_hash IS NULL AND file_path IS NOT NULL")
+        for row_id, user_id, file_path in cursor.fetchall():
+            src = os.path.join(legacy_dir, str(user_id), file_path)
+            if os.path.isfile(src):
+                blob_hash = ingest(cursor, src)
+                cursor.execute(f"UPDATE {table} SET blob_hash = ? WHERE id = ?", (blob_hash, row_id))
+                pending.append((src, blob_hash))
+
+    # scan-ok: one-off pass over folders from before the blob store
+    cursor.execute('''
+        SELECT id, user_id, folder_path, upload_date FROM folders
+        WHERE NOT EXISTS (SELECT 1 FROM folder_files ff WHERE ff.folder_id = folders.id)
+    ''')
+    for folder_id, user_id, folder_path, upload_date in cursor.fetchall():
+        folder_dir = os.path.join('static', 'folders', str(user_id), folder_path or '')
+        if not folder_path or not os.path.isdir(folder_dir):
+            continue
+        for filename in sorted(os.listdir(folder_dir)):
+            src = os.path.join(folder_dir, filename)
+            if os.path.isfile(src):
+                blob_hash = ingest(cursor, src)
+                cursor.execute('''
+                    INSERT INTO folder_files (folder_id, user_id, file_path, blob_hash, upload_date)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', (folder_id, user_id, filename, blob_hash, upload_date))
+                pending.append((src, blob_hash))
+    return pending
+
+
+def init_blobs():
+    """Create the reference-counting triggers and move old files in
+
+    Runs as a schema migration, after the blobs and owner tables exist.
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    for table in BLOB_OWNERS:
+        cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_blob_ai AFTER INSERT ON {table}
+        WHEN new.blob_hash IS NOT NULL BEGIN
+            UPDATE blobs SET ref_count = ref_count + 1 WHERE hash = new.blob_hash;
+        END
+        """)
+        cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_blob_ad AFTER DELETE ON {table}
+        WHEN old.blob_hash IS NOT NULL BEGIN
+            UPDATE blobs SET ref_count = ref_count - 1 WHERE hash = old.blob_hash;
+        END
+        """)
+        cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_blob_au AFTER UPDATE OF blob_hash ON {table} BEGIN
+            UPDATE blobs SET ref_count = ref_count - 1 WHERE hash = old.blob_hash;
+            UPDATE blobs SET ref_count = ref_count + 1 WHERE hash = new.blob_hash;
+        END
+        """)
+
+    # A folder's files go with it
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS folders_files_ad AFTER DELETE ON folders BEGIN
+        DELETE FROM folder_files WHERE folder_id = old.id;
+    END
+    ''')
+
+    pending = _migrate_legacy_files(cursor)
+    conn.commit()
+    conn.close()
+
+    # Only move the old files once the rows pointing at the blobs are committed
+    for path, blob_hash in pending:
+        place(path, blob_hash)
@@ -0,0 +1,257 @@
+import threading
+import time
+import pandas as pd
+from db import get_connection
+import search
+import facets
+
+# Catalog tables only change when an admin edits them, so each one is read
+# once per process and kept in memory until invalidate() bumps the version.
+CATALOG_TABLES = ('courses', 'courses2', 'ebooks', 'schemes', 'live')
+
+# Writers in other processes (ingest_catalog.py) bump the table's row in
+# catalog_versions; each process looks at it at most every
+# VERSION_CHECK_INTERVAL seconds and drops tables that changed.
+VERSION_CHECK_INTERVAL = 30
+
+_lock = threading.Lock()
+_version = 0
+_entries = {}   # table -> (version, DataFrame indexed by id, facet index)
+_seen_versions = None   # table -> catalog_versions.version last seen
+_checked_at = 0
+
+
+def get_version():
+    """Current catalog version"""
+    return _version
+
+
+def invalidate(table_name=None):
+    """Bump the catalog version after an admin write so the next read reloads"""
+    global _version
+    with _lock:
+        _version += 1
+        if table_name:
+            _entries.pop(table_name, None)
+        else:
+            _entries.clear()
+
+
+def bump_version(cursor, table_name):
+    """Record, in the writer's transaction, that a catalog table changed"""
+    cursor.execute('''
+        INSERT INTO catalog_versions (table_name, version) VALUES (?, 1)
+        ON CONFLICT (table_name) DO UPDATE SET version = version + 1
+    ''', (table_name,))
+
+
+def _check_versions():
+    """Invalidate tables another process has written since the last look"""
+    global _seen_versions, _checked_at
+    # Claim the check under the lock so only one request thread runs it
+    with _lock:
+        now = time.monotonic()
+        if now - _checked_at < VERSION_CHECK_INTERVAL:
+            return
+        _checked_at = now
+    try:
+        conn = get_connection()
+        try:
+            versions = dict(conn.execute("SELECT table_name, version FROM catalog_versions").fetchall())
+        finally:
+            conn.close()
+    except Exception as e:
+        print(f"Error checking catalog versions: {e}")
+        return
+
+    with _lock:
+        changed = []
+        if _seen_versions is not None:
+            changed = [t for t, version in versions.items() if _seen_versions.get(t) != version]
+        _seen_versions = versions
+    # invalidate() takes the lock itself
+    for table_name in changed:
+        invalidate(table_name)
+
+
+def ensure_primary_keys():
+    """Give catalog tables an INTEGER PRIMARY KEY id column
+
+    Tables imported without a key are rebuilt once, keeping each row's
+    rowid as its id so existing search index entries stay valid.
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    for table in CATALOG_TABLES:
+        cursor.execute(f'PRAGMA table_info("{table}")')
+        columns = [(col[1], col[2]) for col in cursor.fetchall()]
+        if not columns or any(name == 'id' for name, _ in columns):
+            continue
+
+        col_defs = ", ".join(f'"{name}" {col_type}' for name, col_type in columns)
+        col_list = ", ".join(f'"{name}"' for name, _ in columns)
+        try:
+            cursor.execute("BEGIN")
+            cursor.execute(f'CREATE TABLE "{table}__new" (id INTEGER PRIMARY KEY, {col_defs})')
+            cursor.execute(f'INSERT INTO "{table}__new" (id, {col_list}) SELECT rowid, {col_list} FROM "{table}"')
+            cursor.execute(f'DROP TABLE "{table}"')
+            cursor.execute(f'ALTER TABLE "{table}__new" RENAME TO "{table}"')
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            print(f"Error adding primary key to {table}: {e}")
+
+    conn.close()
+
+
+def add_row_versions():
+    """Give catalog tables a version column for optimistic admin edits"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    for table in CATALOG_TABLES:
+        cursor.execute(f'PRAGMA table_info("{table}")')
+        columns = [col[1] for col in cursor.fetchall()]
+        if columns and 'version' not in columns:
+            cursor.execute(f'ALTER TABLE "{table}" ADD COLUMN version INTEGER NOT NULL DEFAULT 0')
+    conn.commit()
+    conn.close()
+
+
+def _write(table_name, sql, params):
+    """Run a single-row write and publish it; returns the cursor, or None if no row matched"""
+    if table_name not in CATALOG_TABLES:
+        raise ValueError(f"Unknown catalog table: {table_name}")
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(sql, params)
+        if cursor.rowcount != 1:
+            conn.rollback()
+            cursor = None
+        else:
+            bump_version(cursor, table_name)
+            conn.commit()
+    finally:
+        conn.close()
+    # A miss means the row changed elsewhere, so the cached copy is stale too
+    invalidate(table_name)
+    return cursor
+
+
+# Admin edits address rows by id and carry the version they were read at:
+# a row someone else changed or deleted in the meantime is left alone and
+# the write reports False instead of overwriting it.
+def insert_row(table_name, values):
+    """Add a row from {column: value}; returns its id, or None if no row was added"""
+    col_list = ", ".join(f'"{c}"' for c in values)
+    placeholders = ", ".join("?" for _ in values)
+    cursor = _write(table_name, f'INSERT INTO "{table_name}" ({col_list}) VALUES ({placeholders})',
+                    tuple(values.values()))
+    if cursor is None:
+        return None
+    return cursor.lastrowid
+
+
+def update_row(table_name, row_id, version, values):
+    """Update one row if it is still at `version`; False if it changed or is gone"""
+    assignments = ", ".join(f'"{c}" = ?' for c in values)
+    cursor = _write(table_name, f'UPDATE "{table_name}" SET {assignments}, version = version + 1 WHERE id = ? AND version = ?',
+                    tuple(values.values()) + (row_id, version))
+    return cursor is not None
+
+
+def delete_row(table_name, row_id, version):
+    """Delete one row if it is still at `version`; False if it changed or is gone"""
+    cursor = _write(table_name, f'DELETE FROM "{table_name}" WHERE id = ? AND version = ?', (row_id, version))
+    return cursor is not None
+
+
+def _load(table_name):
+    conn = get_connection()
+    try:
+        # The id index maps search hits and /course/<id> links onto rows
+        df = pd.read_sql(f'SELECT * FROM "{table_name}"', conn, index_col='id')
+    finally:
+        conn.close()
+    return df, facets.build_index(table_name, df)
+
+
+def _get_entry(table_name):
+    if table_name not in CATALOG_TABLES:
+        raise ValueError(f"Unknown catalog table: {table_name}")
+
+    _check_versions()
+    entry = _entries.get(table_name)
+    if entry and entry[0] == _version:
+        return entry
+
+    with _lock:
+        entry = _entries.get(table_name)
+        if entry and entry[0] == _version:
+            return entry
+        entry = (_version,) + _load(table_name)
+        _entries[table_name] = entry
+        return entry
+
+
+def get_table(table_name):
+    """Return the cached DataFrame for a catalog table (treat it as read-only)"""
+    return _get_entry(table_name)[1]
+
+
+def query(table_name, search_query=None, filters=None):
+    """Filter a catalog table by full-text search and column equality
+
+    Search results come back in relevance order with a `search_snippet`
+    column holding the highlighted match.
+    """
+    _, df, index = _get_entry(table_name)
+    filters = {c: v for c, v in (filters or {}).items() if v}
+
+    # Faceted columns are answered from the bitset index; anything else
+    # falls back to a column comparison
+    faceted = {c: v for c, v in filters.items() if facets.has_facet(index, c)}
+    selected = facets.bits_to_mask(facets.select(index, faceted), len(df))
+    for column, value in filters.items():
+        if column not in faceted:
+            selected &= (df[column] == value).values
+
+    if search_query:
+        # The filters go into the search itself, so SEARCH_LIMIT caps the
+        # filtered hits rather than cutting the best matches before filtering.
+        # Hits stay in relevance order; any not in the cached table are dropped.
+        hits = search.search(table_name, search_query, filters)
+        positions = df.index.get_indexer([rowid for rowid, _ in hits])
+        keep = positions >= 0
+        keep[keep] = selected[positions[keep]]
+        result = df.iloc[positions[keep]].assign(
+            search_snippet=[snippet for (_, snippet), ok in zip(hits, keep) if ok]
+        )
+    else:
+        result = df[selected]
+
+    # The index holds each row's id; course links are built from it
+    return result
+
+
+def facet_values(table_name, column, filters=None):
+    """Distinct values of a filter column that still match the other filters"""
+    index = _get_entry(table_name)[2]
+    filters = {c: v for c, v in (filters or {}).items() if v}
+    return facets.values(index, column, filters)
+
+
+def facet_counts(table_name, column):
+    """Row count per value of a filter column"""
+    return facets.counts(_get_entry(table_name)[2], column)
+
+
+def row_count(table_name):
+    """Number of rows in a catalog table"""
+    return _get_entry(table_name)[2]['size']
+
+
+def distinct_count(table_name, column):
+    """Number of distinct non-null values in a filter column"""
+    return len(_get_entry(table_name)[2]['columns'].get(column, {}))
@@ -1,52 +1,66 @@
 import dash_bootstrap_components as dbc
-from dash import html, callback_context
+from dash import html
+from functools import lru_cache
+from search import render_snippet
+from formatter_utils import CARD_CACHE_SIZE, iter_rows
 
-def format_courses_table(df):
+# Static styles shared by every card
+GLOBE_ICON_STYLE = {'color': '#3498db'}
+COURSE_BUTTON_STYLE = {
+    'background': 'linear-gradient(135deg, #3498db, #2980b9)',
+    'border': 'none',
+    'boxShadow': '0 4px 15px rgba(52, 152, 219, 0.2)',
+    'transition': 'all 0.3s ease'
+}
+COURSE_CARD_STYLE = {
+    'border': 'none',
+    'borderRadius': '15px',
+    'boxShadow': '0 5px 15px rgba(0, 0, 0, 0.08)',
+    'transition': 'transform 0.3s ease, box-shadow 0.3s ease',
+    'cursor': 'pointer'
+}
+
+COURSE_CARD_COLUMNS = ('course_name_', 'website_name', 'search_snippet')
+
+@lru_cache(maxsize=CARD_CACHE_SIZE)
+def build_course_card(i, course_name, website_name, search_snippet):
+    """Build the grid column for one course"""
+    card = dbc.Card([
+        dbc.CardBody([
+            html.H5(course_name, className="course-title"),
+            # Highlighted match when the list comes from a search
+            html.P(render_snippet(search_snippet), className="search-snippet small text-muted")
+            if search_snippet else None,
+            html.Div([
+                html.I(className="fas fa-globe me-2", style=GLOBE_ICON_STYLE),
+                html.Span(website_name, className="text-muted"),
+            ], className="website-info mb-3"),
+            html.Div([
+                dbc.Button(
+                    [
+                        html.I(className="fas fa-external-link-alt me-2"),
+                        "View Course"
+                    ],
+                    href=f"/course/{i}",  # Rows are indexed by their primary key
+                    target="_blank",
+                    color="primary",
+                    className="course-btn",
+                    style=COURSE_BUTTON_STYLE
+                )
+            ], className="d-flex justify-content-start align-items-center mt-3")
+        ])
+    ], className="course-card mb-3 h-100", style=COURSE_CARD_STYLE)
+    return dbc.Col(card, lg=4, md=6, sm=12)
+
+def build_course_cards(df):
+    """Build the grid columns for a page of courses"""
+    return [build_course_card(*row) for row in iter_rows(df, COURSE_CARD_COLUMNS)]
+
+def format_courses_table(df, total=None):
     """Format the courses table with minimal info and show details button"""
-    # Apply filters if provided
-    discipline_filter = callback_context.states.get("discipline-filter.value")
-    if discipline_filter:
-        df = df[df['dispcipline'] == discipline_filter]
-    
-    cards = []
-    for i, row in df.iterrows():
-        card = dbc.Card([
-            dbc.CardBody([
-                html.H5(row['course_name_'], className="course-title"),
-                html.Div([
-                    html.I(className="fas fa-globe me-2", style={'color': '#3498db'}),
-                    html.Span(row['website_name'], className="text-muted"),
-                ], className="website-info mb-3"),
-                html.Div([
-                    dbc.Button(
-                        [
-                            html.I(className="fas fa-external-link-alt me-2"),
-                            "View Course"
-                        ],
-                        href=f"/course/{i}",  # Changed to use index-based routing
-                        target="_blank",
-                        color="primary",
-                        className="course-btn",
-                        style={
-                            'background': 'linear-gradient(135deg, #3498db, #2980b9)',
-                            'border': 'none',
-                            'boxShadow': '0 4px 15px rgba(52, 152, 219, 0.2)',
-                            'transition': 'all 0.3s ease'
-                        }
-                    )
-                ], className="d-flex justify-content-start align-items-center mt-3")
-            ])
-        ], className="course-card mb-3 h-100", style={
-            'border': 'none',
-            'borderRadius': '15px',
-            'boxShadow': '0 5px 15px rgba(0, 0, 0, 0.08)',
-            'transition': 'transform 0.3s ease, box-shadow 0.3s ease',
-            'cursor': 'pointer'
-        })
-        cards.append(dbc.Col(card, lg=4, md=6, sm=12))
-    
+    # The rows arrive already filtered by catalog.query
     return html.Div([
         html.H3("UG/PG Courses", className="courses-title mb-3"),
-        html.P(f"Showing {len(df)} courses", className="courses-count text-muted mb-3"),
-        dbc.Row(cards, className="courses-grid g-3")
+        html.P(f"Found {total if total is not None else len(df)} courses", className="courses-count text-muted mb-3"),
+        dbc.Row(build_course_cards(df), id="results-grid", className="courses-grid g-3")
     ], className="courses-container")
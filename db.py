@@ -0,0 +1,79 @@
+import queue
+import sqlite3
+import threading
+
+DB_PATH = 'data/USDH.db'
+
+# Idle connections kept around for reuse; extra ones are closed on release
+POOL_SIZE = 8
+
+# Applied once when a connection is opened, not on every checkout
+CONNECTION_PRAGMAS = (
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA cache_size = -16000",      # ~16 MB page cache per connection
+    "PRAGMA mmap_size = 268435456",    # map up to 256 MB of the file
+    "PRAGMA temp_store = MEMORY",
+)
+
+_pool = queue.LifoQueue(maxsize=POOL_SIZE)
+_wal_lock = threading.Lock()
+_wal_enabled = False
+
+
+class PooledConnection(sqlite3.Connection):
+    """sqlite3 connection whose close() hands it back to the pool"""
+
+    def close(self):
+        if getattr(self, '_released', False):
+            return
+        self._released = True
+        try:
+            # Never hand out a connection with a half-finished transaction
+            if self.in_transaction:
+                self.rollback()
+            _pool.put_nowait(self)
+        except (queue.Full, sqlite3.Error):
+            super().close()
+
+
+def _enable_wal(conn):
+    """Switch the database to WAL mode (persistent, so only done once per process)"""
+    global _wal_enabled
+    with _wal_lock:
+        if not _wal_enabled:
+            conn.execute("PRAGMA journal_mode = WAL")
+            _wal_enabled = True
+
+
+def _open_connection():
+    conn = sqlite3.connect(
+        DB_PATH,
+        timeout=10,
+        factory=PooledConnection,
+        cached_statements=256,
+        check_same_thread=False,
+    )
+    _enable_wal(conn)
+    for pragma in CONNECTION_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+def get_connection():
+    """Get a connection from the pool; call close() to give it back"""
+    try:
+        conn = _pool.get_nowait()
+    except queue.Empty:
+        conn = _open_connection()
+    conn._released = False
+    return conn
+
+
+def close_all():
+    """Close every idle pooled connection"""
+    while True:
+        try:
+            conn = _pool.get_nowait()
+        except queue.Empty:
+            break
+        sqlite3.Connection.close(conn)
@@ -1,44 +1,49 @@
 import dash_bootstrap_components as dbc
-from dash import html, callback_context
-import pandas as pd
+from dash import html
+from functools import lru_cache
+from search import render_snippet
+from formatter_utils import CARD_CACHE_SIZE, iter_rows
 
-def format_ebooks_table(df):
-    """Format the ebooks with book-like cards"""
-    # Apply filters if provided
-    subject_filter = callback_context.states.get("ebook-subject-filter.value")
-    state_filter = callback_context.states.get("ebook-state-filter.value")
-    if subject_filter:
-        df = df[df['subject'] == subject_filter]
-    if state_filter:
-        df = df[df['states'] == state_filter]
-    
-    cards = []
-    for idx, row in df.iterrows():
-        card = dbc.Card(
-            dbc.CardBody([
+EBOOK_CARD_COLUMNS = ('website', 'subject', 'states', 'preference', 'link', 'search_snippet')
+
+@lru_cache(maxsize=CARD_CACHE_SIZE)
+def build_ebook_card(idx, website, subject, states, preference, link, search_snippet):
+    """Build the grid column for one e-book"""
+    card = dbc.Card(
+        dbc.CardBody([
+            html.Div([
+                html.Div(className="book-spine-line"),
+                html.H5(website, className="book-card-title"),
+                # Highlighted match when the list comes from a search
+                html.P(render_snippet(search_snippet), className="search-snippet small text-muted")
+                if search_snippet else None,
+                html.P(f"Subject: {subject if subject is not None else '-'}", 
+                       className="book-card-info"),
+                html.P(f"State: {states}", 
+                       className="book-card-info"),
+                html.P(f"Preference: {preference}", 
+                       className="book-card-info text-muted"),
                 html.Div([
-                    html.Div(className="book-spine-line"),
-                    html.H5(row['website'], className="book-card-title"),
-                    html.P(f"Subject: {row['subject'] if pd.notna(row['subject']) else '-'}", 
-                           className="book-card-info"),
-                    html.P(f"State: {row['states']}", 
-                           className="book-card-info"),
-                    html.P(f"Preference: {row['preference']}", 
-                           className="book-card-info text-muted"),
-                    html.Div([
-                        html.A("View Resource", 
-                              href=row['link'],
-                              target="_blank",
-                              className="book-view-btn")
-                    ], className="d-flex justify-content-start align-items-center")
-                ], className="book-inner-content")
-            ]),
-            className="custom-book-card mb-4"
-        )
-        cards.append(dbc.Col(card, lg=4, md=6, sm=12))
-    
+                    html.A("View Resource", 
+                          href=link,
+                          target="_blank",
+                          className="book-view-btn")
+                ], className="d-flex justify-content-start align-items-center")
+            ], className="book-inner-content")
+        ]),
+        className="custom-book-card mb-4"
+    )
+    return dbc.Col(card, lg=4, md=6, sm=12)
+
+def build_ebook_cards(df):
+    """Build the grid columns for a page of e-books"""
+    return [build_ebook_card(*row) for row in iter_rows(df, EBOOK_CARD_COLUMNS)]
+
+def format_ebooks_table(df, total=None):
+    """Format the ebooks with book-like cards"""
+    # The rows arrive already filtered by catalog.query
     return html.Div([
         html.H3("Educational E-Books", className="ebooks-title"),
-        html.P(f"Showing {len(df)} e-books resources", className="ebooks-count"),
-        dbc.Row(cards, className="g-4")
+        html.P(f"Found {total if total is not None else len(df)} e-books resources", className="ebooks-count"),
+        dbc.Row(build_ebook_cards(df), id="results-grid", className="g-4")
     ], className="ebooks-container")
@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+
+# Filter columns that get a facet index, per catalog table. Each distinct
+# value costs a bitset as long as the table, so only low-cardinality
+# columns belong here (disciplines, portals, grades): a near-unique column
+# such as a scheme or course name grows the index with rows squared.
+FACET_COLUMNS = {
+    'courses': ('dispcipline', 'website_name', '_ug/pg'),
+    'courses2': ('subjects', 'grade', 'website_name'),
+    'ebooks': ('subject', 'states', 'preference', 'website'),
+    'live': ('grade',),
+}
+
+
+def _positions_to_bits(positions, size):
+    """Pack row positions into an int used as a bitset (bit i = row i)"""
+    flags = np.zeros(size, dtype=bool)
+    flags[positions] = True
+    return int.from_bytes(np.packbits(flags, bitorder='little').tobytes(), 'little')
+
+
+def bits_to_mask(bits, size):
+    """Unpack a bitset into a boolean array over the table's rows"""
+    raw = np.frombuffer(bits.to_bytes((size + 7) // 8, 'little'), dtype=np.uint8)
+    return np.unpackbits(raw, bitorder='little', count=size).astype(bool)
+
+
+def build_index(table_name, df):
+    """Build value -> row bitset maps for every facet column of a table"""
+    size = len(df)
+    columns = {}
+    for col in FACET_COLUMNS.get(table_name, ()):
+        if col not in df.columns:
+            continue
+        # groupby drops NaN/None keys, which never appear as filter options
+        groups = pd.Series(np.arange(size), index=df.index).groupby(df[col].values, sort=False)
+        columns[col] = {value: _positions_to_bits(rows.values, size) for value, rows in groups}
+    return {'size': size, 'columns': columns}
+
+
+def has_facet(index, column):
+    return column in index['columns']
+
+
+def select(index, filters):
+    """AND together the bitsets for {column: value} filters"""
+    bits = (1 << index['size']) - 1
+    for column, value in filters.items():
+        bits &= index['columns'][column].get(value, 0)
+        if not bits:
+            break
+    return bits
+
+
+def values(index, column, filters=None):
+    """Values of a facet column that still have rows under the other filters"""
+    others = {c: v for c, v in (filters or {}).items() if c != column and v}
+    bits = select(index, others)
+    return [value for value, value_bits in index['columns'][column].items() if value_bits & bits]
+
+
+def counts(index, column):
+    """Row count for every value of a facet column"""
+    return {value: value_bits.bit_count() for value, value_bits in index['columns'][column].items()}
@@ -0,0 +1,47 @@
+import os
+from flask import current_app, request
+from werkzeug.utils import send_file
+
+# Blob URLs always point at the same bytes, so browsers may keep them a year
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+# Behind nginx, point this at an internal location that aliases the project
+# directory and nginx sends the bytes itself (X-Accel-Redirect). Apache and
+# lighttpd use Flask's USE_X_SENDFILE setting instead.
+ACCEL_REDIRECT_PREFIX = os.environ.get('USDH_ACCEL_REDIRECT_PREFIX')
+
+
+def send_private_file(path, filename, etag=True, immutable=False, as_attachment=False):
+    """Send a file the caller has already authorized
+
+    Answers If-None-Match / If-Modified-Since with 304 and Range with 206.
+    The file goes to the WSGI server's file wrapper (sendfile where the
+    server supports it), or to the front-end server when X-Sendfile or
+    X-Accel-Redirect is configured, so Python never copies the bytes.
+    """
+    accel = bool(ACCEL_REDIRECT_PREFIX)
+    response = send_file(
+        path,
+        request.environ,
+        download_name=filename,
+        as_attachment=as_attachment,
+        etag=etag,
+        conditional=True,
+        use_x_sendfile=accel or current_app.config['USE_X_SENDFILE'],
+        response_class=current_app.response_class,
+    )
+
+    if accel and 'X-Sendfile' in response.headers:
+        del response.headers['X-Sendfile']
+        response.headers['X-Accel-Redirect'] = f"{ACCEL_REDIRECT_PREFIX.rstrip('/')}/{path}"
+
+    # Private: these are per-user files behind a session check
+    response.cache_control.private = True
+    if immutable:
+        response.cache_control.no_cache = None
+        response.cache_control.max_age = IMMUTABLE_MAX_AGE
+        response.cache_control.immutable = True
+    else:
+        # Revalidate every time; the ETag turns repeat downloads into a 304
+        response.cache_control.no_cache = True
+    return response
@@ -0,0 +1,15 @@
+# Cards are memoized on (row index, row values), so a row that has not
+# changed is never rebuilt. Sized to hold the whole catalog a few times over.
+CARD_CACHE_SIZE = 20000
+
+
+def iter_rows(df, columns):
+    """Yield (index, value, ...) tuples for the given columns
+
+    Columns are pulled out as plain lists once instead of boxing every row
+    into a Series. Missing columns and NaN values come back as None, which
+    keeps the tuples hashable and equal for memoization.
+    """
+    frame = df.reindex(columns=list(columns))
+    frame = frame.astype(object).where(frame.notna(), None)
+    return zip(frame.index.tolist(), *(frame[col].tolist() for col in columns))
@@ -0,0 +1,237 @@
+"""Load a catalog export (NPTEL, Skill India, myScheme, ...) into a catalog table.
+
+Usage: python ingest_catalog.py TABLE FILE [--replace] [--dry-run]
+
+FILE is CSV or TSV (streamed), or JSON (an array of objects) or JSON Lines
+(.jsonl/.ndjson), whose columns are taken from the first object.
+Tables pulled out of PDFs should be extracted to CSV/TSV first. Column
+headers are matched loosely ("Course Name" -> course_name_), text is
+trimmed and whitespace-collapsed, and rows are deduplicated on the table's
+natural key, the last occurrence winning.
+
+Everything is written in one transaction with executemany: changed rows are
+updated in place (keeping their ids, so /course/<id> links survive), new
+rows inserted and, with --replace, rows missing from the export deleted.
+Unchanged rows are not touched, so the search index and table count
+triggers only run for real changes; past BULK_THRESHOLD changed rows both
+are rebuilt once instead, in the same transaction. Running app processes notice within
+catalog.VERSION_CHECK_INTERVAL seconds and reload the table and its facets.
+"""
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+import time
+from db import get_connection
+import catalog
+import schema
+import search
+import stats
+
+# Columns that identify the same catalog entry across exports
+NATURAL_KEYS = {
+    'courses': ('course_name_', 'course_link'),
+    'courses2': ('subjects', 'grade', 'video_link'),
+    'ebooks': ('website', 'states', 'link'),
+    'schemes': ('name',),
+    'live': ('grade', 'link'),
+}
+
+# Above this many changed rows the search index and table counts are
+# rebuilt once instead of being updated by triggers row by row
+BULK_THRESHOLD = 10000
+
+# Export headers (after lower-casing and turning spaces into _) that do not
+# match the column name
+HEADER_ALIASES = {
+    'courses': {'course_name': 'course_name_', 'name': 'course_name_', 'discipline': 'dispcipline',
+                'ug/pg': '_ug/pg', 'ug_pg': '_ug/pg', 'level': '_ug/pg', 'link': 'course_link'},
+    'courses2': {'subject': 'subjects', 'website': 'website_name', 'link': 'video_link'},
+    'ebooks': {'state': 'states', 'website_name': 'website'},
+    'schemes': {'scheme_name': 'name', 'eligibility_criteria': 'eligiblity_criteria',
+                'eligibility': 'eligiblity_criteria', 'link': 'for_more_info'},
+    'live': {'class': 'grade'},
+}
+
+
+def read_rows(path):
+    """(headers, iterator of value lists) for an export"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext in ('.csv', '.tsv', '.txt'):
+        f = open(path, newline='', encoding='utf-8-sig')
+        reader = csv.reader(f, delimiter='\t' if ext == '.tsv' else ',')
+        headers = next(reader, [])
+
+        def rows():
+            with f:
+                yield from reader
+        return headers, rows()
+
+    if ext in ('.jsonl', '.ndjson'):
+        with open(path, encoding='utf-8') as f:
+            records = [json.loads(line) for line in f if line.strip()]
+    elif ext == '.json':
+        with open(path, encoding='utf-8') as f:
+            records = json.load(f)
+    else:
+        raise ValueError(f"Unsupported export format: {ext}")
+    headers = list(records[0]) if records else []
+    return headers, ([record.get(h) for h in headers] for record in records)
+
+
+def _header(name):
+    return re.sub(r'\s+', '_', str(name).strip().lower())
+
+
+def normalize(value):
+    """Trimmed, whitespace-collapsed text; blanks become None"""
+    if value is None:
+        return None
+    if not isinstance(value, str):
+        value = str(value)
+    return ' '.join(value.split()) or None
+
+
+def table_columns(cursor, table):
+    """Data columns of a catalog table, without the id and row version"""
+    cursor.execute(f'PRAGMA table_info("{table}")')
+    return [row[1] for row in cursor.fetchall() if row[1] not in ('id', 'version')]
+
+
+def load_export(table, path, columns):
+    """Normalized, deduplicated rows of an export
+
+    Returns ({natural key: values tuple}, positions of the columns the export
+    has, number of rows skipped for having no key).
+    """
+    aliases = HEADER_ALIASES.get(table, {})
+    key_positions = [columns.index(c) for c in NATURAL_KEYS[table]]
+    headers, records = read_rows(path)
+
+    # (position in the export, position in the table) for each known column
+    mapping = []
+    for i, header in enumerate(headers):
+        name = aliases.get(_header(header), _header(header))
+        if name in columns:
+            mapping.append((i, columns.index(name)))
+
+    rows, skipped = {}, 0
+    width = len(columns)
+    for record in records:
+        values = [None] * width
+        for source, position in mapping:
+            if source < len(record):
+                values[position] = normalize(record[source])
+        key = tuple((values[p] or '').casefold() for p in key_positions)
+        if not any(key):
+            skipped += 1
+            continue
+        rows[key] = tuple(values)
+    return rows, {position for _, position in mapping}, skipped
+
+
+def upsert(conn, table, columns, rows, present, replace=False):
+    """Apply an export to a table in the caller's transaction; returns counts
+
+    Columns the export does not have (not in present) keep their values.
+    """
+    cursor = conn.cursor()
+    key_positions = [columns.index(c) for c in NATURAL_KEYS[table]]
+    col_list = ", ".join(f'"{c}"' for c in columns)
+
+    # The whole table is compared in memory: one read instead of a lookup per row
+    existing, duplicates = {}, []
+    cursor.execute(f'SELECT id, {col_list} FROM "{table}"')
+    for row_id, *values in cursor:
+        values = tuple(values)
+        key = tuple((normalize(values[p]) or '').casefold() for p in key_positions)
+        if key in existing:
+            duplicates.append(row_id)
+        else:
+            existing[key] = (row_id, values)
+
+    inserts, updates = [], []
+    for key, values in rows.items():
+        current = existing.get(key)
+        if current is None:
+            inserts.append(values)
+            continue
+        row_id, old = current
+        if len(present) < len(columns):
+            values = tuple(v if i in present else old[i] for i, v in enumerate(values))
+        if values != old:
+            updates.append(values + (row_id,))
+
+    deletes = duplicates if replace else []
+    if replace:
+        deletes += [row_id for key, (row_id, _) in existing.items() if key not in rows]
+
+    # Triggers are dropped and recreated inside the transaction, so no other
+    # connection ever sees the table without them
+    bulk = len(inserts) + len(updates) + len(deletes) > BULK_THRESHOLD
+    indexed = table in search.FTS_COLUMNS
+    if bulk:
+        if indexed:
+            search.drop_triggers(cursor, table)
+        stats.drop_triggers(cursor, table)
+
+    placeholders = ", ".join("?" for _ in columns)
+    assignments = ", ".join(f'"{c}" = ?' for c in columns)
+    cursor.executemany(f'INSERT INTO "{table}" ({col_list}) VALUES ({placeholders})', inserts)
+    # Bumping the row version makes an admin's open edit of the row fail
+    # instead of overwriting the new data
+    cursor.executemany(f'UPDATE "{table}" SET {assignments}, version = version + 1 WHERE id = ?', updates)
+    cursor.executemany(f'DELETE FROM "{table}" WHERE id = ?', [(row_id,) for row_id in deletes])
+
+    if bulk:
+        if indexed:
+            search.rebuild(cursor, table)
+            search.create_triggers(cursor, table)
+        stats.seed_counts(cursor, table)
+        stats.create_triggers(cursor, table)
+    if inserts or updates or deletes:
+        catalog.bump_version(cursor, table)
+    return {'inserted': len(inserts), 'updated': len(updates), 'deleted': len(deletes),
+            'unchanged': len(rows) - len(inserts) - len(updates)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load a catalog export into a catalog table")
+    parser.add_argument('table', choices=sorted(NATURAL_KEYS))
+    parser.add_argument('path')
+    parser.add_argument('--replace', action='store_true',
+                        help="delete rows that are not in the export (full reload)")
+    parser.add_argument('--dry-run', action='store_true', help="report the changes without saving them")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    schema.migrate()
+    conn = get_connection()
+    try:
+        columns = table_columns(conn.cursor(), args.table)
+        if not columns:
+            raise ValueError(f"Table {args.table} does not exist")
+        rows, present, skipped = load_export(args.table, args.path, columns)
+
+        conn.execute("BEGIN IMMEDIATE")
+        counts = upsert(conn, args.table, columns, rows, present, replace=args.replace)
+        if args.dry_run:
+            conn.rollback()
+        else:
+            conn.commit()
+    except Exception as e:
+        print(f"Error ingesting {args.path}: {e}")
+        return 1
+    finally:
+        conn.close()
+
+    summary = ", ".join(f"{n} {what}" for what, n in counts.items())
+    print(f"{args.table}: {len(rows)} rows in export ({skipped} without a key skipped); {summary}"
+          f"{' (dry run)' if args.dry_run else ''} in {time.perf_counter() - start:.1f}s")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
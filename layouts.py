@@ -0,0 +1,39 @@
+import json
+import threading
+from plotly.utils import PlotlyJSONEncoder
+
+# display_page runs on every navigation. Building a page's component tree
+# (user_dashboard() alone is several hundred components) and walking it again
+# to serialize it cost far more than the page switch itself, yet none of it
+# changes between requests: user and catalog data are filled in by each
+# page's own callbacks. So each layout factory runs once, at startup, and
+# its tree is kept in serialized form, as the plain dicts Dash sends to the
+# browser. Only factories whose output is the same for every user and
+# request belong here.
+_layouts = {}
+_lock = threading.Lock()
+
+
+def serialize(component):
+    """A component tree as JSON-ready dicts, the form Dash sends it in"""
+    return json.loads(json.dumps(component, cls=PlotlyJSONEncoder))
+
+
+def get(factory):
+    """The serialized layout a factory builds, built on first use"""
+    layout = _layouts.get(factory)
+    if layout is None:
+        with _lock:
+            layout = _layouts.get(factory)
+            if layout is None:
+                layout = _layouts[factory] = serialize(factory())
+    return layout
+
+
+def prewarm(factories):
+    """Build and cache the given layouts ahead of the first request"""
+    for factory in factories:
+        try:
+            get(factory)
+        except Exception as e:
+            print(f"Error building layout {factory.__name__}: {e}")
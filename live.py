@@ -2,18 +2,11 @@ import dash
 from dash import html, dcc
 import dash_bootstrap_components as dbc
 from dash.dependencies import Input, Output, State
-import sqlite3
-import pandas as pd
+import catalog
 import re
 
 def live_layout():
-    # Get unique grades from live table
-    conn = sqlite3.connect('data/USDH.db')
-    cursor = conn.cursor()
-    cursor.execute('SELECT DISTINCT grade FROM live ORDER BY grade')
-    grades = [row[0] for row in cursor.fetchall()]
-    conn.close()
-    
+    # The grade options are filled in by update_grade_options
     return html.Div([
         dbc.Container([
             # Header
@@ -28,7 +21,7 @@ def live_layout():
                     html.Label("Select Grade:", className="mb-2"),
                     dcc.Dropdown(
                         id='grade-selector',
-                        options=[{'label': f'Grade {grade}', 'value': grade} for grade in grades],
+                        options=[],
                         placeholder="Choose a grade",
                         className="mb-4"
                     ),
@@ -93,6 +86,17 @@ def extract_youtube_id(url):
     return url.split('/')[-1]
 
 def init_live_callbacks(app):
+    @app.callback(
+        Output('grade-selector', 'options'),
+        [Input('url', 'pathname')]
+    )
+    def update_grade_options(pathname):
+        if pathname != '/live':
+            raise dash.exceptions.PreventUpdate
+        # Grades from the live table's facet index
+        grades = sorted(g for g in catalog.facet_values('live', 'grade') if g)
+        return [{'label': f'Grade {grade}', 'value': grade} for grade in grades]
+
     @app.callback(
         [Output('video-container', 'children'),
          Output('schedule-content', 'children')],
@@ -103,10 +107,7 @@ def init_live_callbacks(app):
             return None, None
             
         try:
-            conn = sqlite3.connect('data/USDH.db')
-            df = pd.read_sql_query('SELECT link, schedule FROM live WHERE grade = ?',
-                                 conn, params=(selected_grade,))
-            conn.close()
+            df = catalog.query('live', filters={'grade': selected_grade})
             
             if df.empty:
                 return html.P("No content available for this grade."), None
@@ -1,11 +1,30 @@
+import sys
+
+# `python login.py --profile-startup` reports import times instead of
+# serving; handled before anything heavy is imported (see startup_profile.py)
+if __name__ == '__main__' and '--profile-startup' in sys.argv:
+    import startup_profile
+    sys.exit(startup_profile.main(['login'] + [a for a in sys.argv[1:] if a != '--profile-startup']))
+
 import dash
 from dash import html, dcc, callback_context, no_update
 import dash_bootstrap_components as dbc
 from dash.dependencies import Input, Output, State
-import sqlite3
+from db import get_connection
+import catalog
+import table_query
+import stats
+import layouts
+import roadmaps
+import resume_jobs
+import uploads
+from blobs import get_owned_file
+from file_server import send_private_file
+import schema
 import os
+import threading
 from dash.exceptions import PreventUpdate
-from flask import session, request, send_file, redirect, url_for
+from flask import session, request, redirect, Response, jsonify
 import uuid
 import pandas as pd
 
@@ -53,13 +72,16 @@ app.index_string = '''
 '''
 
 # Import all modules after app initialization
-from user_dashboard import user_dashboard, register_callbacks as register_user_dashboard_callbacks
-from view_course import register_callbacks as register_view_course_callbacks
+from user_dashboard import user_dashboard, user_dashboard_page, register_callbacks as register_user_dashboard_callbacks
+from view_course import view_course, register_callbacks as register_view_course_callbacks
 from resume_maker import resume_maker, register_callbacks as register_resume_callbacks
 from my_space import my_space, register_callbacks as register_my_space_callbacks
 from study_plan import study_plan, register_callbacks as register_study_plan_callbacks
 from analytics import analytics_layout, register_callbacks as register_analytics_callbacks
 from live import live_layout, init_live_callbacks
+from manage_courses import manage_courses_layout
+from manage_resources import manage_resources_layout
+from manage_schemes import manage_schemes_layout
 
 # Register all callbacks once
 register_user_dashboard_callbacks(app)
@@ -72,44 +94,6 @@ register_analytics_callbacks(app)
 init_live_callbacks(app)
 
 
-# Ensure the database directory exists
-if not os.path.exists('data'):
-    os.makedirs('data')
-
-# Initialize database
-def init_db():
-    conn = sqlite3.connect('data/USDH.db')
-    cursor = conn.cursor()
-    
-    # Create users table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS users (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        username TEXT UNIQUE NOT NULL,
-        email TEXT UNIQUE NOT NULL,
-        password TEXT NOT NULL,
-        role TEXT NOT NULL
-    )
-    ''')
-    
-    # Create resumes table if it doesn't exist
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS resumes (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id INTEGER,
-        name TEXT,
-        data TEXT,
-        created_at TEXT,
-        FOREIGN KEY (user_id) REFERENCES users (id)
-    )
-    ''')
-    
-    conn.commit()
-    conn.close()
-
-# Initialize the database
-init_db()
-
 # Login/Register Page (Main Page)
 def login_layout():
     return html.Div([  
@@ -242,6 +226,44 @@ def login_layout():
         ], className="login-page-container")
     ], className="main-bg")
 
+_started = False
+_startup_lock = threading.Lock()
+
+
+def startup():
+    """Get the database and caches ready to serve; runs once per process
+
+    Kept out of import so that importing login (tests, startup_profile,
+    resume workers) touches no database and starts no threads. The __main__
+    block calls it before serving; under a WSGI server the first request does.
+    """
+    global _started
+    if _started:
+        return
+    with _startup_lock:
+        if _started:
+            return
+        # Ensure the database directory exists
+        os.makedirs('data', exist_ok=True)
+
+        # Create or upgrade the database schema before serving any request
+        schema.migrate()
+
+        # Build the page layouts once, before the first request (see layouts.py)
+        layouts.prewarm([
+            login_layout, user_dashboard, manage_courses_layout, manage_resources_layout,
+            manage_schemes_layout, analytics_layout, view_course, live_layout
+        ])
+
+        # Render chatbot roadmaps in the background so chat replies never wait on them
+        roadmaps.prewarm()
+        _started = True
+
+
+@server.before_request
+def ensure_started():
+    startup()
+
 # App layout with URL routing
 app.layout = html.Div([
     dcc.Location(id='url', refresh=False),
@@ -318,7 +340,7 @@ def register_user(n_clicks, username, email, password, confirm_password, role, s
         return html.Div("Passwords do not match", style={"color": "red"}), session_data or {}
     
     try:
-        conn = sqlite3.connect('data/USDH.db')
+        conn = get_connection()
         cursor = conn.cursor()
         
         # Check if username or email already exists
@@ -368,7 +390,7 @@ def login_user(n_clicks, username, password, role, session_data):
         
     try:
         # Validate login credentials
-        conn = sqlite3.connect('data/USDH.db')
+        conn = get_connection()
         cursor = conn.cursor()
         cursor.execute("SELECT * FROM users WHERE username=? AND password=? AND role=?", 
                       (username, password, role))
@@ -441,37 +463,32 @@ def display_page(pathname, session_data):
         role = session_data.get('role', '')
     else:
         # Not logged in
-        return login_layout()
+        return layouts.get(login_layout)
     
-    # Import dashboards
-    from user_dashboard import user_dashboard
+    # admin_dashboard imports this module, so it is imported (and its layout
+    # built) on the first visit rather than at startup
     from admin_dashboard import admin_dashboard
-    from manage_courses import manage_courses_layout
-    from manage_resources import manage_resources_layout
-    from manage_schemes import manage_schemes_layout
-    from analytics import analytics_layout
-    from view_course import view_course
-    from study_plan import study_plan
     
-    # Admin dashboard routes
+    # Layouts are built once (see layouts.py); pages that depend on the
+    # session are still built per request
     if pathname == "/user" and (role == 'user' or session.get('role') == 'user'):
-        return user_dashboard()
+        return user_dashboard_page()
     elif pathname == "/admin" and (role == 'admin' or session.get('role') == 'admin'):
-        return admin_dashboard()
+        return layouts.get(admin_dashboard)
     elif pathname == "/manage-courses" and (role == 'admin' or session.get('role') == 'admin'):
-        return manage_courses_layout()
+        return layouts.get(manage_courses_layout)
     elif pathname == "/manage-resources" and (role == 'admin' or session.get('role') == 'admin'):
-        return manage_resources_layout()
+        return layouts.get(manage_resources_layout)
     elif pathname == "/manage-schemes" and (role == 'admin' or session.get('role') == 'admin'):
-        return manage_schemes_layout()
+        return layouts.get(manage_schemes_layout)
     elif pathname == "/analytics" and (role == 'admin' or session.get('role') == 'admin'):
-        return analytics_layout()
+        return layouts.get(analytics_layout)
     elif pathname.startswith("/course/") and (role == 'user' or session.get('role') == 'user'):
-        return view_course()
+        return layouts.get(view_course)
     elif pathname.startswith("/course2/") and (role == 'user' or session.get('role') == 'user'):
-        return view_course()
+        return layouts.get(view_course)
     elif pathname == "/logout":
-        return login_layout()
+        return layouts.get(login_layout)
     elif pathname == '/resume-maker':
         return resume_maker()
     elif pathname == '/my-space':
@@ -479,9 +496,9 @@ def display_page(pathname, session_data):
     elif pathname == '/study-plan':
         return study_plan()
     elif pathname == '/live':
-        return live_layout()
+        return layouts.get(live_layout)
     else:
-        return login_layout()
+        return layouts.get(login_layout)
 
 # Improved logout callback
 @app.callback(
@@ -557,55 +574,45 @@ def toggle_admin_profile_modal(profile_clicks, close_clicks, update_clicks, is_o
 def update_active_tab(active_tab):
     return active_tab
 
-# Filter UG/PG courses
+# UG/PG and school course tables are paged, sorted and filtered in SQL
 @app.callback(
-    Output("ug-pg-courses-table", "data"),
-    Input("search-ug-pg-courses", "value")
+    [Output("ug-pg-courses-table", "data"),
+     Output("ug-pg-courses-table", "page_count"),
+     Output("ug-pg-courses-table", "selected_rows"),
+     Output("ug-pg-courses-table", "page_current"),
+     Output("ug-pg-courses-table-error", "children")],
+    [Input("ug-pg-courses-table", "page_current"),
+     Input("ug-pg-courses-table", "page_size"),
+     Input("ug-pg-courses-table", "sort_by"),
+     Input("ug-pg-courses-table", "filter_query"),
+     Input("courses-catalog-version", "data")]
 )
-def filter_ug_pg_courses(search_value):
-    if search_value is None or search_value == "":
-        # Return all data
-        conn = sqlite3.connect('data/USDH.db')
-        df = pd.read_sql_query("SELECT * FROM courses", conn)
-        conn.close()
-        return df.to_dict('records')
-    else:
-        # Return filtered data
-        conn = sqlite3.connect('data/USDH.db')
-        search_term = f"%{search_value}%"
-        query = """
-        SELECT * FROM courses 
-        WHERE course_name LIKE ? 
-        OR description LIKE ?
-        """
-        df = pd.read_sql_query(query, conn, params=(search_term, search_term))
-        conn.close()
-        return df.to_dict('records')
+def page_ug_pg_courses(page_current, page_size, sort_by, filter_query, version):
+    return table_page("courses", page_current, page_size, sort_by, filter_query)
 
-# Filter School courses
 @app.callback(
-    Output("school-courses-table", "data"),
-    Input("search-school-courses", "value")
+    [Output("school-courses-table", "data"),
+     Output("school-courses-table", "page_count"),
+     Output("school-courses-table", "selected_rows"),
+     Output("school-courses-table", "page_current"),
+     Output("school-courses-table-error", "children")],
+    [Input("school-courses-table", "page_current"),
+     Input("school-courses-table", "page_size"),
+     Input("school-courses-table", "sort_by"),
+     Input("school-courses-table", "filter_query"),
+     Input("courses-catalog-version", "data")]
 )
-def filter_school_courses(search_value):
-    if search_value is None or search_value == "":
-        # Return all data
-        conn = sqlite3.connect('data/USDH.db')
-        df = pd.read_sql_query("SELECT * FROM Courses2", conn)
-        conn.close()
-        return df.to_dict('records')
-    else:
-        # Return filtered data
-        conn = sqlite3.connect('data/USDH.db')
-        search_term = f"%{search_value}%"
-        query = """
-        SELECT * FROM Courses2 
-        WHERE course_name LIKE ? 
-        OR description LIKE ?
-        """
-        df = pd.read_sql_query(query, conn, params=(search_term, search_term))
-        conn.close()
-        return df.to_dict('records')
+def page_school_courses(page_current, page_size, sort_by, filter_query, version):
+    return table_page("courses2", page_current, page_size, sort_by, filter_query)
+
+# Course counts in the page header, on load and after each edit
+@app.callback(
+    [Output("ug-pg-courses-count", "children"),
+     Output("school-courses-count", "children")],
+    [Input("courses-catalog-version", "data")]
+)
+def update_course_counts(version):
+    return str(table_query.row_count("courses")), str(table_query.row_count("courses2"))
 
 # Populate dynamic fields based on course type
 @app.callback(
@@ -653,6 +660,35 @@ def navigate_from_courses(back_clicks, logout_clicks, session_data):
         return "/logout"
     
     return no_update
+# Admin catalog edits target rows by id and check the version they were
+# read at, so a row changed by someone else is never silently overwritten
+def find_row(data, selected_ids):
+    """The record of the selected row; None if nothing is selected"""
+    if not selected_ids or not data:
+        return None
+    return next((row for row in data if row.get('id') == selected_ids[0]), None)
+
+def table_page(table_name, page_current, page_size, sort_by, filter_query, filters=None):
+    """(rows, page count, selected rows, page, error alert) for a custom-paged admin DataTable"""
+    ctx = callback_context
+    prop = ctx.triggered[0]['prop_id'].split('.')[-1] if ctx.triggered else ''
+    # A new filter or sort order starts again from the first page
+    if prop in ('sort_by', 'filter_query', 'value'):
+        page_current = 0
+    try:
+        records, page_count, page_current = table_query.fetch_page(
+            table_name, page_current, page_size, sort_by, filter_query, filters)
+    except ValueError as e:
+        print(f"Error loading {table_name} page: {e}")
+        # Say why the table is empty instead of showing no rows silently
+        return [], 1, [], 0, dbc.Alert(f"This filter could not be applied: {e}", color="warning", className="mb-2")
+    # Selections are row positions on the page, so they do not carry over
+    return records, page_count, [], page_current, None
+
+def stale_row_alert(kind):
+    return dbc.Alert(f"This {kind} was changed or deleted by someone else. The list has been refreshed, please try again.",
+                     color="warning", dismissable=True)
+
 @app.callback(
      Output("resource-modal", "is_open"),
      [Input("add-resource-btn", "n_clicks"),
@@ -673,37 +709,35 @@ def toggle_resource_modal(add, edit, save, cancel, is_open):
              return False
          return is_open
 @app.callback(
-    Output("filtered-resources", "data"),
-    [Input("search-resources", "value"),
+    [Output("filtered-resources", "data"),
+     Output("resources-table", "page_count"),
+     Output("resources-table", "selected_rows"),
+     Output("resources-table", "page_current"),
+     Output("resources-table-error", "children")],
+    [Input("resources-table", "page_current"),
+     Input("resources-table", "page_size"),
+     Input("resources-table", "sort_by"),
+     Input("resources-table", "filter_query"),
      Input("resource-preference-filter", "value"),
-     Input("resource-state-filter", "value")]
+     Input("resource-state-filter", "value"),
+     Input("resources-catalog-version", "data")]
 )
-def filter_resources(search_term, preference, state):
-    # Connect to database
-    conn = sqlite3.connect('data/USDH.db')
-    # Get resources data
-    resources_df = pd.read_sql_query("SELECT * FROM ebooks", conn)
-    conn.close()
-    
-    # Filter by search term
-    if search_term and search_term != "":
-        filter_condition = (
-            resources_df['website'].str.contains(search_term, case=False, na=False) |
-            resources_df['preference'].str.contains(search_term, case=False, na=False) |
-            resources_df['subject'].str.contains(search_term, case=False, na=False) |
-            resources_df['states'].str.contains(search_term, case=False, na=False)
-        )
-        resources_df = resources_df[filter_condition]
-    
-    # Filter by preference
-    if preference and preference != "all":
-        resources_df = resources_df[resources_df['preference'] == preference]
-    
-    # Filter by state
-    if state and state != "all":
-        resources_df = resources_df[resources_df['states'] == state]
-    
-    return resources_df.to_dict('records')
+def filter_resources(page_current, page_size, sort_by, filter_query, preference, state, version):
+    return table_page("ebooks", page_current, page_size, sort_by, filter_query,
+                      {'preference': preference, 'states': state})
+
+# Resource count and state filter options, on load and after each edit
+@app.callback(
+    [Output("resource-count", "children"),
+     Output("resource-state-filter", "options")],
+    [Input("resources-catalog-version", "data")]
+)
+def update_resource_summary(version):
+    states = sorted(stats.get_value_counts("ebooks", "states")['value'])
+    options = [{"label": "All States", "value": "all"}] + [
+        {"label": str(state), "value": str(state)} for state in states
+    ]
+    return f"Total Resources: {table_query.row_count('ebooks')}", options
 
 @app.callback(
     Output("resources-table", "data"),
@@ -781,136 +815,345 @@ def update_resource_detail_modal(view_clicks, selected_rows, filtered_data):
      Output("resource-preference-input", "value"),
      Output("resource-subject-input", "value"),
      Output("resource-state-input", "value"),
-     Output("resource-link-input", "value")],
+     Output("resource-link-input", "value"),
+     Output("editing-resource", "data")],
     [Input("edit-resource-btn", "n_clicks"),
      Input("add-resource-btn", "n_clicks")],
-    [State("resources-table", "selected_rows"),
+    [State("resources-table", "selected_row_ids"),
      State("filtered-resources", "data")]
 )
-def populate_resource_modal(edit_clicks, add_clicks, selected_rows, filtered_data):
+def populate_resource_modal(edit_clicks, add_clicks, selected_ids, filtered_data):
     ctx = callback_context
     if not ctx.triggered:
         raise PreventUpdate
     
     button_id = ctx.triggered[0]["prop_id"].split(".")[0]
+    selected_row = find_row(filtered_data, selected_ids)
     
-    if button_id == "edit-resource-btn" and selected_rows:
-        selected_row = filtered_data[selected_rows[0]]
+    if button_id == "edit-resource-btn" and selected_row:
         return (
             selected_row.get('website', ''),
             selected_row.get('preference', ''),
             selected_row.get('subject', ''),
             selected_row.get('states', ''),
-            selected_row.get('link', '')
+            selected_row.get('link', ''),
+            {'id': selected_row['id'], 'version': selected_row.get('version', 0)}
         )
     else:
         # For add new resource
-        return '', '', '', '', ''
+        return '', '', '', '', '', None
 
 @app.callback(
     [Output("resource-notification", "children"),
-     Output("filtered-resources", "data", allow_duplicate=True)],
+     Output("resources-catalog-version", "data", allow_duplicate=True)],
     [Input("save-resource-btn", "n_clicks")],
     [State("resource-website-input", "value"),
      State("resource-preference-input", "value"),
      State("resource-subject-input", "value"),
      State("resource-state-input", "value"),
      State("resource-link-input", "value"),
-     State("resources-table", "selected_rows"),
-     State("filtered-resources", "data")],
+     State("editing-resource", "data")],
     prevent_initial_call=True
 )
-def save_resource(save_clicks, website, preference, subject, state, link, selected_rows, filtered_data):
+def save_resource(save_clicks, website, preference, subject, state, link, editing):
     if not save_clicks:
         raise PreventUpdate
     
     if not website or not preference or not state or not link:
-        return dbc.Alert("Please fill all required fields", color="danger"), filtered_data
+        return dbc.Alert("Please fill all required fields", color="danger"), no_update
     
     try:
-        conn = sqlite3.connect('data/USDH.db')
-        cursor = conn.cursor()
-        
-        # Check if editing existing or adding new
-        is_edit = selected_rows and len(selected_rows) > 0
+        values = {'website': website, 'preference': preference, 'subject': subject, 'states': state, 'link': link}
         
-        if is_edit:
-            selected_row = filtered_data[selected_rows[0]]
-            # Update existing resource
-            query = """
-            UPDATE ebooks 
-            SET website = ?, preference = ?, subject = ?, states = ?, link = ?
-            WHERE rowid = (
-                SELECT rowid FROM ebooks 
-                WHERE website = ? AND preference = ? AND states = ? AND link = ?
-                LIMIT 1
-            )
-            """
-            cursor.execute(query, (
-                website, preference, subject, state, link,
-                selected_row.get('website'), selected_row.get('preference'), 
-                selected_row.get('states'), selected_row.get('link')
-            ))
+        # The modal was opened with Edit (a row to update) or Add (None)
+        if editing:
+            if not catalog.update_row("ebooks", editing['id'], editing['version'], values):
+                return stale_row_alert("resource"), catalog.get_version()
             message = "Resource updated successfully!"
         else:
-            # Add new resource
-            query = "INSERT INTO ebooks (website, preference, subject, states, link) VALUES (?, ?, ?, ?, ?)"
-            cursor.execute(query, (website, preference, subject, state, link))
+            catalog.insert_row("ebooks", values)
             message = "New resource added successfully!"
         
-        conn.commit()
-        
-        # Refresh data
-        resources_df = pd.read_sql_query("SELECT * FROM ebooks", conn)
-        conn.close()
-        
-        return dbc.Alert(message, color="success", dismissable=True), resources_df.to_dict('records')
+        return dbc.Alert(message, color="success", dismissable=True), catalog.get_version()
     
     except Exception as e:
-        return dbc.Alert(f"Error: {str(e)}", color="danger", dismissable=True), filtered_data
+        return dbc.Alert(f"Error: {str(e)}", color="danger", dismissable=True), no_update
 
 @app.callback(
     [Output("resource-notification", "children", allow_duplicate=True),
-     Output("filtered-resources", "data", allow_duplicate=True)],
+     Output("resources-catalog-version", "data", allow_duplicate=True)],
     [Input("delete-resource-btn", "n_clicks")],
-    [State("resources-table", "selected_rows"),
+    [State("resources-table", "selected_row_ids"),
      State("filtered-resources", "data")],
     prevent_initial_call=True
 )
-def delete_resource(delete_clicks, selected_rows, filtered_data):
-    if not delete_clicks or not selected_rows:
+def delete_resource(delete_clicks, selected_ids, filtered_data):
+    selected_row = find_row(filtered_data, selected_ids)
+    if not delete_clicks or not selected_row:
         raise PreventUpdate
     
     try:
-        selected_row = filtered_data[selected_rows[0]]
-        
-        conn = sqlite3.connect('data/USDH.db')
-        cursor = conn.cursor()
-        
-        # Delete the resource
-        query = """
-        DELETE FROM ebooks 
-        WHERE rowid = (
-            SELECT rowid FROM ebooks 
-            WHERE website = ? AND preference = ? AND states = ? AND link = ?
-            LIMIT 1
-        )
-        """
-        cursor.execute(query, (
-            selected_row.get('website'), selected_row.get('preference'), 
-            selected_row.get('states'), selected_row.get('link')
-        ))
-        
-        conn.commit()
-        
-        # Refresh data
-        resources_df = pd.read_sql_query("SELECT * FROM ebooks", conn)
-        conn.close()
+        if not catalog.delete_row("ebooks", selected_row['id'], selected_row.get('version', 0)):
+            return stale_row_alert("resource"), catalog.get_version()
         
-        return dbc.Alert("Resource deleted successfully!", color="success", dismissable=True), resources_df.to_dict('records')
+        return dbc.Alert("Resource deleted successfully!", color="success", dismissable=True), catalog.get_version()
+    
+    except Exception as e:
+        return dbc.Alert(f"Error: {str(e)}", color="danger", dismissable=True), no_update
+# Course deletion asks for confirmation first
+@app.callback(
+    [Output("delete-confirmation-modal", "is_open"),
+     Output("course-to-delete-info", "children")],
+    [Input("delete-ug-pg-course-btn", "n_clicks"),
+     Input("delete-school-course-btn", "n_clicks"),
+     Input("cancel-delete-btn", "n_clicks"),
+     Input("confirm-delete-btn", "n_clicks")],
+    [State("ug-pg-courses-table", "selected_row_ids"),
+     State("ug-pg-courses-table", "data"),
+     State("school-courses-table", "selected_row_ids"),
+     State("school-courses-table", "data")],
+    prevent_initial_call=True
+)
+def toggle_delete_course_modal(delete_ug_pg, delete_school, cancel, confirm, ug_pg_ids, ug_pg_data, school_ids, school_data):
+    ctx = callback_context
+    if not ctx.triggered:
+        raise PreventUpdate
+    
+    button_id = ctx.triggered[0]["prop_id"].split(".")[0]
+    if button_id == "delete-ug-pg-course-btn":
+        row = find_row(ug_pg_data, ug_pg_ids)
+        name = row and row.get('course_name_')
+    elif button_id == "delete-school-course-btn":
+        row = find_row(school_data, school_ids)
+        name = row and f"{row.get('subjects')} ({row.get('grade')})"
+    else:
+        return False, no_update
+    
+    if not row:
+        raise PreventUpdate
+    return True, name
+
+@app.callback(
+    [Output("course-notification", "children"),
+     Output("courses-catalog-version", "data", allow_duplicate=True)],
+    [Input("confirm-delete-btn", "n_clicks")],
+    [State("active-course-tab", "data"),
+     State("ug-pg-courses-table", "selected_row_ids"),
+     State("ug-pg-courses-table", "data"),
+     State("school-courses-table", "selected_row_ids"),
+     State("school-courses-table", "data")],
+    prevent_initial_call=True
+)
+def delete_course(confirm_clicks, active_tab, ug_pg_ids, ug_pg_data, school_ids, school_data):
+    if not confirm_clicks:
+        raise PreventUpdate
+    
+    if active_tab == "school-tab":
+        table_name, row = "courses2", find_row(school_data, school_ids)
+    else:
+        table_name, row = "courses", find_row(ug_pg_data, ug_pg_ids)
+    if not row:
+        raise PreventUpdate
+    
+    try:
+        if catalog.delete_row(table_name, row['id'], row.get('version', 0)):
+            alert = dbc.Alert("Course deleted successfully!", color="success", dismissable=True)
+        else:
+            alert = stale_row_alert("course")
+        return alert, catalog.get_version()
+    except Exception as e:
+        return dbc.Alert(f"Error: {str(e)}", color="danger", dismissable=True), no_update
+
+# Fill the course modal from the selected row; the store remembers which
+# row (and version) a save applies to, None when adding
+@app.callback(
+    [Output("course-type-select", "value"),
+     Output("course-name-input", "value"),
+     Output("course-description-input", "value"),
+     Output("editing-course", "data")],
+    [Input("add-ug-pg-course-btn", "n_clicks"),
+     Input("add-school-course-btn", "n_clicks"),
+     Input("edit-ug-pg-course-btn", "n_clicks"),
+     Input("edit-school-course-btn", "n_clicks")],
+    [State("ug-pg-courses-table", "selected_row_ids"),
+     State("ug-pg-courses-table", "data"),
+     State("school-courses-table", "selected_row_ids"),
+     State("school-courses-table", "data")],
+    prevent_initial_call=True
+)
+def populate_course_modal(add_ug_pg, add_school, edit_ug_pg, edit_school, ug_pg_ids, ug_pg_data, school_ids, school_data):
+    ctx = callback_context
+    if not ctx.triggered:
+        raise PreventUpdate
+    
+    button_id = ctx.triggered[0]["prop_id"].split(".")[0]
+    if button_id == "add-ug-pg-course-btn":
+        return "ug-pg", "", "", None
+    if button_id == "add-school-course-btn":
+        return "school", "", "", None
+    
+    if button_id == "edit-ug-pg-course-btn":
+        row = find_row(ug_pg_data, ug_pg_ids)
+        if not row:
+            raise PreventUpdate
+        editing = {'table': "courses", 'id': row['id'], 'version': row.get('version', 0)}
+        return "ug-pg", row.get('course_name_'), row.get('description'), editing
     
+    row = find_row(school_data, school_ids)
+    if not row:
+        raise PreventUpdate
+    editing = {'table': "courses2", 'id': row['id'], 'version': row.get('version', 0)}
+    return "school", row.get('subjects'), "", editing
+
+@app.callback(
+    [Output("course-notification", "children", allow_duplicate=True),
+     Output("courses-catalog-version", "data", allow_duplicate=True)],
+    [Input("save-course-btn", "n_clicks")],
+    [State("course-type-select", "value"),
+     State("course-name-input", "value"),
+     State("course-description-input", "value"),
+     State("editing-course", "data")],
+    prevent_initial_call=True
+)
+def save_course(save_clicks, course_type, name, description, editing):
+    if not save_clicks:
+        raise PreventUpdate
+    
+    if not course_type or not name:
+        return dbc.Alert("Please select a course type and enter a name", color="danger"), no_update
+    
+    if course_type == "school":
+        table_name, values = "courses2", {'subjects': name}
+    else:
+        table_name, values = "courses", {'course_name_': name, 'description': description}
+    
+    try:
+        if editing and editing['table'] == table_name:
+            if catalog.update_row(table_name, editing['id'], editing['version'], values):
+                alert = dbc.Alert("Course updated successfully!", color="success", dismissable=True)
+            else:
+                alert = stale_row_alert("course")
+        else:
+            catalog.insert_row(table_name, values)
+            alert = dbc.Alert("New course added successfully!", color="success", dismissable=True)
+        return alert, catalog.get_version()
     except Exception as e:
-        return dbc.Alert(f"Error: {str(e)}", color="danger", dismissable=True), filtered_data
+        return dbc.Alert(f"Error: {str(e)}", color="danger", dismissable=True), no_update
+
+@app.callback(
+    [Output("schemes-table", "data"),
+     Output("schemes-table", "page_count"),
+     Output("schemes-table", "selected_rows"),
+     Output("schemes-table", "page_current"),
+     Output("schemes-table-error", "children")],
+    [Input("schemes-table", "page_current"),
+     Input("schemes-table", "page_size"),
+     Input("schemes-table", "sort_by"),
+     Input("schemes-table", "filter_query"),
+     Input("schemes-catalog-version", "data")]
+)
+def page_schemes(page_current, page_size, sort_by, filter_query, version):
+    return table_page("schemes", page_current, page_size, sort_by, filter_query)
+
+@app.callback(
+    Output("scheme-modal", "is_open"),
+    [Input("add-scheme-btn", "n_clicks"),
+     Input("edit-scheme-btn", "n_clicks"),
+     Input("save-scheme-btn", "n_clicks"),
+     Input("cancel-scheme-btn", "n_clicks")],
+    [State("scheme-modal", "is_open"),
+     State("schemes-table", "selected_row_ids")],
+    prevent_initial_call=True
+)
+def toggle_scheme_modal(add, edit, save, cancel, is_open, selected_ids):
+    ctx = callback_context
+    if not ctx.triggered:
+        return is_open
+    
+    button_id = ctx.triggered[0]["prop_id"].split(".")[0]
+    if button_id == "add-scheme-btn" or (button_id == "edit-scheme-btn" and selected_ids):
+        return True
+    elif button_id in ["save-scheme-btn", "cancel-scheme-btn"]:
+        return False
+    return is_open
+
+@app.callback(
+    [Output("scheme-name-input", "value"),
+     Output("scheme-benefits-input", "value"),
+     Output("scheme-eligibility-input", "value"),
+     Output("scheme-link-input", "value"),
+     Output("editing-scheme", "data")],
+    [Input("add-scheme-btn", "n_clicks"),
+     Input("edit-scheme-btn", "n_clicks")],
+    [State("schemes-table", "selected_row_ids"),
+     State("schemes-table", "data")],
+    prevent_initial_call=True
+)
+def populate_scheme_modal(add_clicks, edit_clicks, selected_ids, schemes_data):
+    ctx = callback_context
+    if not ctx.triggered:
+        raise PreventUpdate
+    
+    button_id = ctx.triggered[0]["prop_id"].split(".")[0]
+    if button_id == "add-scheme-btn":
+        return "", "", "", "", None
+    
+    row = find_row(schemes_data, selected_ids)
+    if not row:
+        raise PreventUpdate
+    return (row.get('name'), row.get('benefits'), row.get('eligiblity_criteria'), row.get('for_more_info'),
+            {'id': row['id'], 'version': row.get('version', 0)})
+
+@app.callback(
+    [Output("scheme-notification", "children"),
+     Output("schemes-catalog-version", "data", allow_duplicate=True)],
+    [Input("save-scheme-btn", "n_clicks")],
+    [State("scheme-name-input", "value"),
+     State("scheme-benefits-input", "value"),
+     State("scheme-eligibility-input", "value"),
+     State("scheme-link-input", "value"),
+     State("editing-scheme", "data")],
+    prevent_initial_call=True
+)
+def save_scheme(save_clicks, name, benefits, eligibility, link, editing):
+    if not save_clicks:
+        raise PreventUpdate
+    
+    if not name:
+        return dbc.Alert("Please enter the scheme name", color="danger"), no_update
+    
+    values = {'name': name, 'benefits': benefits, 'eligiblity_criteria': eligibility, 'for_more_info': link}
+    try:
+        if editing:
+            if not catalog.update_row("schemes", editing['id'], editing['version'], values):
+                return stale_row_alert("scheme"), catalog.get_version()
+            message = "Scheme updated successfully!"
+        else:
+            catalog.insert_row("schemes", values)
+            message = "New scheme added successfully!"
+        return dbc.Alert(message, color="success", dismissable=True), catalog.get_version()
+    except Exception as e:
+        return dbc.Alert(f"Error: {str(e)}", color="danger", dismissable=True), no_update
+
+@app.callback(
+    [Output("scheme-notification", "children", allow_duplicate=True),
+     Output("schemes-catalog-version", "data", allow_duplicate=True)],
+    [Input("delete-scheme-btn", "n_clicks")],
+    [State("schemes-table", "selected_row_ids"),
+     State("schemes-table", "data")],
+    prevent_initial_call=True
+)
+def delete_scheme(delete_clicks, selected_ids, schemes_data):
+    row = find_row(schemes_data, selected_ids)
+    if not delete_clicks or not row:
+        raise PreventUpdate
+    
+    try:
+        if not catalog.delete_row("schemes", row['id'], row.get('version', 0)):
+            return stale_row_alert("scheme"), catalog.get_version()
+        return dbc.Alert("Scheme deleted successfully!", color="success", dismissable=True), catalog.get_version()
+    except Exception as e:
+        return dbc.Alert(f"Error: {str(e)}", color="danger", dismissable=True), no_update
 @app.callback(
     [Output("admin-profile-username", "value"),
      Output("admin-profile-email", "value"),
@@ -932,7 +1175,7 @@ def populate_admin_profile(is_open, session_data):
         if not user_id:
             return "", "", "", "", "", ""
         
-        conn = sqlite3.connect('data/USDH.db')
+        conn = get_connection()
         cursor = conn.cursor()
         
         cursor.execute("SELECT username, email, role, id FROM users WHERE id = ?", (user_id,))
@@ -984,7 +1227,7 @@ def update_admin_profile(n_clicks, username, email, current_password, new_passwo
         # Password verification is only needed when changing password or critical info
         needs_password_verification = is_password_changed or is_username_changed or is_email_changed
         
-        conn = sqlite3.connect('data/USDH.db')
+        conn = get_connection()
         cursor = conn.cursor()
         
         # Verify current password if needed
@@ -1099,17 +1342,15 @@ app.index_string = '''
 
 @server.route('/download-resume/<int:resume_id>')
 def download_resume(resume_id):
-    from flask import send_file, redirect, url_for
-    
     # Ensure user is logged in
     if 'user_id' not in session:
-        return redirect(url_for('/'))
+        return redirect('/')
         
     user_id = session['user_id']
     
     try:
         # Get the resume file path from database
-        conn = sqlite3.connect('courses.db')
+        conn = get_connection()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -1130,19 +1371,96 @@ def download_resume(resume_id):
         if not os.path.exists(file_path):
             return "Resume file not found", 404
         
-        # Send the file
-        return send_file(
-            file_path,
-            mimetype='application/pdf',
-            as_attachment=True,
-            download_name=f"resume_{resume_id}.pdf"
-        )
+        # A download id always names the same PDF, so it can be cached
+        return send_private_file(file_path, f"resume_{resume_id}.pdf", immutable=True, as_attachment=True)
         
     except Exception as e:
         print(f"Error downloading resume: {e}")
         return f"Error downloading resume: {str(e)}", 500
 
+@server.route('/resume-jobs/<job_id>')
+def resume_job_status(job_id):
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not logged in'}), 401
+    
+    job = resume_jobs.get_job(job_id, session['user_id'])
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    if job['status'] == 'done':
+        job['download_url'] = f"/resume-jobs/{job_id}/download"
+    return jsonify(job)
+
+@server.route('/resume-jobs/<job_id>/download')
+def download_resume_job(job_id):
+    if 'user_id' not in session:
+        return redirect('/')
+    
+    pdf_path = resume_jobs.get_pdf_path(job_id, session['user_id'])
+    if pdf_path is None or not os.path.exists(pdf_path):
+        return "Resume not found", 404
+    
+    # Streamed from disk instead of inlined in a callback
+    return send_private_file(pdf_path, "resume.pdf", immutable=True, as_attachment=True)
+
+@server.route('/uploads', methods=['POST'])
+def start_upload():
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not logged in'}), 401
+    
+    data = request.get_json(silent=True) or {}
+    try:
+        status = uploads.create_upload(session['user_id'], data.get('filename'), int(data.get('size', -1)))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(status), 201
+
+@server.route('/uploads/<upload_id>', methods=['GET', 'PUT'])
+def upload_chunk(upload_id):
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not logged in'}), 401
+    
+    try:
+        if request.method == 'GET':
+            return jsonify(uploads.get_status(session['user_id'], upload_id))
+        
+        # The chunk is copied from the request stream to disk, never buffered whole
+        offset = request.args.get('offset', type=int)
+        status = uploads.append_chunk(session['user_id'], upload_id, offset,
+                                      request.stream, request.content_length)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    # A stale offset just gets the current status back; the client resumes from it
+    return jsonify(status)
+
+@server.route('/files/<kind>/<int:file_id>')
+def serve_user_file(kind, file_id):
+    if 'user_id' not in session:
+        return redirect('/')
+    
+    # Only the owner of the row can fetch its blob
+    found = get_owned_file(kind, file_id, session['user_id'])
+    if found is None or not os.path.exists(found[0]):
+        return "File not found", 404
+    
+    # Blobs are named by their SHA-256, which makes a strong ETag
+    blob_file, filename, blob_hash = found
+    return send_private_file(blob_file, filename, etag=blob_hash, immutable=True)
+
+@server.route('/roadmaps/<slug>.svg')
+def serve_roadmap(slug):
+    # Waits for the render worker if the image is not cached yet
+    data = roadmaps.get_roadmap_svg(slug)
+    if data is None:
+        return "Roadmap not found", 404
+    
+    response = Response(data, mimetype='image/svg+xml')
+    response.headers['Cache-Control'] = 'public, max-age=86400'
+    return response
+
 if __name__ == '__main__':
+    startup()
     app.run(
         debug=True,
         dev_tools_ui=False,  # This disables the UI components of dev tools
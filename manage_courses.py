@@ -1,18 +1,14 @@
 from dash import html, dcc, dash_table, callback_context
 import dash_bootstrap_components as dbc
 from dash.dependencies import Input, Output, State
-import sqlite3
-import pandas as pd
 from dash import no_update
+import table_query
 
 def manage_courses_layout():
-    # Connect to the database
-    conn = sqlite3.connect('data/USDH.db')
-    # Get UG/PG courses
-    ug_pg_courses_df = pd.read_sql_query("SELECT * FROM courses", conn)
-    # Get 1-12th courses
-    school_courses_df = pd.read_sql_query("SELECT * FROM courses2", conn)
-    conn.close()
+    # Rows are paged in by the course table callbacks and the counts filled
+    # in by update_course_counts; the layout only needs the column names
+    ug_pg_columns = [col for col in table_query.table_columns("courses") if col != "version"]
+    school_columns = [col for col in table_query.table_columns("courses2") if col != "version"]
     
     return html.Div([
         # Main Background
@@ -66,7 +62,7 @@ def manage_courses_layout():
                     html.Div([
                         html.Div([
                             html.I(className="fas fa-graduation-cap mb-3", style={"font-size": "2rem", "color": "#1a237e"}),
-                            html.H3(f"{len(ug_pg_courses_df)}", className="stat-number"),
+                            html.H3("-", id="ug-pg-courses-count", className="stat-number"),
                             html.P("UG/PG Courses", className="stat-label")
                         ])
                     ], className="stat-card"),
@@ -74,7 +70,7 @@ def manage_courses_layout():
                     html.Div([
                         html.Div([
                             html.I(className="fas fa-school mb-3", style={"font-size": "2rem", "color": "#1a237e"}),
-                            html.H3(f"{len(school_courses_df)}", className="stat-number"),
+                            html.H3("-", id="school-courses-count", className="stat-number"),
                             html.P("School Courses", className="stat-label")
                         ])
                     ], className="stat-card")
@@ -98,17 +94,25 @@ def manage_courses_layout():
                             ], id="add-ug-pg-course-btn", className="add-button", n_clicks=0)
                         ], className="tab-header"),
                         
+                        # Why the table is empty when its filter cannot be applied
+                        html.Div(id="ug-pg-courses-table-error"),
+                        
                         # Course data table
                         html.Div([
                             dash_table.DataTable(
                                 id='ug-pg-courses-table',
                                 columns=[
-                                    {"name": col, "id": col} for col in ug_pg_courses_df.columns
+                                    {"name": col, "id": col} for col in ug_pg_columns
                                 ],
-                                data=ug_pg_courses_df.to_dict('records'),
-                                page_size=10,
-                                filter_action="native",
-                                sort_action="native",
+                                data=[],
+                                page_action="custom",
+                                page_size=table_query.PAGE_SIZE,
+                                filter_action="custom",
+                                filter_query="",
+                                filter_options={"case": "insensitive"},
+                                sort_action="custom",
+                                sort_mode="single",
+                                sort_by=[],
                                 style_table={
                                     'borderRadius': '15px',
                                     'overflow': 'hidden',
@@ -184,17 +188,25 @@ def manage_courses_layout():
                             ], id="add-school-course-btn", className="add-button", n_clicks=0)
                         ], className="tab-header"),
                         
+                        # Why the table is empty when its filter cannot be applied
+                        html.Div(id="school-courses-table-error"),
+                        
                         # Course data table
                         html.Div([
                             dash_table.DataTable(
                                 id='school-courses-table',
                                 columns=[
-                                    {"name": col, "id": col} for col in school_courses_df.columns
+                                    {"name": col, "id": col} for col in school_columns
                                 ],
-                                data=school_courses_df.to_dict('records'),
-                                page_size=10,
-                                filter_action="native",
-                                sort_action="native",
+                                data=[],
+                                page_action="custom",
+                                page_size=table_query.PAGE_SIZE,
+                                filter_action="custom",
+                                filter_query="",
+                                filter_options={"case": "insensitive"},
+                                sort_action="custom",
+                                sort_mode="single",
+                                sort_by=[],
                                 style_table={
                                     'borderRadius': '15px',
                                     'overflow': 'hidden',
@@ -311,6 +323,12 @@ def manage_courses_layout():
             # Store component to track active tab
             dcc.Store(id="active-course-tab", data="ug-pg-tab"),
             
+            # Row (id and version) the course modal is editing; None when adding
+            dcc.Store(id="editing-course", data=None),
+            
+            # Bumped after each edit so the pages are fetched again
+            dcc.Store(id="courses-catalog-version", data=0),
+            
             # URL for navigation
             dcc.Location(id="url-courses", refresh=True)
         ], className="container-fluid py-4 px-4", style={"maxWidth": "1400px", "margin": "0 auto"})
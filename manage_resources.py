@@ -1,17 +1,10 @@
-from dash import html, dcc, dash_table, callback_context, callback
+from dash import html, dcc, dash_table
 import dash_bootstrap_components as dbc
-from dash.dependencies import Input, Output, State
-import sqlite3
-import pandas as pd
-from dash.exceptions import PreventUpdate
+import table_query
 
 def manage_resources_layout():
-    # Connect to the database
-    conn = sqlite3.connect('data/USDH.db')
-    # Get resources data
-    resources_df = pd.read_sql_query("SELECT * FROM ebooks", conn)
-    conn.close()
-    
+    # Rows are paged in by the resources-table callbacks, and the count and
+    # state list filled in by update_resource_summary
     return html.Div([
         # Background Elements
         html.Div([
@@ -62,7 +55,7 @@ def manage_resources_layout():
                             'textShadow': '1px 1px 2px rgba(13, 27, 74, 0.1)',
                             'fontWeight': '700'
                         }),
-                        html.P(f"Total Resources: {len(resources_df)}", className="resource-count")
+                        html.P(id="resource-count", className="resource-count")
                     ], className="section-header"),
                     
                     dbc.Button([
@@ -79,9 +72,6 @@ def manage_resources_layout():
                             id="resource-state-filter",
                             options=[
                                 {"label": "All States", "value": "all"}
-                            ] + [
-                                {"label": str(state), "value": str(state)} 
-                                for state in resources_df['states'].dropna().unique().tolist()
                             ],
                             value="all",
                             className="resource-select"
@@ -103,6 +93,9 @@ def manage_resources_layout():
                     ], className="filter-group animate-slide-right")
                 ], className="filters-container"),
                 
+                # Why the table is empty when its filter cannot be applied
+                html.Div(id="resources-table-error"),
+                
                 # Resources Table with Animation
                 html.Div([
                     dash_table.DataTable(
@@ -114,8 +107,10 @@ def manage_resources_layout():
                             {"name": "State", "id": "states"},
                             {"name": "Link", "id": "link", "presentation": "markdown"}
                         ],
-                        data=resources_df.to_dict('records'),
-                        page_size=10,
+                        data=[],
+                        page_action="custom",
+                        page_current=0,
+                        page_size=table_query.PAGE_SIZE,
                         style_table={'overflowX': 'auto'},
                         style_header={
                             'backgroundColor': '#1a237e',
@@ -148,8 +143,12 @@ def manage_resources_layout():
                         ],
                         markdown_options={"html": True},
                         row_selectable="single",
-                        filter_action="native",
-                        sort_action="native",
+                        filter_action="custom",
+                        filter_query="",
+                        filter_options={"case": "insensitive"},
+                        sort_action="custom",
+                        sort_mode="single",
+                        sort_by=[],
                     )
                 ], className="table-container animate-fade-in"),
                 
@@ -239,18 +238,13 @@ def manage_resources_layout():
             # Notification Area
             html.Div(id="resource-notification", className="notification-area"),
             
-            # Data Store
-            dcc.Store(id="filtered-resources", data=resources_df.to_dict('records'))
+            # Data Store: the rows of the page on screen
+            dcc.Store(id="filtered-resources", data=[]),
+            
+            # Row (id and version) the resource modal is editing; None when adding
+            dcc.Store(id="editing-resource", data=None),
+            
+            # Bumped after each edit so the page is fetched again
+            dcc.Store(id="resources-catalog-version", data=0)
         ], className="content-container")
     ], className="resource-management-container")
-
-# Add callback for Back to Dashboard button
-@callback(
-    Output('url', 'pathname'),
-    Input('back-to-dashboard', 'n_clicks'),
-    prevent_initial_call=True
-)
-def navigate_to_dashboard(n_clicks):
-    if n_clicks:
-        return '/user-dashboard'
-    raise PreventUpdate
\ No newline at end of file
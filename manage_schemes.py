@@ -1,16 +1,11 @@
 from dash import html, dcc, dash_table, callback_context
 import dash_bootstrap_components as dbc
 from dash.dependencies import Input, Output, State
-import sqlite3
-import pandas as pd
+import table_query
 
 def manage_schemes_layout():
-    # Connect to the database
-    conn = sqlite3.connect('data/USDH.db')
-    # Get scholarships data
-    schemes_df = pd.read_sql_query("SELECT * FROM schemes", conn)
-    conn.close()
-    
+    # Rows are paged in by the schemes-table callback
+
     layout= html.Div([
         html.Div([
             html.I(className="fas fa-arrow-left me-2", style={'color': '#1a73e8'}),
@@ -34,6 +29,9 @@ def manage_schemes_layout():
                 dbc.Button("Add New Scheme", id="add-scheme-btn", className="edu-button", n_clicks=0)
             ], className="d-flex justify-content-between align-items-center mb-3"),
             
+            # Why the table is empty when its filter cannot be applied
+            html.Div(id="schemes-table-error"),
+            
             # Schemes data table
             dash_table.DataTable(
                 id='schemes-table',
@@ -43,8 +41,16 @@ def manage_schemes_layout():
                     {"name": "Eligibility Criteria", "id": "eligiblity_criteria"},
                     {"name": "More Info", "id": "for_more_info"}
                 ],
-                data=schemes_df.to_dict('records'),
-                page_size=10,
+                data=[],
+                page_action="custom",
+                page_current=0,
+                page_size=table_query.PAGE_SIZE,
+                filter_action="custom",
+                filter_query="",
+                filter_options={"case": "insensitive"},
+                sort_action="custom",
+                sort_mode="single",
+                sort_by=[],
                 style_table={'overflowX': 'auto'},
                 style_header={
                     'backgroundColor': '#e8f0fe',
@@ -130,7 +136,13 @@ def manage_schemes_layout():
         ], id="scheme-detail-modal", size="lg", is_open=False, style={'color': '#1a73e8', 'backgroundColor': '#ffffff'}),
         
         # Add scheme success/error notification
-        html.Div(id="scheme-notification", className="mt-3")
+        html.Div(id="scheme-notification", className="mt-3"),
+        
+        # Row (id and version) the scheme modal is editing; None when adding
+        dcc.Store(id="editing-scheme", data=None),
+        
+        # Bumped after each edit so the page is fetched again
+        dcc.Store(id="schemes-catalog-version", data=0)
     ], className="p-4")
 
     return layout
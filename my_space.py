@@ -2,13 +2,15 @@ import dash
 from dash import html, dcc, callback_context
 import dash_bootstrap_components as dbc
 from dash.dependencies import Input, Output, State
-import sqlite3
+from db import get_connection
 import pandas as pd
 from flask import session as flask_session
-import os
-import base64
 import datetime
 import json
+import uploads
+import blobs
+import space_manifest
+from uploads import upload_field
 
 def my_space():
     """
@@ -68,7 +70,7 @@ def my_space():
                             dbc.Row([
                                 dbc.Col([
                                     dbc.Label("Select Folder"),
-                                    dcc.Upload(
+                                    upload_field(
                                         id='folder-upload',
                                         children=html.Div([
                                             'Drag and Drop or ',
@@ -117,7 +119,7 @@ def my_space():
                             dbc.Row([
                                 dbc.Col([
                                     dbc.Label("Upload File"),
-                                    dcc.Upload(
+                                    upload_field(
                                         id='material-upload',
                                         children=html.Div([
                                             'Drag and Drop or ',
@@ -213,7 +215,7 @@ def my_space():
                             dbc.Row([
                                 dbc.Col([
                                     dbc.Label("Upload File"),
-                                    dcc.Upload(
+                                    upload_field(
                                         id='document-upload',
                                         children=html.Div([
                                             'Drag and Drop or ',
@@ -283,18 +285,17 @@ def register_callbacks(app):
     # Handle document file upload preview
     @app.callback(
         Output("document-upload-output", "children"),
-        [Input("document-upload", "contents")],
-        [State("document-upload", "filename")],
+        [Input("document-upload", "data")],
         prevent_initial_call=True
     )
-    def handle_document_upload(contents, filename):
-        if contents is None:
+    def handle_document_upload(upload):
+        if upload is None:
             return ""
             
-        if filename is None:
-            return html.Div("No file selected", style={"color": "red"})
+        if upload.get("error"):
+            return html.Div(upload["error"], style={"color": "red"})
             
-        return html.Div(f"Selected file: {filename}", style={"color": "green"})
+        return html.Div(f"Uploaded file: {upload['filenames'][0]}", style={"color": "green"})
 
     # Toggle folder upload modal
     @app.callback(
@@ -319,19 +320,19 @@ def register_callbacks(app):
     # Handle folder upload preview
     @app.callback(
         Output("folder-upload-output", "children"),
-        [Input("folder-upload", "contents")],
-        [State("folder-upload", "filename")],
+        [Input("folder-upload", "data")],
         prevent_initial_call=True
     )
-    def handle_folder_upload(contents, filenames):
-        if contents is None:
+    def handle_folder_upload(upload):
+        if upload is None:
             return ""
             
-        if not filenames:
-            return html.Div("No files selected", style={"color": "red"})
+        if upload.get("error"):
+            return html.Div(upload["error"], style={"color": "red"})
             
+        filenames = upload["filenames"]
         return html.Div([
-            html.P(f"Selected {len(filenames)} files:", className="mb-2"),
+            html.P(f"Uploaded {len(filenames)} files:", className="mb-2"),
             html.Ul([html.Li(filename) for filename in filenames], className="list-unstyled")
         ], style={"color": "green"})
 
@@ -358,18 +359,17 @@ def register_callbacks(app):
     # Handle study material file upload preview
     @app.callback(
         Output("material-upload-output", "children", allow_duplicate=True),
-        [Input("material-upload", "contents")],
-        [State("material-upload", "filename")],
+        [Input("material-upload", "data")],
         prevent_initial_call=True
     )
-    def handle_material_upload(contents, filename):
-        if contents is None:
+    def handle_material_upload(upload):
+        if upload is None:
             return ""
             
-        if filename is None:
-            return html.Div("No file selected", style={"color": "red"})
+        if upload.get("error"):
+            return html.Div(upload["error"], style={"color": "red"})
             
-        return html.Div(f"Selected file: {filename}", style={"color": "green"})
+        return html.Div(f"Uploaded file: {upload['filenames'][0]}", style={"color": "green"})
 
     # Password verification callback
     @app.callback(
@@ -390,13 +390,14 @@ def register_callbacks(app):
             if not user_id:
                 return {"display": "block"}, {"display": "none"}, {"display": "block"}, "Session expired"
                 
-            conn = sqlite3.connect('data/USDH.db')
-            cursor = conn.cursor()
-            
-            # Get user's password from database
-            cursor.execute("SELECT password FROM users WHERE id = ?", (user_id,))
-            result = cursor.fetchone()
-            conn.close()
+            conn = get_connection()
+            try:
+                # Get user's password from database
+                cursor = conn.cursor()
+                cursor.execute("SELECT password FROM users WHERE id = ?", (user_id,))
+                result = cursor.fetchone()
+            finally:
+                conn.close()
             
             if result and result[0] == password:
                 return {"display": "none"}, {"display": "block"}, {"display": "none"}, ""
@@ -441,8 +442,7 @@ def register_callbacks(app):
             if not user_id:
                 return html.Div("Session expired"), html.Div("Session expired")
                 
-            documents_list = get_documents_list(user_id)
-            materials_list = get_study_materials_list(user_id)
+            documents_list, materials_list = get_space_lists(user_id)
             return documents_list, materials_list
             
         except Exception as e:
@@ -464,22 +464,19 @@ def register_callbacks(app):
          Input("upload-folder-btn", "n_clicks")],
         [State("document-name", "value"),
          State("document-description", "value"),
-         State("document-upload", "contents"),
-         State("document-upload", "filename"),
+         State("document-upload", "data"),
          State("material-name", "value"),
          State("material-description", "value"),
-         State("material-upload", "contents"),
-         State("material-upload", "filename"),
+         State("material-upload", "data"),
          State("folder-name", "value"),
          State("folder-description", "value"),
-         State("folder-upload", "contents"),
-         State("folder-upload", "filename")],
+         State("folder-upload", "data")],
         prevent_initial_call=True
     )
     def handle_all_updates(doc_upload_clicks, mat_upload_clicks, folder_upload_clicks,
-                          doc_name, doc_description, doc_contents, doc_filename,
-                          mat_name, mat_description, mat_contents, mat_filename,
-                          folder_name, folder_description, folder_contents, folder_filenames):
+                          doc_name, doc_description, doc_upload,
+                          mat_name, mat_description, mat_upload,
+                          folder_name, folder_description, folder_upload):
         ctx = callback_context
         if not ctx.triggered:
             return dash.no_update, dash.no_update, dash.no_update, dash.no_update, dash.no_update, dash.no_update, dash.no_update, dash.no_update
@@ -493,56 +490,35 @@ def register_callbacks(app):
                 
             # Handle document upload
             if trigger_id == "upload-document-btn" and doc_upload_clicks:
-                if not all([doc_name, doc_contents, doc_filename]):
+                if not doc_name or not doc_upload or not doc_upload.get("upload_ids"):
                     return dash.no_update, False, "Please fill in all required fields", dash.no_update, dash.no_update, dash.no_update, dash.no_update, dash.no_update
                     
                 try:
-                    # Create documents directory if it doesn't exist
-                    doc_dir = os.path.join("static", "documents", str(user_id))
-                    os.makedirs(doc_dir, exist_ok=True)
-                    
-                    # Save document file
-                    content_type, content_string = doc_contents.split(',')
-                    decoded = base64.b64decode(content_string)
-                    
-                    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-                    file_extension = os.path.splitext(doc_filename)[1].lower()
-                    new_filename = f"{timestamp}{file_extension}"
-                    filepath = os.path.join(doc_dir, new_filename)
-                    
-                    with open(filepath, 'wb') as f:
-                        f.write(decoded)
-                        
                     # Save to database
-                    conn = sqlite3.connect('data/USDH.db')
-                    cursor = conn.cursor()
-                    
-                    # Create documents table if it doesn't exist
-                    cursor.execute('''
-                        CREATE TABLE IF NOT EXISTS documents (
-                            id INTEGER PRIMARY KEY AUTOINCREMENT,
-                            user_id INTEGER,
-                            name TEXT,
-                            description TEXT,
-                            file_path TEXT,
-                            upload_date TEXT,
-                            FOREIGN KEY (user_id) REFERENCES users (id)
-                        )
-                    ''')
-                    
-                    # Insert the new document
-                    cursor.execute('''
-                        INSERT INTO documents (user_id, name, description, file_path, upload_date)
-                        VALUES (?, ?, ?, ?, ?)
-                    ''', (user_id, doc_name, doc_description, new_filename, 
-                          datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+                    conn = get_connection()
+                    try:
+                        cursor = conn.cursor()
+                        
+                        # Register the uploaded file with the blob store; it is already on disk
+                        blob_hash, filename, path = uploads.store_upload(cursor, user_id, doc_upload["upload_ids"][0])
+                        
+                        # Insert the new document
+                        cursor.execute('''
+                            INSERT INTO documents (user_id, name, description, file_path, blob_hash, upload_date)
+                            VALUES (?, ?, ?, ?, ?, ?)
+                        ''', (user_id, doc_name, doc_description, filename, blob_hash, 
+                              datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+                        
+                        conn.commit()
+                    finally:
+                        # Rolls back whatever was not committed
+                        conn.close()
                     
-                    conn.commit()
-                    conn.close()
+                    # The row is committed, so the file can go into the store
+                    blobs.place(path, blob_hash)
                     
                     # Get updated documents list
-                    documents_list = get_documents_list(user_id)
-                    materials_list = get_study_materials_list(user_id)
+                    documents_list, materials_list = get_space_lists(user_id)
                     return documents_list, False, "Document uploaded successfully!", materials_list, False, "", False, ""
                     
                 except Exception as e:
@@ -551,64 +527,35 @@ def register_callbacks(app):
 
             # Handle study material upload
             elif trigger_id == "upload-material-btn" and mat_upload_clicks:
-                if not all([mat_name, mat_contents, mat_filename]):
+                if not mat_name or not mat_upload or not mat_upload.get("upload_ids"):
                     return dash.no_update, dash.no_update, dash.no_update, dash.no_update, False, "Please fill in all required fields", dash.no_update, dash.no_update
                     
                 try:
-                    # Create study materials directory if it doesn't exist
-                    mat_dir = os.path.join("static", "study_materials", str(user_id))
-                    os.makedirs(mat_dir, exist_ok=True)
-                    
-                    # Save material file
-                    content_type, content_string = mat_contents.split(',')
-                    decoded = base64.b64decode(content_string)
-                    
-                    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-                    file_extension = os.path.splitext(mat_filename)[1].lower()
-                    new_filename = f"{timestamp}{file_extension}"
-                    filepath = os.path.join(mat_dir, new_filename)
-                    
-                    with open(filepath, 'wb') as f:
-                        f.write(decoded)
-                        
                     # Save to database
-                    conn = sqlite3.connect('data/USDH.db')
-                    cursor = conn.cursor()
-                    
-                    # First, check if the study materials table exists
-                    cursor.execute("""
-                        SELECT name FROM sqlite_master 
-                        WHERE type='table' AND name='study_materials'
-                    """)
-                    if not cursor.fetchone():
-                        # Create the study materials table if it doesn't exist
+                    conn = get_connection()
+                    try:
+                        cursor = conn.cursor()
+                        
+                        # Register the uploaded file with the blob store; it is already on disk
+                        blob_hash, filename, path = uploads.store_upload(cursor, user_id, mat_upload["upload_ids"][0])
+                        
+                        # Insert the new study material
                         cursor.execute('''
-                            CREATE TABLE study_materials (
-                                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                                user_id INTEGER,
-                                name TEXT,
-                                description TEXT,
-                                file_path TEXT,
-                                upload_date TEXT,
-                                FOREIGN KEY (user_id) REFERENCES users (id)
-                            )
-                        ''')
+                            INSERT INTO study_materials (user_id, name, description, file_path, blob_hash, upload_date)
+                            VALUES (?, ?, ?, ?, ?, ?)
+                        ''', (user_id, mat_name, mat_description, filename, blob_hash, 
+                              datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+                        
                         conn.commit()
-                        print("Study_materials table created successfully")
+                    finally:
+                        # Rolls back whatever was not committed
+                        conn.close()
                     
-                    # Insert the new study material
-                    cursor.execute('''
-                        INSERT INTO study_materials (user_id, name, description, file_path, upload_date)
-                        VALUES (?, ?, ?, ?, ?)
-                    ''', (user_id, mat_name, mat_description, new_filename, 
-                          datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
-                    
-                    conn.commit()
-                    conn.close()
+                    # The row is committed, so the file can go into the store
+                    blobs.place(path, blob_hash)
                     
                     # Get updated lists
-                    documents_list = get_documents_list(user_id)
-                    materials_list = get_study_materials_list(user_id)
+                    documents_list, materials_list = get_space_lists(user_id)
                     return documents_list, False, "", materials_list, False, "Study material uploaded successfully!", False, ""
                     
                 except Exception as e:
@@ -617,56 +564,38 @@ def register_callbacks(app):
 
             # Handle folder upload
             elif trigger_id == "upload-folder-btn" and folder_upload_clicks:
-                if not all([folder_name, folder_contents, folder_filenames]):
+                if not folder_name or not folder_upload or not folder_upload.get("upload_ids"):
                     return dash.no_update, dash.no_update, dash.no_update, dash.no_update, dash.no_update, dash.no_update, False, "Please fill in all required fields"
                     
                 try:
-                    # Create folder directory if it doesn't exist
-                    folder_dir = os.path.join("static", "folders", str(user_id), folder_name)
-                    os.makedirs(folder_dir, exist_ok=True)
-                    
-                    # Save all files from the folder
-                    for content, filename in zip(folder_contents, folder_filenames):
-                        if content and filename:
-                            content_type, content_string = content.split(',')
-                            decoded = base64.b64decode(content_string)
-                            
-                            filepath = os.path.join(folder_dir, filename)
-                            os.makedirs(os.path.dirname(filepath), exist_ok=True)
-                            
-                            with open(filepath, 'wb') as f:
-                                f.write(decoded)
-                    
                     # Save folder info to database
-                    conn = sqlite3.connect('data/USDH.db')
-                    cursor = conn.cursor()
-                    
-                    # Create folders table if it doesn't exist
-                    cursor.execute('''
-                        CREATE TABLE IF NOT EXISTS folders (
-                            id INTEGER PRIMARY KEY AUTOINCREMENT,
-                            user_id INTEGER,
-                            name TEXT,
-                            description TEXT,
-                            folder_path TEXT,
-                            upload_date TEXT,
-                            FOREIGN KEY (user_id) REFERENCES users (id)
-                        )
-                    ''')
-                    
-                    # Insert the new folder
-                    cursor.execute('''
-                        INSERT INTO folders (user_id, name, description, folder_path, upload_date)
-                        VALUES (?, ?, ?, ?, ?)
-                    ''', (user_id, folder_name, folder_description, folder_name, 
-                          datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+                    conn = get_connection()
+                    try:
+                        cursor = conn.cursor()
+                        
+                        # Insert the new folder
+                        upload_date = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                        cursor.execute('''
+                            INSERT INTO folders (user_id, name, description, folder_path, upload_date)
+                            VALUES (?, ?, ?, ?, ?)
+                        ''', (user_id, folder_name, folder_description, folder_name, upload_date))
+                        folder_id = cursor.lastrowid
+                        
+                        # Register all uploaded files with the blob store
+                        pending = [add_folder_file(cursor, user_id, folder_id, upload_id, upload_date)
+                                   for upload_id in folder_upload["upload_ids"]]
+                        
+                        conn.commit()
+                    finally:
+                        # Rolls back whatever was not committed
+                        conn.close()
                     
-                    conn.commit()
-                    conn.close()
+                    # The rows are committed, so the files can go into the store
+                    for path, blob_hash in pending:
+                        blobs.place(path, blob_hash)
                     
                     # Get updated lists
-                    documents_list = get_documents_list(user_id)
-                    materials_list = get_study_materials_list(user_id)
+                    documents_list, materials_list = get_space_lists(user_id)
                     return documents_list, False, "", materials_list, False, "", False, "Folder uploaded successfully!"
                     
                 except Exception as e:
@@ -703,29 +632,20 @@ def register_callbacks(app):
             if not user_id:
                 return html.Div("Session expired"), html.Div("Session expired")
                 
-            conn = sqlite3.connect('data/USDH.db')
-            cursor = conn.cursor()
-            
-            # Get file path before deleting
-            cursor.execute("SELECT file_path FROM documents WHERE id = ? AND user_id = ?", (doc_id, user_id))
-            result = cursor.fetchone()
-            
-            if result:
-                file_path = result[0]
-                # Delete from database
+            conn = get_connection()
+            try:
+                cursor = conn.cursor()
+                
+                # The delete releases the document's blob
                 cursor.execute("DELETE FROM documents WHERE id = ? AND user_id = ?", (doc_id, user_id))
                 conn.commit()
-                
-                # Delete file
-                full_path = os.path.join("static", "documents", str(user_id), file_path)
-                if os.path.exists(full_path):
-                    os.remove(full_path)
-            
-            conn.close()
+            finally:
+                # Rolls back whatever was not committed
+                conn.close()
+            blobs.collect()
             
             # Refresh lists
-            documents_list = get_documents_list(user_id)
-            materials_list = get_study_materials_list(user_id)
+            documents_list, materials_list = get_space_lists(user_id)
             return documents_list, materials_list
             
         except Exception as e:
@@ -756,29 +676,20 @@ def register_callbacks(app):
             if not user_id:
                 return html.Div("Session expired"), html.Div("Session expired")
                 
-            conn = sqlite3.connect('data/USDH.db')
-            cursor = conn.cursor()
-            
-            # Get file path before deleting
-            cursor.execute("SELECT file_path FROM study_materials WHERE id = ? AND user_id = ?", (mat_id, user_id))
-            result = cursor.fetchone()
-            
-            if result:
-                file_path = result[0]
-                # Delete from database
+            conn = get_connection()
+            try:
+                cursor = conn.cursor()
+                
+                # The delete releases the material's blob
                 cursor.execute("DELETE FROM study_materials WHERE id = ? AND user_id = ?", (mat_id, user_id))
                 conn.commit()
-                
-                # Delete file
-                full_path = os.path.join("static", "study_materials", str(user_id), file_path)
-                if os.path.exists(full_path):
-                    os.remove(full_path)
-            
-            conn.close()
+            finally:
+                # Rolls back whatever was not committed
+                conn.close()
+            blobs.collect()
             
             # Refresh lists
-            documents_list = get_documents_list(user_id)
-            materials_list = get_study_materials_list(user_id)
+            documents_list, materials_list = get_space_lists(user_id)
             return documents_list, materials_list
             
         except Exception as e:
@@ -809,37 +720,20 @@ def register_callbacks(app):
             if not user_id:
                 return html.Div("Session expired"), html.Div("Session expired")
                 
-            conn = sqlite3.connect('data/USDH.db')
-            cursor = conn.cursor()
-            
-            # Get folder path before deleting
-            cursor.execute("SELECT folder_path FROM folders WHERE id = ? AND user_id = ?", (folder_id, user_id))
-            result = cursor.fetchone()
-            
-            if result:
-                folder_path = result[0]
-                # Delete from database first
+            conn = get_connection()
+            try:
+                cursor = conn.cursor()
+                
+                # Deleting the folder deletes its files, which releases their blobs
                 cursor.execute("DELETE FROM folders WHERE id = ? AND user_id = ?", (folder_id, user_id))
                 conn.commit()
-                
-                # Try to delete folder and its contents
-                full_path = os.path.join("static", "folders", str(user_id), folder_path)
-                if os.path.exists(full_path):
-                    try:
-                        import shutil
-                        shutil.rmtree(full_path)
-                    except PermissionError:
-                        print(f"Permission denied when deleting folder: {full_path}")
-                        # Continue even if folder deletion fails - we've already removed it from the database
-                    except Exception as e:
-                        print(f"Error deleting folder: {str(e)}")
-                        # Continue even if folder deletion fails - we've already removed it from the database
-            
-            conn.close()
+            finally:
+                # Rolls back whatever was not committed
+                conn.close()
+            blobs.collect()
             
             # Refresh lists
-            documents_list = get_documents_list(user_id)
-            materials_list = get_study_materials_list(user_id)
+            documents_list, materials_list = get_space_lists(user_id)
             return documents_list, materials_list
             
         except Exception as e:
@@ -897,14 +791,18 @@ def register_callbacks(app):
     @app.callback(
         [Output("folder-files-upload-output", "children"),
          Output("folder-contents-modal", "children", allow_duplicate=True)],
-        [Input("folder-files-upload", "contents")],
-        [State("folder-files-upload", "filename"),
-         State("folder-contents-modal", "children")],
+        [Input("folder-files-upload", "data")],
+        [State("folder-contents-modal", "children")],
         prevent_initial_call=True
     )
-    def handle_folder_files_upload(contents, filenames, current_modal):
-        if not contents or not filenames:
+    def handle_folder_files_upload(upload, current_modal):
+        if not upload:
             return "", current_modal
+        
+        if upload.get("error"):
+            return html.Div(upload["error"], style={"color": "red"}), current_modal
+        
+        filenames = upload["filenames"]
             
         try:
             user_id = flask_session.get("user_id")
@@ -914,34 +812,36 @@ def register_callbacks(app):
             # Get folder ID from the modal header
             folder_name = current_modal['props']['children'][0]['props']['children'][1]['props']['children']
             
-            conn = sqlite3.connect('data/USDH.db')
-            cursor = conn.cursor()
-            
-            # Get folder path
-            cursor.execute('''
-                SELECT id, folder_path
-                FROM folders
-                WHERE name = ? AND user_id = ?
-            ''', (folder_name, user_id))
-            
-            result = cursor.fetchone()
-            if not result:
-                return "Folder not found", current_modal
+            conn = get_connection()
+            try:
+                cursor = conn.cursor()
                 
-            folder_id, folder_path = result
-            full_path = os.path.join("static", "folders", str(user_id), folder_path)
-            
-            # Save files
-            for content, filename in zip(contents, filenames):
-                if content and filename:
-                    content_type, content_string = content.split(',')
-                    decoded = base64.b64decode(content_string)
+                # Get folder path
+                cursor.execute('''
+                    SELECT id, folder_path
+                    FROM folders
+                    WHERE name = ? AND user_id = ?
+                ''', (folder_name, user_id))
+                
+                result = cursor.fetchone()
+                if not result:
+                    return "Folder not found", current_modal
                     
-                    filepath = os.path.join(full_path, filename)
-                    with open(filepath, 'wb') as f:
-                        f.write(decoded)
+                folder_id, folder_path = result
+                
+                # Register the uploaded files with the blob store
+                upload_date = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                pending = [add_folder_file(cursor, user_id, folder_id, upload_id, upload_date)
+                           for upload_id in upload["upload_ids"]]
+                
+                conn.commit()
+            finally:
+                # Rolls back whatever was not committed
+                conn.close()
             
-            conn.close()
+            # The rows are committed, so the files can go into the store
+            for path, blob_hash in pending:
+                blobs.place(path, blob_hash)
             
             # Refresh folder contents
             new_contents = get_folder_contents(user_id, folder_id)
@@ -967,35 +867,37 @@ def register_callbacks(app):
             raise dash.exceptions.PreventUpdate
             
         button_id = ctx.triggered[0]["prop_id"].split(".")[0]
-        folder_id, filename = json.loads(button_id)["index"].split("_")
+        file_id = json.loads(button_id)["index"]
         
         try:
             user_id = flask_session.get("user_id")
             if not user_id:
                 return [html.Div("Session expired")]
                 
-            conn = sqlite3.connect('data/USDH.db')
-            cursor = conn.cursor()
-            
-            # Get folder path
-            cursor.execute('''
-                SELECT folder_path
-                FROM folders
-                WHERE id = ? AND user_id = ?
-            ''', (folder_id, user_id))
-            
-            result = cursor.fetchone()
-            if not result:
-                return [html.Div("Folder not found")]
+            conn = get_connection()
+            try:
+                cursor = conn.cursor()
                 
-            folder_path = result[0]
-            file_path = os.path.join("static", "folders", str(user_id), folder_path, filename)
-            
-            # Delete file
-            if os.path.exists(file_path):
-                os.remove(file_path)
-            
-            conn.close()
+                # Find the file's folder
+                cursor.execute('''
+                    SELECT folder_id
+                    FROM folder_files
+                    WHERE id = ? AND user_id = ?
+                ''', (file_id, user_id))
+                
+                result = cursor.fetchone()
+                if not result:
+                    return [html.Div("File not found")]
+                    
+                folder_id = result[0]
+                
+                # The delete releases the file's blob
+                cursor.execute("DELETE FROM folder_files WHERE id = ? AND user_id = ?", (file_id, user_id))
+                conn.commit()
+            finally:
+                # Rolls back whatever was not committed
+                conn.close()
+            blobs.collect()
             
             # Refresh folder contents
             new_contents = get_folder_contents(user_id, folder_id)
@@ -1005,206 +907,159 @@ def register_callbacks(app):
             print(f"Error deleting folder file: {str(e)}")
             return [html.Div(f"Error deleting file: {str(e)}", style={"color": "red"})]
 
-def get_documents_list(user_id):
-    """Get user's documents list"""
+def add_folder_file(cursor, user_id, folder_id, upload_id, upload_date):
+    """Add a finished upload to a folder; returns the (path, blob hash) to place after commit"""
+    blob_hash, filename, path = uploads.store_upload(cursor, user_id, upload_id)
+    cursor.execute('''
+        INSERT INTO folder_files (folder_id, user_id, file_path, blob_hash, upload_date)
+        VALUES (?, ?, ?, ?, ?)
+    ''', (folder_id, user_id, filename, blob_hash, upload_date))
+    return path, blob_hash
+
+def get_space_lists(user_id):
+    """(documents list, study materials list) for a user from one manifest query"""
     try:
-        conn = sqlite3.connect('data/USDH.db')
-        cursor = conn.cursor()
-        
-        # First, check if the documents table exists
-        cursor.execute("""
-            SELECT name FROM sqlite_master 
-            WHERE type='table' AND name='documents'
-        """)
-        if not cursor.fetchone():
-            # Create the documents table if it doesn't exist
-            cursor.execute('''
-                CREATE TABLE documents (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER,
-                    name TEXT,
-                    description TEXT,
-                    file_path TEXT,
-                    upload_date TEXT,
-                    FOREIGN KEY (user_id) REFERENCES users (id)
-                )
-            ''')
-            conn.commit()
-        
-        # Now get the documents
-        cursor.execute('''
-            SELECT id, name, description, file_path, upload_date
-            FROM documents
-            WHERE user_id = ?
-            ORDER BY upload_date DESC
-        ''', (user_id,))
-        
-        documents = cursor.fetchall()
-        conn.close()
-        
-        if not documents:
-            return html.Div("No documents uploaded yet")
-            
-        documents_list = []
-        for doc_id, name, description, file_path, upload_date in documents:
-            # Create the full URL path for the document
-            doc_url = f"/static/documents/{user_id}/{file_path}"
-            
-            card = dbc.Card([
-                dbc.CardHeader([
-                    html.Div([
-                    html.H5(name, className="mb-0"),
-                        dbc.Button(
-                            html.I(className="fas fa-trash-alt"),
-                            id={"type": "delete-document", "index": doc_id},
-                            color="danger",
-                            className="float-end",
-                            size="sm"
-                        )
-                    ], className="d-flex justify-content-between align-items-center")
-                ]),
-                dbc.CardBody([
-                    html.P(description if description else "No description provided", className="card-text"),
-                    html.P(f"Uploaded: {upload_date}", className="text-muted small"),
-                    html.A(
-                        "Download",
-                        href=doc_url,
-                        target="_blank",
-                        className="btn btn-primary btn-sm"
-                    )
-                ])
-            ], className="mb-3")
-            documents_list.append(card)
-            
-        return html.Div(documents_list)
-        
+        entries = space_manifest.get_entries(user_id)
     except Exception as e:
-        print(f"Error getting documents list: {str(e)}")
-        return html.Div("Error loading documents", style={"color": "red"}) 
+        print(f"Error getting My Space entries: {str(e)}")
+        error = html.Div("Error loading content", style={"color": "red"})
+        return error, error
 
-def get_folders_list(user_id):
-    """Get user's folders list"""
-    try:
-        conn = sqlite3.connect('data/USDH.db')
-        cursor = conn.cursor()
-        
-        # First, check if the folders table exists
-        cursor.execute("""
-            SELECT name FROM sqlite_master 
-            WHERE type='table' AND name='folders'
-        """)
-        if not cursor.fetchone():
-            # Create the folders table if it doesn't exist
-            cursor.execute('''
-                CREATE TABLE folders (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER,
-                    name TEXT,
-                    description TEXT,
-                    folder_path TEXT,
-                    upload_date TEXT,
-                    FOREIGN KEY (user_id) REFERENCES users (id)
+    documents = [document_card(e) for e in entries if e['kind'] == 'document']
+    # Folders first, then individual materials
+    materials = ([folder_card(e) for e in entries if e['kind'] == 'folder'] +
+                 [material_card(e) for e in entries if e['kind'] == 'material'])
+
+    documents_list = html.Div(documents) if documents else html.Div("No documents uploaded yet")
+    materials_list = html.Div(materials) if materials else html.Div("No study materials or folders uploaded yet")
+    return documents_list, materials_list
+
+def document_card(entry):
+    """Card for a document entry"""
+    doc_id = entry['item_id']
+    # Files are served from the blob store after an ownership check
+    doc_url = f"/files/documents/{doc_id}"
+    
+    return dbc.Card([
+        dbc.CardHeader([
+            html.Div([
+            html.H5(entry['name'], className="mb-0"),
+                dbc.Button(
+                    html.I(className="fas fa-trash-alt"),
+                    id={"type": "delete-document", "index": doc_id},
+                    color="danger",
+                    className="float-end",
+                    size="sm"
                 )
-            ''')
-            conn.commit()
-        
-        # Now get the folders
-        cursor.execute('''
-            SELECT id, name, description, folder_path, upload_date
-            FROM folders
-            WHERE user_id = ?
-            ORDER BY upload_date DESC
-        ''', (user_id,))
-        
-        folders = cursor.fetchall()
-        conn.close()
-        
-        if not folders:
-            return []
-            
-        folders_list = []
-        for folder_id, name, description, folder_path, upload_date in folders:
-            # Create the full URL path for the folder
-            folder_url = f"/static/folders/{user_id}/{folder_path}"
-            
-            # Check if folder exists
-            folder_exists = os.path.exists(os.path.join("static", "folders", str(user_id), folder_path))
-            
-            card = dbc.Card([
-                dbc.CardHeader([
-                    html.Div([
-                        html.Div([
-                            html.I(className="fas fa-folder me-2"),
-                            html.H5(name, className="mb-0 d-inline")
-                        ]),
-                        dbc.Button(
-                            html.I(className="fas fa-trash-alt"),
-                            id={"type": "delete-folder", "index": folder_id},
-                            color="danger",
-                            className="float-end",
-                            size="sm"
-                        )
-                    ], className="d-flex justify-content-between align-items-center")
+            ], className="d-flex justify-content-between align-items-center")
+        ]),
+        dbc.CardBody([
+            html.P(entry['description'] if entry['description'] else "No description provided", className="card-text"),
+            html.P(f"Uploaded: {entry['modified']}", className="text-muted small"),
+            html.A(
+                "Download",
+                href=doc_url,
+                target="_blank",
+                className="btn btn-primary btn-sm"
+            )
+        ])
+    ], className="mb-3")
+
+def folder_card(entry):
+    """Card for a folder entry"""
+    folder_id = entry['item_id']
+    return dbc.Card([
+        dbc.CardHeader([
+            html.Div([
+                html.Div([
+                    html.I(className="fas fa-folder me-2"),
+                    html.H5(entry['name'], className="mb-0 d-inline")
                 ]),
-                dbc.CardBody([
-                    html.P(description if description else "No description provided", className="card-text"),
-                    html.P(f"Uploaded: {upload_date}", className="text-muted small"),
-                    dbc.Button(
-                        "Open Folder",
-                        id={"type": "open-folder", "index": folder_id},
-                        color="info",
-                        className="btn-sm me-2"
-                    ),
-                    dbc.Button(
-                        "Add Files",
-                        id={"type": "add-files", "index": folder_id},
-                        color="success",
-                        className="btn-sm"
-                    )
-                ])
-            ], className="mb-3")
-            folders_list.append(card)
-            
-        return folders_list
-        
-    except Exception as e:
-        print(f"Error getting folders list: {str(e)}")
-        return []
+                dbc.Button(
+                    html.I(className="fas fa-trash-alt"),
+                    id={"type": "delete-folder", "index": folder_id},
+                    color="danger",
+                    className="float-end",
+                    size="sm"
+                )
+            ], className="d-flex justify-content-between align-items-center")
+        ]),
+        dbc.CardBody([
+            html.P(entry['description'] if entry['description'] else "No description provided", className="card-text"),
+            html.P(f"Uploaded: {entry['modified']}", className="text-muted small"),
+            dbc.Button(
+                "Open Folder",
+                id={"type": "open-folder", "index": folder_id},
+                color="info",
+                className="btn-sm me-2"
+            ),
+            dbc.Button(
+                "Add Files",
+                id={"type": "add-files", "index": folder_id},
+                color="success",
+                className="btn-sm"
+            )
+        ])
+    ], className="mb-3")
+
+def material_card(entry):
+    """Card for a study material entry"""
+    mat_id = entry['item_id']
+    # Files are served from the blob store after an ownership check
+    mat_url = f"/files/study_materials/{mat_id}"
+    
+    # Rows whose file was missing when the blob store was set up have no blob
+    file_exists = entry['blob_hash'] is not None
+    
+    return dbc.Card([
+        dbc.CardHeader([
+            html.Div([
+                html.Div([
+                    html.I(className="fas fa-file me-2"),
+                    html.H5(entry['name'], className="mb-0 d-inline")
+                ]),
+                dbc.Button(
+                    html.I(className="fas fa-trash-alt"),
+                    id={"type": "delete-material", "index": mat_id},
+                    color="danger",
+                    className="float-end",
+                    size="sm"
+                )
+            ], className="d-flex justify-content-between align-items-center")
+        ]),
+        dbc.CardBody([
+            html.P(entry['description'] if entry['description'] else "No description provided", className="card-text"),
+            html.P(f"Uploaded: {entry['modified']}", className="text-muted small"),
+            html.A(
+                "Download",
+                href=mat_url if file_exists else "#",
+                target="_blank",
+                className="btn btn-primary btn-sm" if file_exists else "btn btn-secondary btn-sm disabled",
+                style={"pointerEvents": "none" if not file_exists else "auto"}
+            ),
+            html.Small(
+                "File not found" if not file_exists else "",
+                className="text-danger d-block mt-2"
+            )
+        ])
+    ], className="mb-3")
 
 def get_folder_contents(user_id, folder_id):
     """Get contents of a specific folder"""
     try:
-        conn = sqlite3.connect('data/USDH.db')
-        cursor = conn.cursor()
-        
-        # Get folder details
-        cursor.execute('''
-            SELECT name, folder_path
-            FROM folders
-            WHERE id = ? AND user_id = ?
-        ''', (folder_id, user_id))
-        
-        result = cursor.fetchone()
-        if not result:
+        # The folder's entry and its files in one manifest query
+        entries = space_manifest.get_folder_entries(user_id, folder_id)
+        if not entries or entries[0]['kind'] != 'folder':
             return html.Div("Folder not found")
             
-        folder_name, folder_path = result
-        full_path = os.path.join("static", "folders", str(user_id), folder_path)
-        
-        if not os.path.exists(full_path):
-            return html.Div("Folder not found")
-            
-        # Get list of files in the folder
-        files = []
-        for filename in os.listdir(full_path):
-            file_path = os.path.join(full_path, filename)
-            if os.path.isfile(file_path):
-                files.append({
-                    'name': filename,
-                    'path': f"/static/folders/{user_id}/{folder_path}/{filename}",
-                    'size': os.path.getsize(file_path),
-                    'modified': datetime.datetime.fromtimestamp(os.path.getmtime(file_path)).strftime("%Y-%m-%d %H:%M:%S")
-                })
+        folder_name = entries[0]['name']
+        files = [{
+            'id': entry['item_id'],
+            'name': entry['file_name'],
+            'path': f"/files/folder_files/{entry['item_id']}",
+            'size': entry['size'] or 0,
+            'modified': entry['modified']
+        } for entry in entries[1:]]
         
         # Create the folder contents modal
         return html.Div([
@@ -1219,7 +1074,7 @@ def get_folder_contents(user_id, folder_id):
                 dbc.Card([
                     dbc.CardHeader("Add Files"),
                     dbc.CardBody([
-                        dcc.Upload(
+                        upload_field(
                             id='folder-files-upload',
                             children=html.Div([
                                 'Drag and Drop or ',
@@ -1267,7 +1122,7 @@ def get_folder_contents(user_id, folder_id):
                                     ),
                                     dbc.Button(
                                         html.I(className="fas fa-trash-alt"),
-                                        id={"type": "delete-folder-file", "index": f"{folder_id}_{file['name']}"},
+                                        id={"type": "delete-folder-file", "index": file['id']},
                                         color="danger",
                                         size="sm"
                                     )
@@ -1285,116 +1140,3 @@ def get_folder_contents(user_id, folder_id):
     except Exception as e:
         print(f"Error getting folder contents: {str(e)}")
         return html.Div("Error loading folder contents", style={"color": "red"})
-    finally:
-        conn.close()
-
-def get_study_materials_list(user_id):
-    """Get user's study materials list"""
-    try:
-        # Ensure user_id is valid
-        if not user_id:
-            print("Error: No user_id provided")
-            return html.Div("Please log in to view study materials", style={"color": "red"})
-
-        # Ensure database directory exists
-        if not os.path.exists('data'):
-            os.makedirs('data')
-
-        conn = sqlite3.connect('data/USDH.db')
-        cursor = conn.cursor()
-        
-        # First, check if the study materials table exists
-        cursor.execute("""
-            SELECT name FROM sqlite_master 
-            WHERE type='table' AND name='study_materials'
-        """)
-        if not cursor.fetchone():
-            # Create the study materials table if it doesn't exist
-            cursor.execute('''
-                CREATE TABLE study_materials (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER,
-                    name TEXT,
-                    description TEXT,
-                    file_path TEXT,
-                    upload_date TEXT,
-                    FOREIGN KEY (user_id) REFERENCES users (id)
-                )
-            ''')
-            conn.commit()
-            print("Study_materials table created successfully")
-        
-        # Now get the study materials
-        cursor.execute('''
-            SELECT id, name, description, file_path, upload_date
-            FROM study_materials
-            WHERE user_id = ?
-            ORDER BY upload_date DESC
-        ''', (user_id,))
-        
-        materials = cursor.fetchall()
-        conn.close()
-        
-        # Get folders list
-        folders_list = get_folders_list(user_id)
-        
-        if not materials and not folders_list:
-            return html.Div("No study materials or folders uploaded yet")
-            
-        materials_list = []
-        
-        # Add folders first
-        materials_list.extend(folders_list)
-        
-        # Add individual materials
-        for mat_id, name, description, file_path, upload_date in materials:
-            # Create the full URL path for the material
-            mat_url = f"/static/study_materials/{user_id}/{file_path}"
-            
-            # Check if file exists
-            file_exists = os.path.exists(os.path.join("static", "study_materials", str(user_id), file_path))
-            
-            card = dbc.Card([
-                dbc.CardHeader([
-                    html.Div([
-                        html.Div([
-                            html.I(className="fas fa-file me-2"),
-                            html.H5(name, className="mb-0 d-inline")
-                        ]),
-                        dbc.Button(
-                            html.I(className="fas fa-trash-alt"),
-                            id={"type": "delete-material", "index": mat_id},
-                            color="danger",
-                            className="float-end",
-                            size="sm"
-                        )
-                    ], className="d-flex justify-content-between align-items-center")
-                ]),
-                dbc.CardBody([
-                    html.P(description if description else "No description provided", className="card-text"),
-                    html.P(f"Uploaded: {upload_date}", className="text-muted small"),
-                    html.A(
-                        "Download",
-                        href=mat_url if file_exists else "#",
-                        target="_blank",
-                        className="btn btn-primary btn-sm" if file_exists else "btn btn-secondary btn-sm disabled",
-                        style={"pointerEvents": "none" if not file_exists else "auto"}
-                    ),
-                    html.Small(
-                        "File not found" if not file_exists else "",
-                        className="text-danger d-block mt-2"
-                    )
-                ])
-            ], className="mb-3")
-            materials_list.append(card)
-            
-        return html.Div(materials_list)
-        
-    except sqlite3.Error as e:
-        print(f"Database error in get_study_materials_list: {str(e)}")
-        return html.Div(f"Database error: {str(e)}", style={"color": "red"})
-    except Exception as e:
-        print(f"Error in get_study_materials_list: {str(e)}")
-        import traceback
-        print(traceback.format_exc())
-        return html.Div(f"Error loading study materials: {str(e)}", style={"color": "red"}) 
\ No newline at end of file
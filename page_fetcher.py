@@ -0,0 +1,216 @@
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from db import get_connection
+
+# External course pages are fetched on a background pool and their cleaned
+# text is kept in the page_cache table. Readers only ever see the cache: a
+# missing or stale page is queued for a refresh and served as it is, so a
+# slow portal never holds a Flask thread. Refreshes send the stored ETag /
+# Last-Modified, and a 304 just renews the entry. A host gets at most
+# PER_HOST_LIMIT pages on the pool at once; the rest wait in its queue
+# rather than on a worker, so one slow portal cannot take every worker.
+FETCH_WORKERS = 8
+PER_HOST_LIMIT = 2
+POOL_SIZE = 16
+PAGE_TTL = 6 * 3600
+ERROR_TTL = 300              # retry failed pages after this long
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 10
+MAX_PAGE_BYTES = 5 * 1024 * 1024
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+_pending = {}       # url -> Future for a refresh queued or in progress
+_running = {}       # host -> pages of the host handed to the pool
+_waiting = {}       # host -> deque of urls waiting for one of its slots
+_lock = threading.Lock()
+_executor = ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix="page-fetch")
+
+_session = requests.Session()
+_session.headers['User-Agent'] = USER_AGENT
+_adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=PER_HOST_LIMIT)
+_session.mount('http://', _adapter)
+_session.mount('https://', _adapter)
+
+
+def is_valid_url(url):
+    """Check if the URL is valid"""
+    try:
+        result = urlparse(url)
+        return result.scheme in ('http', 'https') and bool(result.netloc)
+    except (ValueError, AttributeError):
+        return False
+
+
+def clean_html_content(html_content):
+    """Clean and format HTML content for display"""
+    # Only the fetch workers parse pages, so bs4 is loaded on the first fetch
+    from bs4 import BeautifulSoup
+    try:
+        soup = BeautifulSoup(html_content, 'html.parser')
+
+        # Remove unwanted elements
+        for element in soup.find_all(['script', 'style', 'iframe', 'nav', 'header', 'footer']):
+            element.decompose()
+
+        # Clean up the content
+        content = soup.get_text()
+        content = re.sub(r'\s+', ' ', content)  # Remove extra whitespace
+        content = content.strip()
+
+        return content if content else "No content available."
+    except Exception as e:
+        print(f"Error cleaning content: {str(e)}")
+        return "Error processing content."
+
+
+def _host(url):
+    return urlparse(url).netloc.lower()
+
+
+def _release_host(host):
+    """Give up a host's slot, handing it straight to the next page queued for it"""
+    with _lock:
+        waiting = _waiting.get(host)
+        if waiting:
+            _executor.submit(_refresh, waiting.popleft())
+            return
+        _waiting.pop(host, None)
+        _running[host] -= 1
+        if not _running[host]:
+            del _running[host]
+
+
+def _get_entry(url):
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT content, etag, last_modified, fetched_at, error
+        FROM page_cache WHERE url = ?
+    ''', (url,))
+    row = cursor.fetchone()
+    conn.close()
+    if row is None:
+        return None
+    return dict(zip(('content', 'etag', 'last_modified', 'fetched_at', 'error'), row))
+
+
+def _save_entry(url, content, etag, last_modified, error=None):
+    """Store a fetch result; a failed fetch keeps the previous content"""
+    conn = get_connection()
+    conn.execute('''
+        INSERT INTO page_cache (url, content, etag, last_modified, fetched_at, error)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT (url) DO UPDATE SET
+            content = COALESCE(excluded.content, content),
+            etag = COALESCE(excluded.etag, etag),
+            last_modified = COALESCE(excluded.last_modified, last_modified),
+            fetched_at = excluded.fetched_at,
+            error = excluded.error
+    ''', (url, content, etag, last_modified, time.time(), error))
+    conn.commit()
+    conn.close()
+
+
+def _read_body(response):
+    """Response text, refusing pages over MAX_PAGE_BYTES"""
+    body = bytearray()
+    for block in response.iter_content(64 * 1024):
+        body.extend(block)
+        if len(body) > MAX_PAGE_BYTES:
+            raise ValueError(f"Page is larger than {MAX_PAGE_BYTES // (1024 * 1024)} MB")
+    encoding = response.encoding or response.apparent_encoding or 'utf-8'
+    return body.decode(encoding, errors='replace')
+
+
+def _refresh(url):
+    """Fetch a page (conditionally if cached) and store its cleaned text
+
+    Runs holding one of the host's slots, which it gives up once the
+    response is read.
+    """
+    try:
+        try:
+            entry = _get_entry(url)
+            headers = {}
+            if entry and entry['content'] is not None:
+                if entry['etag']:
+                    headers['If-None-Match'] = entry['etag']
+                if entry['last_modified']:
+                    headers['If-Modified-Since'] = entry['last_modified']
+
+            try:
+                with _session.get(url, headers=headers, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT), stream=True) as response:
+                    if response.status_code == 304:
+                        _save_entry(url, None, None, None)
+                        return
+                    response.raise_for_status()
+                    body = _read_body(response)
+                    etag = response.headers.get('ETag')
+                    last_modified = response.headers.get('Last-Modified')
+            except (requests.exceptions.RequestException, ValueError) as e:
+                print(f"Error fetching content: {str(e)}")
+                _save_entry(url, None, None, None, error=str(e))
+                return
+        finally:
+            # Parse outside the host slot so the next request can start
+            _release_host(_host(url))
+
+        _save_entry(url, clean_html_content(body), etag, last_modified)
+    except Exception as e:
+        print(f"Error refreshing page {url}: {e}")
+    finally:
+        with _lock:
+            future = _pending.pop(url, None)
+        if future is not None:
+            future.set_result(None)
+
+
+def refresh(url):
+    """Queue a refresh of a page unless one is already queued; returns its Future
+
+    The page goes to the pool once its host has a free slot.
+    """
+    with _lock:
+        future = _pending.get(url)
+        if future is None:
+            host = _host(url)
+            if _running.get(host, 0) < PER_HOST_LIMIT:
+                _executor.submit(_refresh, url)
+                _running[host] = _running.get(host, 0) + 1
+            else:
+                _waiting.setdefault(host, deque()).append(url)
+            # _refresh() takes the lock to finish, so it cannot miss this
+            future = _pending[url] = Future()
+        return future
+
+
+def _is_stale(entry):
+    ttl = ERROR_TTL if entry['error'] else PAGE_TTL
+    return time.time() - entry['fetched_at'] > ttl
+
+
+def get_page(url, wait=0):
+    """(cleaned text or None, error or None) for a page, from the cache
+
+    Missing and stale pages are refreshed in the background; pass wait to
+    give a missing page that many seconds to arrive.
+    """
+    entry = _get_entry(url)
+    if entry is None or _is_stale(entry):
+        future = refresh(url)
+        if entry is None and wait:
+            try:
+                future.result(timeout=wait)
+            except Exception:
+                pass
+            entry = _get_entry(url)
+    if entry is None:
+        return None, None
+    return entry['content'], entry['error']
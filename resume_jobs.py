@@ -0,0 +1,161 @@
+import os
+import threading
+import time
+import uuid
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from db import get_connection
+from resume_pdf import build_resume_pdf
+
+# PDFs are built in worker processes so a slow build never holds a Flask
+# thread. Jobs are kept in the resume_jobs table, so any app process can
+# report on a job another one submitted. They are deleted JOB_TTL seconds
+# after they were submitted; the PDF itself stays in tmp/ and in the user's
+# download history. A job still queued after JOB_TIMEOUT seconds lost the
+# process that was building it.
+RESUME_WORKERS = 2
+JOB_TTL = 3600
+JOB_TIMEOUT = 300
+RESUME_DIR = 'tmp'
+
+_lock = threading.Lock()
+_executor = None
+
+
+def _get_executor():
+    """The worker pool, started by the first submit in this process"""
+    global _executor
+    with _lock:
+        if _executor is None:
+            # Never forked from here: by the first submit the server is running
+            # other threads, and a fork could copy one of their held locks
+            # into a worker. Workers come from a fresh interpreter instead,
+            # through the fork server (which preloads the PDF code) where
+            # there is one. multiprocessing also imports the main script
+            # (python login.py) into each worker, which is why login does
+            # no work on import (see login.startup()).
+            if 'forkserver' in multiprocessing.get_all_start_methods():
+                context = multiprocessing.get_context('forkserver')
+                context.set_forkserver_preload(['resume_pdf', 'reportlab.platypus'])
+            else:
+                context = multiprocessing.get_context('spawn')
+            _executor = ProcessPoolExecutor(max_workers=RESUME_WORKERS, mp_context=context)
+        return _executor
+
+
+def _submit_build(resume_data, template, pdf_path):
+    """Queue a build, replacing the pool once if a dead worker has broken it"""
+    global _executor
+    executor = _get_executor()
+    try:
+        return executor.submit(build_resume_pdf, resume_data, template, pdf_path)
+    except BrokenProcessPool:
+        print("Resume worker pool is broken, starting a new one")
+        with _lock:
+            if _executor is executor:
+                _executor = None
+        executor.shutdown(wait=False)
+        return _get_executor().submit(build_resume_pdf, resume_data, template, pdf_path)
+
+
+def _finish(job_id, user_id, template, pdf_path, error=None):
+    """Mark a job done (adding the PDF to the download history) or failed"""
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        download_id = None
+        if error is None:
+            cursor.execute('''
+                INSERT INTO resume_downloads (user_id, template, created_at, file_path)
+                VALUES (?, ?, ?, ?)
+            ''', (user_id, template, datetime.now().strftime('%Y-%m-%d %H:%M:%S'), pdf_path))
+            download_id = cursor.lastrowid
+        cursor.execute('''
+            UPDATE resume_jobs SET status = ?, download_id = ?, error = ?, finished_at = ?
+            WHERE id = ?
+        ''', ('failed' if error else 'done', download_id, error, time.time(), job_id))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _on_done(job_id, user_id, template, pdf_path, future):
+    try:
+        future.result()
+        _finish(job_id, user_id, template, pdf_path)
+    except Exception as e:
+        print(f"Error generating resume PDF for job {job_id}: {e}")
+        try:
+            _finish(job_id, user_id, template, pdf_path, error=str(e))
+        except Exception as e:
+            print(f"Error recording failed resume job {job_id}: {e}")
+
+
+def submit(user_id, resume_data, template):
+    """Queue a resume PDF build and return its job id"""
+    job_id = uuid.uuid4().hex
+    os.makedirs(RESUME_DIR, exist_ok=True)
+    pdf_path = os.path.join(RESUME_DIR, f"resume_{user_id}_{job_id}.pdf")
+
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        # Old jobs go as new ones arrive
+        cursor.execute("DELETE FROM resume_jobs WHERE created_at < ?", (time.time() - JOB_TTL,))
+        cursor.execute('''
+            INSERT INTO resume_jobs (id, user_id, template, pdf_path, status, created_at)
+            VALUES (?, ?, ?, ?, 'queued', ?)
+        ''', (job_id, user_id, template, pdf_path, time.time()))
+        conn.commit()
+    finally:
+        conn.close()
+
+    try:
+        future = _submit_build(resume_data, template, pdf_path)
+    except Exception as e:
+        # The job row is committed already; fail it now rather than at JOB_TIMEOUT
+        print(f"Error queueing resume PDF for job {job_id}: {e}")
+        _finish(job_id, user_id, template, pdf_path, error=str(e))
+        return job_id
+    future.add_done_callback(lambda f: _on_done(job_id, user_id, template, pdf_path, f))
+    return job_id
+
+
+def _get_row(job_id, user_id):
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT status, template, pdf_path, download_id, error, created_at
+            FROM resume_jobs WHERE id = ? AND user_id = ?
+        ''', (job_id, user_id))
+        return cursor.fetchone()
+    finally:
+        conn.close()
+
+
+def get_job(job_id, user_id):
+    """Status of a job owned by user_id, or None if there is no such job"""
+    row = _get_row(job_id, user_id)
+    if row is None:
+        return None
+    status, template, _, download_id, error, created_at = row
+    if status == 'queued' and time.time() - created_at > JOB_TIMEOUT:
+        status, error = 'failed', "The PDF build was interrupted"
+    return {
+        'id': job_id,
+        'status': status,
+        'template': template,
+        'download_id': download_id,
+        'error': error,
+    }
+
+
+def get_pdf_path(job_id, user_id):
+    """Path of a finished job's PDF, or None if it is not ready or not the user's"""
+    row = _get_row(job_id, user_id)
+    if row is None or row[0] != 'done':
+        return None
+    return row[2]
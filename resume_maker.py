@@ -2,22 +2,15 @@ import dash
 from dash import html, dcc, callback_context
 import dash_bootstrap_components as dbc
 from dash.dependencies import Input, Output, State
+from dash.exceptions import PreventUpdate
 import sqlite3
+from db import get_connection
+import resume_jobs
 import pandas as pd
 from flask import session
-import plotly.graph_objs as go
-import plotly.express as px
-from datetime import datetime
 import os
 import json
-from jinja2 import Template
-import base64
 import jinja2
-import time
-from reportlab.lib.pagesizes import letter
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
 
 def resume_maker():
     """
@@ -113,6 +106,7 @@ def resume_maker():
         dbc.Button("Generate Resume", id="generate-resume-btn", color="success", className="mb-4"),
         
         # Result Display
+        html.Div(id="resume-pdf-status", className="mb-3"),
         html.Div(id="resume-output", className="mb-4"),
         
         # Download History
@@ -122,8 +116,9 @@ def resume_maker():
         ], className="mb-4"),
         
         # Hidden components
-        dcc.Download(id="resume-download"),
         dcc.Store(id="resume-data-store"),
+        dcc.Store(id="resume-job"),
+        dcc.Interval(id="resume-job-poll", interval=1000, disabled=True),
     ], className="container py-4")
 
 def register_callbacks(app):
@@ -144,29 +139,9 @@ def register_callbacks(app):
         
         try:
             # Connect to database
-            conn = sqlite3.connect('data/USDH.db')
+            conn = get_connection()
             cursor = conn.cursor()
             
-            # First check if certificates table exists
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='certificates'")
-            table_exists = cursor.fetchone()
-            
-            if not table_exists:
-                # Create certificates table if it doesn't exist
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS certificates (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        user_id INTEGER,
-                        name TEXT,
-                        organization TEXT,
-                        issue_date TEXT,
-                        file_path TEXT,
-                        upload_date TEXT,
-                        FOREIGN KEY (user_id) REFERENCES users (id)
-                    )
-                ''')
-                conn.commit()
-                
             # Try to query certificates with expected columns
             try:
                 cursor.execute("SELECT id, name, organization, issue_date FROM certificates WHERE user_id = ?", (user_id,))
@@ -229,7 +204,7 @@ def register_callbacks(app):
         
         try:
             # Get certificate details from the database
-            conn = sqlite3.connect('data/USDH.db')
+            conn = get_connection()
             cursor = conn.cursor()
             
             # Try with new schema first
@@ -486,8 +461,7 @@ def register_callbacks(app):
     # Callback to generate resume
     @app.callback(
         [Output("resume-output", "children"),
-         Output("resume-download", "data"),
-         Output("download-history", "children")],
+         Output("resume-job", "data")],
         [Input("generate-resume-btn", "n_clicks")],
         [State("full-name", "value"),
          State("email", "value"),
@@ -503,11 +477,11 @@ def register_callbacks(app):
     )
     def generate_resume(n_clicks, full_name, email, phone, location, summary, education, experience, certifications, skills, template):
         if not n_clicks:
-            return dash.no_update, dash.no_update, dash.no_update
+            return dash.no_update, dash.no_update
         
         # If user is not logged in, don't generate resume
         if 'user_id' not in session:
-            return html.Div("Please log in to generate a resume"), dash.no_update, dash.no_update
+            return html.Div("Please log in to generate a resume"), dash.no_update
         
         # Get user ID
         user_id = session['user_id']
@@ -785,432 +759,70 @@ def register_callbacks(app):
                 '''
                 rendered_html = rendered_html.replace('</head>', f'{style_tag}</head>')
                 
-                # Save HTML to temporary file
-                tmp_html_path = f"tmp/resume_{user_id}_{int(time.time())}.html"
-                os.makedirs(os.path.dirname(tmp_html_path), exist_ok=True)
-                
-                with open(tmp_html_path, 'w') as f:
-                    f.write(rendered_html)
-                
-                # Try to generate PDF
-                pdf_success = False
-                pdf_path = tmp_html_path.replace(".html", ".pdf")
-                rendered_pdf = None
-                
-                try:
-                    # PDF generation using reportlab with enhanced styling
-                    doc = SimpleDocTemplate(pdf_path, pagesize=letter)
-                    styles = getSampleStyleSheet()
-                    
-                    # Create custom styles based on selected template
-                    if template == "professional":
-                        # Professional template styles
-                        title_style = ParagraphStyle(
-                            'CustomTitle',
-                            parent=styles['Title'],
-                            fontSize=24,
-                            spaceAfter=20,
-                            alignment=1,  # Center alignment
-                            fontName='Helvetica-Bold'
-                        )
-                        heading_style = ParagraphStyle(
-                            'CustomHeading',
-                            parent=styles['Heading2'],
-                            fontSize=14,
-                            spaceBefore=15,
-                            spaceAfter=10,
-                            textColor=colors.black,
-                            borderWidth=1,
-                            borderPadding=5,
-                            borderColor=colors.black,
-                            fontName='Helvetica-Bold'
-                        )
-                        normal_style = ParagraphStyle(
-                            'CustomNormal',
-                            parent=styles['Normal'],
-                            fontSize=10,
-                            textColor=colors.black,
-                            fontName='Helvetica'
-                        )
-                        italic_style = ParagraphStyle(
-                            'CustomItalic',
-                            parent=styles['Italic'],
-                            fontSize=10,
-                            textColor=colors.gray,
-                            fontName='Helvetica-Oblique'
-                        )
-                    elif template == "modern":
-                        # Modern template styles with enhanced visual elements
-                        title_style = ParagraphStyle(
-                            'CustomTitle',
-                            parent=styles['Title'],
-                            fontSize=28,
-                            spaceAfter=25,
-                            alignment=1,
-                            fontName='Helvetica-Bold',
-                            textColor=colors.HexColor('#2b6cb0'),  # Matching the preview blue
-                            leading=35
-                        )
-                        
-                        heading_style = ParagraphStyle(
-                            'CustomHeading',
-                            parent=styles['Heading2'],
-                            fontSize=16,
-                            spaceBefore=20,
-                            spaceAfter=12,
-                            textColor=colors.HexColor('#2b6cb0'),
-                            leftIndent=0,
-                            fontName='Helvetica-Bold',
-                            leading=20,
-                            borderWidth=0,
-                            borderPadding=0
-                        )
-                        
-                        normal_style = ParagraphStyle(
-                            'CustomNormal',
-                            parent=styles['Normal'],
-                            fontSize=11,
-                            textColor=colors.HexColor('#2d3748'),  # Darker gray for better readability
-                            fontName='Helvetica',
-                            leading=16,
-                            spaceBefore=4
-                        )
-                        
-                        italic_style = ParagraphStyle(
-                            'CustomItalic',
-                            parent=styles['Italic'],
-                            fontSize=11,
-                            textColor=colors.HexColor('#718096'),  # Modern gray
-                            fontName='Helvetica-Oblique',
-                            leading=16
-                        )
-                        
-                        contact_style = ParagraphStyle(
-                            'ContactInfo',
-                            parent=styles['Normal'],
-                            fontSize=12,
-                            textColor=colors.HexColor('#4a5568'),
-                            fontName='Helvetica',
-                            alignment=1,  # Center alignment
-                            leading=18
-                        )
-                        
-                        # Additional styles for modern layout
-                        section_style = ParagraphStyle(
-                            'SectionStyle',
-                            parent=styles['Normal'],
-                            fontSize=11,
-                            textColor=colors.HexColor('#2d3748'),
-                            fontName='Helvetica',
-                            leading=16,
-                            leftIndent=10,
-                            spaceBefore=6,
-                            spaceAfter=6
-                        )
-                    else:  # creative
-                        # Creative template styles
-                        title_style = ParagraphStyle(
-                            'CustomTitle',
-                            parent=styles['Title'],
-                            fontSize=24,
-                            spaceAfter=20,
-                            alignment=1,
-                            fontName='Helvetica-Bold',
-                            textColor=colors.HexColor('#ff6b6b')
-                        )
-                        heading_style = ParagraphStyle(
-                            'CustomHeading',
-                            parent=styles['Heading2'],
-                            fontSize=16,
-                            spaceBefore=15,
-                            spaceAfter=10,
-                            textColor=colors.HexColor('#ff6b6b'),
-                            fontName='Helvetica-Bold'
-                        )
-                        normal_style = ParagraphStyle(
-                            'CustomNormal',
-                            parent=styles['Normal'],
-                            fontSize=10,
-                            textColor=colors.black,
-                            fontName='Helvetica'
-                        )
-                        italic_style = ParagraphStyle(
-                            'CustomItalic',
-                            parent=styles['Italic'],
-                            fontSize=10,
-                            textColor=colors.HexColor('#95a5a6'),
-                            fontName='Helvetica-Oblique'
-                        )
-                    
-                    # Build content with enhanced modern template layout
-                    elements = []
-                    
-                    if template == "modern":
-                        # Add some top margin
-                        elements.append(Spacer(1, 30))
-                        
-                        # Header with blue background simulation
-                        elements.append(Paragraph(resume_data["personal_info"]["name"], title_style))
-                        contact_info = f"{resume_data['personal_info']['email']} | {resume_data['personal_info']['phone']} | {resume_data['personal_info']['location']}"
-                        elements.append(Paragraph(contact_info, contact_style))
-                        elements.append(Spacer(1, 25))
-                        
-                        # Summary section with modern styling
-                        if resume_data["personal_info"]["summary"]:
-                            elements.append(Paragraph("Professional Summary", heading_style))
-                            elements.append(Paragraph(resume_data["personal_info"]["summary"], section_style))
-                            elements.append(Spacer(1, 15))
-                        
-                        # Education section with enhanced layout
-                        if resume_data["education"]:
-                            elements.append(Paragraph("Education", heading_style))
-                            for edu in resume_data["education"]:
-                                edu_table_data = [
-                                    [Paragraph(f"<b>{edu['institution']}</b>", section_style)],
-                                    [Paragraph(f"{edu['degree']}", section_style)],
-                                    [Paragraph(f"{edu['start_date']} - {edu['end_date']}", italic_style)]
-                                ]
-                                edu_table = Table(edu_table_data, colWidths=[450])
-                                edu_table.setStyle(TableStyle([
-                                    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                                    ('LEFTPADDING', (0, 0), (-1, -1), 10),
-                                    ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-                                    ('TOPPADDING', (0, 0), (-1, -1), 4),
-                                ]))
-                                elements.append(edu_table)
-                                elements.append(Spacer(1, 10))
-                        
-                        # Experience section with enhanced layout
-                        if resume_data["experience"]:
-                            elements.append(Paragraph("Work Experience", heading_style))
-                            for exp in resume_data["experience"]:
-                                exp_table_data = [
-                                    [Paragraph(f"<b>{exp['company']}</b>", section_style)],
-                                    [Paragraph(f"{exp['position']}", section_style)],
-                                    [Paragraph(f"{exp['start_date']} - {exp['end_date']}", italic_style)]
-                                ]
-                                if exp["description"]:
-                                    exp_table_data.append([Paragraph(exp["description"], section_style)])
-                                
-                                exp_table = Table(exp_table_data, colWidths=[450])
-                                exp_table.setStyle(TableStyle([
-                                    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                                    ('LEFTPADDING', (0, 0), (-1, -1), 10),
-                                    ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-                                    ('TOPPADDING', (0, 0), (-1, -1), 4),
-                                ]))
-                                elements.append(exp_table)
-                                elements.append(Spacer(1, 15))
-                        
-                        # Skills section with grid layout
-                        if resume_data["skills"]:
-                            elements.append(Paragraph("Skills", heading_style))
-                            skill_data = []
-                            row = []
-                            for i, skill in enumerate(resume_data["skills"], 1):
-                                skill_text = f'<para backColor="#ebf4ff" textColor="#2b6cb0">{skill}</para>'
-                                row.append(Paragraph(skill_text, section_style))
-                                if i % 3 == 0 or i == len(resume_data["skills"]):
-                                    while len(row) < 3:
-                                        row.append("")
-                                    skill_data.append(row)
-                                    row = []
-                            if row:
-                                while len(row) < 3:
-                                    row.append("")
-                                skill_data.append(row)
-                            
-                            if skill_data:
-                                skill_table = Table(skill_data, colWidths=[150] * 3, rowHeights=25)
-                                skill_table.setStyle(TableStyle([
-                                    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                                    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                                    ('LEFTPADDING', (0, 0), (-1, -1), 10),
-                                    ('RIGHTPADDING', (0, 0), (-1, -1), 10),
-                                    ('TOPPADDING', (0, 0), (-1, -1), 5),
-                                    ('BOTTOMPADDING', (0, 0), (-1, -1), 5),
-                                ]))
-                                elements.append(skill_table)
-                            elements.append(Spacer(1, 15))
-                        
-                        # Certifications section with enhanced layout
-                        if resume_data["certifications"]:
-                            elements.append(Paragraph("Certifications", heading_style))
-                            for cert in resume_data["certifications"]:
-                                cert_table_data = [
-                                    [Paragraph(f"<b>{cert['name']}</b>", section_style)],
-                                    [Paragraph(cert["date"], italic_style) if cert["date"] else ""]
-                                ]
-                                cert_table = Table(cert_table_data, colWidths=[450])
-                                cert_table.setStyle(TableStyle([
-                                    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                                    ('LEFTPADDING', (0, 0), (-1, -1), 10),
-                                    ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-                                    ('TOPPADDING', (0, 0), (-1, -1), 4),
-                                ]))
-                                elements.append(cert_table)
-                                elements.append(Spacer(1, 8))
-                    else:
-                        # Original content building for other templates
-                        elements.append(Paragraph(resume_data["personal_info"]["name"], title_style))
-                        contact_info = f"{resume_data['personal_info']['email']} | {resume_data['personal_info']['phone']} | {resume_data['personal_info']['location']}"
-                        elements.append(Paragraph(contact_info, normal_style))
-                        elements.append(Spacer(1, 20))
-                        
-                        # Summary section
-                        if resume_data["personal_info"]["summary"]:
-                            elements.append(Paragraph("Professional Summary", heading_style))
-                            elements.append(Paragraph(resume_data["personal_info"]["summary"], normal_style))
-                            elements.append(Spacer(1, 15))
-                        
-                        # Education section
-                        if resume_data["education"]:
-                            elements.append(Paragraph("Education", heading_style))
-                            for edu in resume_data["education"]:
-                                elements.append(Paragraph(f"<b>{edu['institution']}</b>", normal_style))
-                                elements.append(Paragraph(f"<b>{edu['degree']}</b>", normal_style))
-                                date_range = f"{edu['start_date']} - {edu['end_date']}"
-                                elements.append(Paragraph(date_range, italic_style))
-                                elements.append(Spacer(1, 10))
-                        
-                        # Experience section
-                        if resume_data["experience"]:
-                            elements.append(Paragraph("Work Experience", heading_style))
-                            for exp in resume_data["experience"]:
-                                elements.append(Paragraph(f"<b>{exp['company']}</b>", normal_style))
-                                elements.append(Paragraph(f"<b>{exp['position']}</b>", normal_style))
-                                date_range = f"{exp['start_date']} - {exp['end_date']}"
-                                elements.append(Paragraph(date_range, italic_style))
-                                if exp["description"]:
-                                    elements.append(Spacer(1, 5))
-                                    elements.append(Paragraph(exp["description"], normal_style))
-                                elements.append(Spacer(1, 10))
-                        
-                        # Skills section
-                        if resume_data["skills"]:
-                            elements.append(Paragraph("Skills", heading_style))
-                            skills_text = ", ".join(resume_data["skills"])
-                            elements.append(Paragraph(skills_text, normal_style))
-                            elements.append(Spacer(1, 15))
-                        
-                        # Certifications section
-                        if resume_data["certifications"]:
-                            elements.append(Paragraph("Certifications", heading_style))
-                            for cert in resume_data["certifications"]:
-                                elements.append(Paragraph(f"<b>{cert['name']}</b>", normal_style))
-                                if cert["date"]:
-                                    elements.append(Paragraph(cert["date"], italic_style))
-                                elements.append(Spacer(1, 8))
-                    
-                    # Build the PDF
-                    doc.build(elements)
-                    
-                    # Read PDF as base64
-                    with open(pdf_path, 'rb') as f:
-                        rendered_pdf = base64.b64encode(f.read()).decode('utf-8')
-                    
-                    # Save to download history - use USDH.db instead of courses.db
-                    conn = sqlite3.connect('data/USDH.db')
-                    cursor = conn.cursor()
-                    
-                    # Create table if it doesn't exist
-                    cursor.execute('''
-                        CREATE TABLE IF NOT EXISTS resume_downloads (
-                            id INTEGER PRIMARY KEY AUTOINCREMENT,
-                            user_id INTEGER,
-                            template TEXT,
-                            created_at TEXT,
-                            file_path TEXT
-                        )
-                    ''')
-                    
-                    cursor.execute('''
-                        INSERT INTO resume_downloads (user_id, template, created_at, file_path)
-                        VALUES (?, ?, ?, ?)
-                    ''', (user_id, template, datetime.now().strftime('%Y-%m-%d %H:%M:%S'), pdf_path))
-                    
-                    conn.commit()
-                    conn.close()
-                    
-                    pdf_success = True
-                    
-                except Exception as pdf_err:
-                    print(f"Error generating PDF with reportlab: {str(pdf_err)}")
-                    # PDF generation failed, we'll use HTML preview instead
-                
-                # Get updated download history
-                download_history = get_download_history(user_id)
+                # Build the PDF in the background; the poll callback picks it up
+                job_id = resume_jobs.submit(user_id, resume_data, template)
                 
-                # Prepare output
-                if pdf_success:
-                    # Show HTML preview with PDF download option
-                    with open(tmp_html_path, 'r') as f:
-                        html_content = f.read()
-                    
-                    return html.Div([
-                        html.Div("Resume generated successfully!", className="alert alert-success"),
-                        html.Div([
-                            dbc.Button(
-                                "Download PDF", 
-                                id="download-pdf-btn",
-                                color="primary",
-                                className="mb-3",
-                                href=f"data:application/pdf;base64,{rendered_pdf}"
-                            ),
-                        ]),
-                        html.Iframe(srcDoc=html_content, width="100%", height="800px", style={
-                            "border": "1px solid #ddd",
-                            "border-radius": "4px",
-                            "background": "white"
-                        }),
-                    ]), dcc.send_file(pdf_path), download_history
-                else:
-                    # Fallback to HTML preview
-                    with open(tmp_html_path, 'r') as f:
-                        html_content = f.read()
-                    
-                    return html.Div([
-                        html.Div([
-                            html.P("Unable to generate PDF due to missing reportlab dependency."),
-                            html.P([
-                                "To enable PDF generation, please install reportlab: ",
-                                html.A("pip install reportlab", href="https://pypi.org/project/reportlab/", target="_blank")
-                            ]),
-                            html.P("For now, you can view the HTML preview below:"),
-                        ], className="alert alert-warning"),
-                        html.Iframe(srcDoc=html_content, width="100%", height="800px", style={
-                            "border": "1px solid #ddd",
-                            "border-radius": "4px",
-                            "background": "white"
-                        }),
-                    ]), dash.no_update, download_history
+                return html.Div([
+                    html.Div("Resume generated successfully!", className="alert alert-success"),
+                    html.Iframe(srcDoc=rendered_html, width="100%", height="800px", style={
+                        "border": "1px solid #ddd",
+                        "border-radius": "4px",
+                        "background": "white"
+                    }),
+                ]), {"job_id": job_id}
                 
             except Exception as e:
                 print(f"Error rendering template: {str(e)}")
-                return html.Div(f"Error generating resume: {str(e)}", style={"color": "red"}), dash.no_update, dash.no_update
+                return html.Div(f"Error generating resume: {str(e)}", style={"color": "red"}), dash.no_update
             
         except Exception as e:
             print(f"Error processing resume data: {str(e)}")
-            return html.Div(f"Error generating resume: {str(e)}", style={"color": "red"}), dash.no_update, dash.no_update
+            return html.Div(f"Error generating resume: {str(e)}", style={"color": "red"}), dash.no_update
+
+    # Poll the background PDF job until it finishes
+    @app.callback(
+        [Output("resume-pdf-status", "children"),
+         Output("resume-job-poll", "disabled"),
+         Output("download-history", "children")],
+        [Input("resume-job", "data"),
+         Input("resume-job-poll", "n_intervals")],
+        prevent_initial_call=True
+    )
+    def poll_resume_job(job_data, n_intervals):
+        if not job_data or 'user_id' not in session:
+            raise PreventUpdate
+        
+        job = resume_jobs.get_job(job_data["job_id"], session['user_id'])
+        if job is None:
+            return html.Div("Resume job not found", className="alert alert-warning"), True, dash.no_update
+        
+        if job["status"] in ("queued", "running"):
+            return html.Div([
+                dbc.Spinner(size="sm", spinner_class_name="me-2"),
+                "Generating PDF..."
+            ], className="alert alert-info"), False, dash.no_update
+        
+        if job["status"] == "failed":
+            return html.Div([
+                html.P(f"Unable to generate PDF: {job['error']}"),
+                html.P("You can still view the HTML preview below."),
+            ], className="alert alert-warning"), True, dash.no_update
+        
+        return dbc.Button(
+            "Download PDF",
+            id="download-pdf-btn",
+            color="primary",
+            href=f"/resume-jobs/{job['id']}/download",
+            external_link=True
+        ), True, get_download_history(session['user_id'])
 
 def get_download_history(user_id):
     """Get user's resume download history"""
     try:
         # Connect to database
-        conn = sqlite3.connect('data/USDH.db')
+        conn = get_connection()
         cursor = conn.cursor()
         
-        # Create table if it doesn't exist
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS resume_downloads (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                template TEXT,
-                created_at TEXT,
-                file_path TEXT
-            )
-        ''')
-        
         # Get last 5 resumes
         cursor.execute('''
             SELECT id, template, created_at
@@ -0,0 +1,320 @@
+# The resume PDF builder, run by resume_jobs' worker processes. Workers
+# start from a fresh interpreter and load this module on its own, so it must
+# stay free of the app: no db, no dash, no login.
+
+
+def build_resume_pdf(resume_data, template, pdf_path):
+    """Build the resume PDF with reportlab; runs in a worker process"""
+    # Imported here so the app process, which only imports this module to
+    # name the function, never loads reportlab
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib import colors
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+
+    doc = SimpleDocTemplate(pdf_path, pagesize=letter)
+    styles = getSampleStyleSheet()
+
+    # Create custom styles based on selected template
+    if template == "professional":
+        # Professional template styles
+        title_style = ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Title'],
+            fontSize=24,
+            spaceAfter=20,
+            alignment=1,  # Center alignment
+            fontName='Helvetica-Bold'
+        )
+        heading_style = ParagraphStyle(
+            'CustomHeading',
+            parent=styles['Heading2'],
+            fontSize=14,
+            spaceBefore=15,
+            spaceAfter=10,
+            textColor=colors.black,
+            borderWidth=1,
+            borderPadding=5,
+            borderColor=colors.black,
+            fontName='Helvetica-Bold'
+        )
+        normal_style = ParagraphStyle(
+            'CustomNormal',
+            parent=styles['Normal'],
+            fontSize=10,
+            textColor=colors.black,
+            fontName='Helvetica'
+        )
+        italic_style = ParagraphStyle(
+            'CustomItalic',
+            parent=styles['Italic'],
+            fontSize=10,
+            textColor=colors.gray,
+            fontName='Helvetica-Oblique'
+        )
+    elif template == "modern":
+        # Modern template styles with enhanced visual elements
+        title_style = ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Title'],
+            fontSize=28,
+            spaceAfter=25,
+            alignment=1,
+            fontName='Helvetica-Bold',
+            textColor=colors.HexColor('#2b6cb0'),  # Matching the preview blue
+            leading=35
+        )
+
+        heading_style = ParagraphStyle(
+            'CustomHeading',
+            parent=styles['Heading2'],
+            fontSize=16,
+            spaceBefore=20,
+            spaceAfter=12,
+            textColor=colors.HexColor('#2b6cb0'),
+            leftIndent=0,
+            fontName='Helvetica-Bold',
+            leading=20,
+            borderWidth=0,
+            borderPadding=0
+        )
+
+        normal_style = ParagraphStyle(
+            'CustomNormal',
+            parent=styles['Normal'],
+            fontSize=11,
+            textColor=colors.HexColor('#2d3748'),  # Darker gray for better readability
+            fontName='Helvetica',
+            leading=16,
+            spaceBefore=4
+        )
+
+        italic_style = ParagraphStyle(
+            'CustomItalic',
+            parent=styles['Italic'],
+            fontSize=11,
+            textColor=colors.HexColor('#718096'),  # Modern gray
+            fontName='Helvetica-Oblique',
+            leading=16
+        )
+
+        contact_style = ParagraphStyle(
+            'ContactInfo',
+            parent=styles['Normal'],
+            fontSize=12,
+            textColor=colors.HexColor('#4a5568'),
+            fontName='Helvetica',
+            alignment=1,  # Center alignment
+            leading=18
+        )
+
+        # Additional styles for modern layout
+        section_style = ParagraphStyle(
+            'SectionStyle',
+            parent=styles['Normal'],
+            fontSize=11,
+            textColor=colors.HexColor('#2d3748'),
+            fontName='Helvetica',
+            leading=16,
+            leftIndent=10,
+            spaceBefore=6,
+            spaceAfter=6
+        )
+    else:  # creative
+        # Creative template styles
+        title_style = ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Title'],
+            fontSize=24,
+            spaceAfter=20,
+            alignment=1,
+            fontName='Helvetica-Bold',
+            textColor=colors.HexColor('#ff6b6b')
+        )
+        heading_style = ParagraphStyle(
+            'CustomHeading',
+            parent=styles['Heading2'],
+            fontSize=16,
+            spaceBefore=15,
+            spaceAfter=10,
+            textColor=colors.HexColor('#ff6b6b'),
+            fontName='Helvetica-Bold'
+        )
+        normal_style = ParagraphStyle(
+            'CustomNormal',
+            parent=styles['Normal'],
+            fontSize=10,
+            textColor=colors.black,
+            fontName='Helvetica'
+        )
+        italic_style = ParagraphStyle(
+            'CustomItalic',
+            parent=styles['Italic'],
+            fontSize=10,
+            textColor=colors.HexColor('#95a5a6'),
+            fontName='Helvetica-Oblique'
+        )
+
+    # Build content with enhanced modern template layout
+    elements = []
+
+    if template == "modern":
+        # Add some top margin
+        elements.append(Spacer(1, 30))
+
+        # Header with blue background simulation
+        elements.append(Paragraph(resume_data["personal_info"]["name"], title_style))
+        contact_info = f"{resume_data['personal_info']['email']} | {resume_data['personal_info']['phone']} | {resume_data['personal_info']['location']}"
+        elements.append(Paragraph(contact_info, contact_style))
+        elements.append(Spacer(1, 25))
+
+        # Summary section with modern styling
+        if resume_data["personal_info"]["summary"]:
+            elements.append(Paragraph("Professional Summary", heading_style))
+            elements.append(Paragraph(resume_data["personal_info"]["summary"], section_style))
+            elements.append(Spacer(1, 15))
+
+        # Education section with enhanced layout
+        if resume_data["education"]:
+            elements.append(Paragraph("Education", heading_style))
+            for edu in resume_data["education"]:
+                edu_table_data = [
+                    [Paragraph(f"<b>{edu['institution']}</b>", section_style)],
+                    [Paragraph(f"{edu['degree']}", section_style)],
+                    [Paragraph(f"{edu['start_date']} - {edu['end_date']}", italic_style)]
+                ]
+                edu_table = Table(edu_table_data, colWidths=[450])
+                edu_table.setStyle(TableStyle([
+                    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+                    ('LEFTPADDING', (0, 0), (-1, -1), 10),
+                    ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
+                    ('TOPPADDING', (0, 0), (-1, -1), 4),
+                ]))
+                elements.append(edu_table)
+                elements.append(Spacer(1, 10))
+
+        # Experience section with enhanced layout
+        if resume_data["experience"]:
+            elements.append(Paragraph("Work Experience", heading_style))
+            for exp in resume_data["experience"]:
+                exp_table_data = [
+                    [Paragraph(f"<b>{exp['company']}</b>", section_style)],
+                    [Paragraph(f"{exp['position']}", section_style)],
+                    [Paragraph(f"{exp['start_date']} - {exp['end_date']}", italic_style)]
+                ]
+                if exp["description"]:
+                    exp_table_data.append([Paragraph(exp["description"], section_style)])
+
+                exp_table = Table(exp_table_data, colWidths=[450])
+                exp_table.setStyle(TableStyle([
+                    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+                    ('LEFTPADDING', (0, 0), (-1, -1), 10),
+                    ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
+                    ('TOPPADDING', (0, 0), (-1, -1), 4),
+                ]))
+                elements.append(exp_table)
+                elements.append(Spacer(1, 15))
+
+        # Skills section with grid layout
+        if resume_data["skills"]:
+            elements.append(Paragraph("Skills", heading_style))
+            skill_data = []
+            row = []
+            for i, skill in enumerate(resume_data["skills"], 1):
+                skill_text = f'<para backColor="#ebf4ff" textColor="#2b6cb0">{skill}</para>'
+                row.append(Paragraph(skill_text, section_style))
+                if i % 3 == 0 or i == len(resume_data["skills"]):
+                    while len(row) < 3:
+                        row.append("")
+                    skill_data.append(row)
+                    row = []
+            if row:
+                while len(row) < 3:
+                    row.append("")
+                skill_data.append(row)
+
+            if skill_data:
+                skill_table = Table(skill_data, colWidths=[150] * 3, rowHeights=25)
+                skill_table.setStyle(TableStyle([
+                    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+                    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+                    ('LEFTPADDING', (0, 0), (-1, -1), 10),
+                    ('RIGHTPADDING', (0, 0), (-1, -1), 10),
+                    ('TOPPADDING', (0, 0), (-1, -1), 5),
+                    ('BOTTOMPADDING', (0, 0), (-1, -1), 5),
+                ]))
+                elements.append(skill_table)
+            elements.append(Spacer(1, 15))
+
+        # Certifications section with enhanced layout
+        if resume_data["certifications"]:
+            elements.append(Paragraph("Certifications", heading_style))
+            for cert in resume_data["certifications"]:
+                cert_table_data = [
+                    [Paragraph(f"<b>{cert['name']}</b>", section_style)],
+                    [Paragraph(cert["date"], italic_style) if cert["date"] else ""]
+                ]
+                cert_table = Table(cert_table_data, colWidths=[450])
+                cert_table.setStyle(TableStyle([
+                    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+                    ('LEFTPADDING', (0, 0), (-1, -1), 10),
+                    ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
+                    ('TOPPADDING', (0, 0), (-1, -1), 4),
+                ]))
+                elements.append(cert_table)
+                elements.append(Spacer(1, 8))
+    else:
+        # Original content building for other templates
+        elements.append(Paragraph(resume_data["personal_info"]["name"], title_style))
+        contact_info = f"{resume_data['personal_info']['email']} | {resume_data['personal_info']['phone']} | {resume_data['personal_info']['location']}"
+        elements.append(Paragraph(contact_info, normal_style))
+        elements.append(Spacer(1, 20))
+
+        # Summary section
+        if resume_data["personal_info"]["summary"]:
+            elements.append(Paragraph("Professional Summary", heading_style))
+            elements.append(Paragraph(resume_data["personal_info"]["summary"], normal_style))
+            elements.append(Spacer(1, 15))
+
+        # Education section
+        if resume_data["education"]:
+            elements.append(Paragraph("Education", heading_style))
+            for edu in resume_data["education"]:
+                elements.append(Paragraph(f"<b>{edu['institution']}</b>", normal_style))
+                elements.append(Paragraph(f"<b>{edu['degree']}</b>", normal_style))
+                date_range = f"{edu['start_date']} - {edu['end_date']}"
+                elements.append(Paragraph(date_range, italic_style))
+                elements.append(Spacer(1, 10))
+
+        # Experience section
+        if resume_data["experience"]:
+            elements.append(Paragraph("Work Experience", heading_style))
+            for exp in resume_data["experience"]:
+                elements.append(Paragraph(f"<b>{exp['company']}</b>", normal_style))
+                elements.append(Paragraph(f"<b>{exp['position']}</b>", normal_style))
+                date_range = f"{exp['start_date']} - {exp['end_date']}"
+                elements.append(Paragraph(date_range, italic_style))
+                if exp["description"]:
+                    elements.append(Spacer(1, 5))
+                    elements.append(Paragraph(exp["description"], normal_style))
+                elements.append(Spacer(1, 10))
+
+        # Skills section
+        if resume_data["skills"]:
+            elements.append(Paragraph("Skills", heading_style))
+            skills_text = ", ".join(resume_data["skills"])
+            elements.append(Paragraph(skills_text, normal_style))
+            elements.append(Spacer(1, 15))
+
+        # Certifications section
+        if resume_data["certifications"]:
+            elements.append(Paragraph("Certifications", heading_style))
+            for cert in resume_data["certifications"]:
+                elements.append(Paragraph(f"<b>{cert['name']}</b>", normal_style))
+                if cert["date"]:
+                    elements.append(Paragraph(cert["date"], italic_style))
+                elements.append(Spacer(1, 8))
+
+    # Build the PDF
+    doc.build(elements)
+    return pdf_path
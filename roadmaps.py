@@ -0,0 +1,291 @@
+import io
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import catalog
+
+# Rendered roadmaps are cached on disk here and in memory per process.
+# Bump RENDER_VERSION whenever the drawing code changes.
+ROADMAP_DIR = 'static/roadmaps'
+RENDER_VERSION = 1
+RENDER_WORKERS = 2
+
+SCHOOL_TEMPLATE = "School"
+DEFAULT_TEMPLATE = "Computer Science"
+
+# Stage templates; every course maps to exactly one of these
+STAGE_TEMPLATES = {
+    "School": [
+        ("Foundation (Grades 1-5)", [
+            "Basic Concepts",
+            "Fundamental Skills",
+            "Core Topics",
+            "Basic Applications"
+        ]),
+        ("Intermediate (Grades 6-8)", [
+            "Advanced Topics",
+            "Problem Solving",
+            "Practical Applications",
+            "Critical Thinking"
+        ]),
+        ("Advanced (Grades 9-10)", [
+            "Complex Concepts",
+            "Advanced Applications",
+            "Project Work",
+            "Research Skills"
+        ]),
+        ("Senior Level (Grades 11-12)", [
+            "Specialized Topics",
+            "Advanced Problem Solving",
+            "Research Projects",
+            "Exam Preparation"
+        ]),
+        ("Mastery", [
+            "Comprehensive Review",
+            "Practice Tests",
+            "Performance Analysis",
+            "Career Guidance"
+        ])
+    ],
+    "Computer Science": [
+        ("Fundamentals", ["Programming Basics", "Data Structures", "Algorithms"]),
+        ("Core Concepts", ["OOP", "Database", "Networking"]),
+        ("Advanced Topics", ["Web Dev", "AI/ML", "Cloud Computing"]),
+        ("Specialization", ["Full Stack", "Data Science", "Cybersecurity"]),
+        ("Career Ready", ["Projects", "Internships", "Industry Skills"])
+    ],
+    "Data Science": [
+        ("Foundation", ["Statistics", "Programming", "Math"]),
+        ("Tools & Tech", ["Python", "SQL", "Data Viz"]),
+        ("Core Skills", ["Data Analysis", "ML Basics", "Big Data"]),
+        ("Advanced", ["Deep Learning", "NLP", "Computer Vision"]),
+        ("Expertise", ["Projects", "Kaggle", "Research"])
+    ],
+    "Digital Marketing": [
+        ("Basics", ["Marketing 101", "Digital Foundations", "Analytics"]),
+        ("Channels", ["Social Media", "Email", "SEO"]),
+        ("Strategy", ["Content Marketing", "PPC", "Brand Building"]),
+        ("Advanced", ["Marketing Tech", "Automation", "CRM"]),
+        ("Professional", ["Campaigns", "Portfolio", "Certification"])
+    ]
+}
+
+# Catalog table and name column holding each course type's courses
+COURSE_COLUMNS = {
+    "School": ("courses2", "subjects"),
+    "UG/PG": ("courses", "course_name_"),
+}
+
+_cache = {}         # template -> SVG bytes
+_pending = {}       # template -> Future for a render in progress
+_course_templates = {}  # course type -> (catalog DataFrame, course name -> template)
+_lock = threading.Lock()
+_executor = ThreadPoolExecutor(max_workers=RENDER_WORKERS, thread_name_prefix="roadmap")
+
+
+def get_template(course_type, course_name):
+    """Pick the stage template for a course"""
+    if course_type == "School":
+        return SCHOOL_TEMPLATE
+    name = course_name.lower()
+    if "data" in name or "analytics" in name:
+        return "Data Science"
+    if "marketing" in name or "business" in name:
+        return "Digital Marketing"
+    return DEFAULT_TEMPLATE
+
+
+def _templates_for(course_type):
+    """Course name -> template for every course of a type in the catalog
+
+    Built once per catalog load: a reload hands back a new DataFrame, which
+    is what triggers the rebuild.
+    """
+    course_type = "School" if course_type == "School" else "UG/PG"
+    table, column = COURSE_COLUMNS[course_type]
+    df = catalog.get_table(table)
+    entry = _course_templates.get(course_type)
+    if entry is None or entry[0] is not df:
+        entry = (df, {name: get_template(course_type, name) for name in df[column].dropna().unique()})
+        _course_templates[course_type] = entry
+    return entry[1]
+
+
+def template_slug(template):
+    return template.lower().replace(' ', '-')
+
+
+def _template_from_slug(slug):
+    for template in STAGE_TEMPLATES:
+        if template_slug(template) == slug:
+            return template
+    return None
+
+
+def _disk_path(template):
+    return os.path.join(ROADMAP_DIR, f"{template_slug(template)}-v{RENDER_VERSION}.svg")
+
+
+def render_roadmap(template):
+    """Draw the roadmap for a stage template and return it as SVG bytes"""
+    # matplotlib is only loaded once a roadmap actually has to be drawn; most
+    # starts find every image cached on disk
+    from matplotlib.figure import Figure
+    from matplotlib.patches import Circle, Rectangle
+
+    stages = STAGE_TEMPLATES[template]
+    num_stages = len(stages)
+    y_positions = np.linspace(0, 10, num_stages)
+
+    # Figure() rather than pyplot keeps renders independent across threads
+    fig = Figure(figsize=(12, 8))
+    ax = fig.subplots()
+    fig.patch.set_facecolor('#1a1a1a')
+    ax.set_facecolor('#1a1a1a')
+
+    # Define colors
+    primary_color = '#3498db'  # Blue
+    secondary_color = '#2ecc71'  # Green
+    accent_color = '#e74c3c'  # Red
+    text_color = '#ecf0f1'  # Light gray
+
+    # Add gradient background
+    gradient = np.linspace(0, 1, 100).reshape(10, 10)
+    ax.imshow(gradient, extent=[-2, 4, -1, 11], aspect='auto', cmap='Blues', alpha=0.1)
+
+    # Plot stages
+    for idx, (stage, topics) in enumerate(stages):
+        # Main stage node with glow effect
+        ax.scatter(0, y_positions[idx], s=400, c=primary_color, zorder=5, alpha=0.8)
+        ax.scatter(0, y_positions[idx], s=300, c=primary_color, zorder=6)
+
+        ax.text(0.5, y_positions[idx], stage, fontsize=14, color=text_color,
+                verticalalignment='center', fontweight='bold',
+                bbox=dict(facecolor='#2c3e50', alpha=0.7, edgecolor='none', pad=5),
+                zorder=7)
+
+        # Topics for each stage
+        for i, topic in enumerate(topics):
+            topic_x = 2
+            topic_y = y_positions[idx] + (i - len(topics)/2 + 0.5) * 0.4
+
+            ax.scatter(topic_x, topic_y, s=250, c=secondary_color, alpha=0.8, zorder=5)
+            ax.scatter(topic_x, topic_y, s=200, c=secondary_color, zorder=6)
+
+            ax.text(topic_x + 0.5, topic_y, topic, fontsize=11, color=text_color,
+                    verticalalignment='center',
+                    bbox=dict(facecolor='#34495e', alpha=0.7, edgecolor='none', pad=3),
+                    zorder=7)
+
+            # Connect topic to stage
+            ax.plot([0.3, topic_x-0.2], [y_positions[idx], topic_y],
+                    c=primary_color, alpha=0.4, linestyle='--', linewidth=2)
+
+    # Connect main stages
+    for i in range(num_stages-1):
+        ax.plot([0, 0], [y_positions[i], y_positions[i+1]],
+                c=primary_color, linewidth=3, alpha=0.6)
+
+    ax.grid(True, linestyle='--', alpha=0.1, color=text_color)
+
+    # Add decorative circles in the background
+    for i in range(num_stages):
+        ax.add_artist(Circle((0, y_positions[i]), 0.5, color=primary_color, alpha=0.1))
+
+    ax.set_title(f'{template} Learning Roadmap',
+                 color=text_color, pad=20, fontsize=16, fontweight='bold',
+                 bbox=dict(facecolor='#2c3e50', alpha=0.7, edgecolor='none', pad=10))
+
+    # Remove axes
+    ax.set_xticks([])
+    ax.set_yticks([])
+    for spine in ax.spines.values():
+        spine.set_visible(False)
+
+    # Add a subtle border
+    ax.add_patch(Rectangle((-2, -1), 6, 12, fill=False, color=primary_color, alpha=0.3, linewidth=2))
+
+    # Decorative dots; seeded so the cached image is reproducible
+    rng = np.random.default_rng(sum(map(ord, template)))
+    for i in range(3):
+        ax.scatter(rng.uniform(-1.5, 3.5), rng.uniform(0, 9), s=rng.uniform(50, 150),
+                   c=accent_color, alpha=0.1, zorder=0)
+
+    buf = io.BytesIO()
+    fig.savefig(buf, format='svg', bbox_inches='tight', facecolor=fig.get_facecolor())
+    return buf.getvalue()
+
+
+def _load_or_render(template):
+    """Read the roadmap from disk, rendering and saving it on a miss"""
+    path = _disk_path(template)
+    try:
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            data = render_roadmap(template)
+            os.makedirs(ROADMAP_DIR, exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+
+        with _lock:
+            _cache[template] = data
+        return data
+    finally:
+        with _lock:
+            _pending.pop(template, None)
+
+
+def _submit(template):
+    """Queue a render for a template unless it is cached or already queued"""
+    with _lock:
+        if template in _cache:
+            return None
+        future = _pending.get(template)
+        if future is None:
+            future = _executor.submit(_load_or_render, template)
+            _pending[template] = future
+        return future
+
+
+def get_roadmap_svg(slug):
+    """SVG bytes for a template slug, waiting for the worker if needed"""
+    template = _template_from_slug(slug)
+    if template is None:
+        return None
+    data = _cache.get(template)
+    if data is not None:
+        return data
+    future = _submit(template)
+    try:
+        return future.result() if future else _cache.get(template)
+    except Exception as e:
+        print(f"Error rendering roadmap {template}: {e}")
+        return None
+
+
+def get_roadmap_url(course_type, course_name):
+    """URL of the roadmap image for a course, or None for an unknown course
+
+    Never renders inline: a missing image is queued on the worker pool and
+    the image route waits for it.
+    """
+    template = _templates_for(course_type).get(course_name)
+    if template is None:
+        return None
+    _submit(template)
+    return f"/roadmaps/{template_slug(template)}.svg?v={RENDER_VERSION}"
+
+
+def prewarm():
+    """Render, in the background, every template used by the catalog"""
+    try:
+        templates = set(_templates_for("UG/PG").values()) | set(_templates_for("School").values())
+        for template in templates:
+            _submit(template)
+    except Exception as e:
+        print(f"Error pre-warming roadmaps: {e}")
@@ -0,0 +1,339 @@
+import re
+from db import get_connection
+import catalog
+import search
+import blobs
+import space_manifest
+import stats
+
+# The base tables, created by migration 1. Request handlers never run DDL:
+# migrate() brings the database up to date once, at startup. Tables added
+# later are defined further down next to the step that creates them, so
+# migration 1 keeps creating exactly what it did when it was released.
+TABLES = {
+    'users': '''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            email TEXT UNIQUE NOT NULL,
+            password TEXT NOT NULL,
+            role TEXT NOT NULL
+        )''',
+    'resumes': '''
+        CREATE TABLE IF NOT EXISTS resumes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            name TEXT,
+            data TEXT,
+            created_at TEXT,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )''',
+    'resume_downloads': '''
+        CREATE TABLE IF NOT EXISTS resume_downloads (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            template TEXT,
+            created_at TEXT,
+            file_path TEXT
+        )''',
+    'blobs': '''
+        CREATE TABLE IF NOT EXISTS blobs (
+            hash TEXT PRIMARY KEY,
+            size INTEGER NOT NULL,
+            ref_count INTEGER NOT NULL DEFAULT 0,
+            created_at TEXT
+        )''',
+    'documents': '''
+        CREATE TABLE IF NOT EXISTS documents (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            name TEXT,
+            category TEXT,
+            description TEXT,
+            file_path TEXT,
+            blob_hash TEXT,
+            upload_date TEXT,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )''',
+    'study_materials': '''
+        CREATE TABLE IF NOT EXISTS study_materials (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            name TEXT,
+            subject TEXT,
+            type TEXT,
+            description TEXT,
+            file_path TEXT,
+            blob_hash TEXT,
+            upload_date TEXT,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )''',
+    'certificates': '''
+        CREATE TABLE IF NOT EXISTS certificates (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            name TEXT,
+            organization TEXT,
+            issue_date TEXT,
+            file_path TEXT,
+            blob_hash TEXT,
+            upload_date TEXT,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )''',
+    'folders': '''
+        CREATE TABLE IF NOT EXISTS folders (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            name TEXT,
+            description TEXT,
+            folder_path TEXT,
+            upload_date TEXT,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )''',
+    'folder_files': '''
+        CREATE TABLE IF NOT EXISTS folder_files (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            folder_id INTEGER,
+            user_id INTEGER,
+            file_path TEXT,
+            blob_hash TEXT,
+            upload_date TEXT,
+            FOREIGN KEY (folder_id) REFERENCES folders (id)
+        )''',
+    'study_plans': '''
+        CREATE TABLE IF NOT EXISTS study_plans (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            subject TEXT,
+            topics TEXT,
+            duration INTEGER,
+            hours_per_day INTEGER,
+            preferences TEXT,
+            notes TEXT,
+            created_date TEXT,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )''',
+    'course_progress': '''
+        CREATE TABLE IF NOT EXISTS course_progress (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            course_id INTEGER NOT NULL,
+            status TEXT NOT NULL,  -- 'ongoing' or 'completed'
+            start_date TEXT,
+            completion_date TEXT,
+            FOREIGN KEY (user_id) REFERENCES users (id),
+            UNIQUE(user_id, course_id)
+        )''',
+}
+
+# Columns added after a table was first created; older databases get them
+# through ALTER TABLE
+ADDED_COLUMNS = {
+    'documents': (('category', 'TEXT'), ('blob_hash', 'TEXT')),
+    'study_materials': (('subject', 'TEXT'), ('type', 'TEXT'), ('blob_hash', 'TEXT')),
+    'certificates': (('blob_hash', 'TEXT'),),
+    'folder_files': (('blob_hash', 'TEXT'),),
+}
+
+# Per-user lookups. Tables with a UNIQUE(user_id, ...) constraint already
+# have an index that starts with user_id.
+USER_ID_INDEXES = {
+    'idx_resumes_user_id': 'resumes (user_id)',
+    'idx_resume_downloads_user_id': 'resume_downloads (user_id)',
+    'idx_documents_user_id': 'documents (user_id)',
+    'idx_study_materials_user_id': 'study_materials (user_id)',
+    'idx_certificates_user_id': 'certificates (user_id)',
+    'idx_folders_user_id': 'folders (user_id)',
+    'idx_folder_files_folder_id': 'folder_files (folder_id)',
+    'idx_folder_files_user_id': 'folder_files (user_id)',
+    'idx_study_plans_user_id': 'study_plans (user_id)',
+}
+
+# Per-user pages list rows newest first: WHERE user_id = ? ORDER BY <date> DESC.
+# A (user_id, date) index serves both the filter and the order, and makes
+# the plain user_id indexes redundant.
+USER_DATE_INDEXES = {
+    'idx_certificates_user_date': 'certificates (user_id, upload_date)',
+    'idx_documents_user_date': 'documents (user_id, upload_date)',
+    'idx_study_materials_user_date': 'study_materials (user_id, upload_date)',
+    'idx_folders_user_date': 'folders (user_id, upload_date)',
+    'idx_study_plans_user_date': 'study_plans (user_id, created_date)',
+    'idx_resume_downloads_user_date': 'resume_downloads (user_id, created_at)',
+    'idx_resumes_user_date': 'resumes (user_id, created_at)',
+    # Only in databases from before the schema module
+    'idx_course_status_user_date': 'course_status (user_id, added_date)',
+}
+
+# Catalog columns the admin tables filter and sort on. Text comparisons
+# there are case-insensitive (table_query.py), so the indexes are NOCASE.
+CATALOG_INDEX_COLUMNS = {
+    'courses': ('course_name_', 'dispcipline', 'website_name', '_ug/pg'),
+    'courses2': ('subjects', 'grade', 'website_name'),
+    'ebooks': ('website', 'preference', 'subject', 'states'),
+    'schemes': ('name',),
+    'live': ('grade',),
+}
+
+
+def _columns(cursor, table):
+    cursor.execute(f"PRAGMA table_info({table})")
+    return {row[1] for row in cursor.fetchall()}
+
+
+def _run(statements):
+    """Run a schema step's statements in one transaction"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        statements(cursor)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def create_tables():
+    def statements(cursor):
+        for ddl in TABLES.values():
+            cursor.execute(ddl)
+        for table, columns in ADDED_COLUMNS.items():
+            existing = _columns(cursor, table)
+            for name, col_type in columns:
+                if name not in existing:
+                    cursor.execute(f"ALTER TABLE {table} ADD COLUMN {name} {col_type}")
+    _run(statements)
+
+
+# Migration 9: cleaned text of external course pages (page_fetcher.py)
+PAGE_CACHE_TABLE = '''
+    CREATE TABLE IF NOT EXISTS page_cache (
+        url TEXT PRIMARY KEY,
+        content TEXT,
+        etag TEXT,
+        last_modified TEXT,
+        fetched_at REAL NOT NULL,
+        error TEXT
+    )'''
+
+# Migration 10: per-table catalog versions for the in-memory caches (catalog.py)
+CATALOG_VERSIONS_TABLE = '''
+    CREATE TABLE IF NOT EXISTS catalog_versions (
+        table_name TEXT PRIMARY KEY,
+        version INTEGER NOT NULL DEFAULT 0
+    )'''
+
+
+# Migration 13: background resume PDF builds (resume_jobs.py)
+RESUME_JOBS_TABLE = '''
+    CREATE TABLE IF NOT EXISTS resume_jobs (
+        id TEXT PRIMARY KEY,
+        user_id INTEGER NOT NULL,
+        template TEXT,
+        pdf_path TEXT NOT NULL,
+        status TEXT NOT NULL,  -- 'queued', 'done' or 'failed'
+        error TEXT,
+        download_id INTEGER,
+        created_at REAL NOT NULL,
+        finished_at REAL,
+        FOREIGN KEY (user_id) REFERENCES users (id)
+    )'''
+
+
+def create_page_cache():
+    def statements(cursor):
+        cursor.execute(PAGE_CACHE_TABLE)
+    _run(statements)
+
+
+def create_catalog_versions():
+    def statements(cursor):
+        cursor.execute(CATALOG_VERSIONS_TABLE)
+    _run(statements)
+
+
+def create_resume_jobs():
+    def statements(cursor):
+        cursor.execute(RESUME_JOBS_TABLE)
+        # submit() deletes jobs by age
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_resume_jobs_created ON resume_jobs (created_at)")
+    _run(statements)
+
+
+def create_user_id_indexes():
+    def statements(cursor):
+        for name, target in USER_ID_INDEXES.items():
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {target}")
+    _run(statements)
+
+
+def create_user_date_indexes():
+    def statements(cursor):
+        for name, target in USER_DATE_INDEXES.items():
+            table = target.split()[0]
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,))
+            if cursor.fetchone() is None:
+                continue
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {target}")
+            cursor.execute(f"DROP INDEX IF EXISTS idx_{table}_user_id")
+        # blobs.collect() looks for unreferenced blobs, which are always few
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_blobs_unreferenced ON blobs (hash) WHERE ref_count <= 0")
+    _run(statements)
+
+
+def create_catalog_indexes():
+    def statements(cursor):
+        for table, columns in CATALOG_INDEX_COLUMNS.items():
+            existing = _columns(cursor, f'"{table}"')
+            for column in columns:
+                if column not in existing:
+                    continue
+                name = "idx_{}_{}_nocase".format(table, re.sub(r'\W', '', column).strip('_'))
+                cursor.execute(f'CREATE INDEX IF NOT EXISTS {name} ON "{table}" ("{column}" COLLATE NOCASE)')
+    _run(statements)
+
+
+# (version, description, step). Append new steps; never reorder or edit
+# released ones. Each step is idempotent and commits its own work, and the
+# version is recorded only after it succeeds, so an interrupted step simply
+# runs again on the next start.
+MIGRATIONS = [
+    (1, "base tables", create_tables),
+    (2, "catalog primary keys", catalog.ensure_primary_keys),
+    (3, "full-text search index", search.init_search_index),
+    (4, "blob store", blobs.init_blobs),
+    (5, "My Space manifest", space_manifest.init_space_manifest),
+    (6, "table statistics", stats.init_stats),
+    (7, "user_id indexes", create_user_id_indexes),
+    (8, "user_id and date indexes", create_user_date_indexes),
+    (9, "course page cache", create_page_cache),
+    (10, "catalog versions", create_catalog_versions),
+    (11, "catalog row versions", catalog.add_row_versions),
+    (12, "catalog filter indexes", create_catalog_indexes),
+    (13, "resume jobs", create_resume_jobs),
+    (14, "distinct value counts", stats.add_distinct_counts),
+]
+
+
+def get_version():
+    """Schema version of the database (PRAGMA user_version)"""
+    conn = get_connection()
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    conn.close()
+    return version
+
+
+def _set_version(version):
+    conn = get_connection()
+    conn.execute(f"PRAGMA user_version = {int(version)}")
+    conn.close()
+
+
+def migrate():
+    """Apply every migration newer than the database's schema version"""
+    current = get_version()
+    for version, description, step in MIGRATIONS:
+        if version <= current:
+            continue
+        print(f"Applying schema migration {version}: {description}")
+        step()
+        _set_version(version)
+    return max(current, MIGRATIONS[-1][0])
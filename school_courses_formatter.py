@@ -1,53 +1,66 @@
 import dash_bootstrap_components as dbc
 from dash import html
+from functools import lru_cache
+from search import render_snippet
+from formatter_utils import CARD_CACHE_SIZE, iter_rows
 
-def format_courses2_table(df):
-    """Format courses as individual cards similar to e-books layout"""
-    cards = []
-    for i, row in df.iterrows():
-        # Create individual card for each course
-        card = html.Div([
-            # Card with green accent line
+COURSES2_CARD_COLUMNS = ('subjects', 'grade', 'video_link', 'search_snippet')
+
+@lru_cache(maxsize=CARD_CACHE_SIZE)
+def build_courses2_card(i, subjects, grade, video_link, search_snippet):
+    """Build the grid column for one school course"""
+    # Create individual card for each course
+    card = html.Div([
+        # Card with green accent line
+        html.Div([
+            # Title section
+            html.H4(subjects, className="mb-4"),
+            # Highlighted match when the list comes from a search
+            html.P(render_snippet(search_snippet), className="search-snippet small text-muted")
+            if search_snippet else None,
+            
+            # Course details
             html.Div([
-                # Title section
-                html.H4(row['subjects'], className="mb-4"),
-                
-                # Course details
-                html.Div([
-                    html.Strong("Subject: "),
-                    html.Span(f"{row['subjects']}")
-                ], className="mb-2"),
-                
-                html.Div([
-                    html.Strong("Grade: "),
-                    html.Span(f"Grade {row['grade']}")
-                ], className="mb-2"),
-                
-                html.Div([
-                    html.Strong("Preference: "),
-                    html.Span("School")
-                ], className="mb-3"),
-                
-                # Only View Resource button
-                html.Div([
-                    dbc.Button(
-                        "View Resource",
-                        href=row['video_link'],
-                        target="_blank",
-                        className="view-resource-btn"
-                    )
-                ], className="d-flex justify-content-start align-items-center")
-            ], className="card-inner-content")
-        ], className="e-book-card")
-        
-        # Wrap card in column for grid layout
-        cards.append(dbc.Col(card, xl=4, lg=4, md=6, sm=12, className="mb-4"))
+                html.Strong("Subject: "),
+                html.Span(f"{subjects}")
+            ], className="mb-2"),
+            
+            html.Div([
+                html.Strong("Grade: "),
+                html.Span(f"Grade {grade}")
+            ], className="mb-2"),
+            
+            html.Div([
+                html.Strong("Preference: "),
+                html.Span("School")
+            ], className="mb-3"),
+            
+            # Only View Resource button
+            html.Div([
+                dbc.Button(
+                    "View Resource",
+                    href=video_link,
+                    target="_blank",
+                    className="view-resource-btn"
+                )
+            ], className="d-flex justify-content-start align-items-center")
+        ], className="card-inner-content")
+    ], className="e-book-card")
     
+    # Wrap card in column for grid layout
+    return dbc.Col(card, xl=4, lg=4, md=6, sm=12, className="mb-4")
+
+def build_courses2_cards(df):
+    """Build the grid columns for a page of school courses"""
+    return [build_courses2_card(*row) for row in iter_rows(df, COURSES2_CARD_COLUMNS)]
+
+def format_courses2_table(df, total=None):
+    """Format courses as individual cards similar to e-books layout"""
     return html.Div([
         # Section header
         html.H3("School Courses (Grades 1-12)", className="section-title"),
-        html.P(f"Showing {len(df)} educational resources", className="resources-count"),
+        html.P(f"Found {total if total is not None else len(df)} educational resources", className="resources-count"),
         
         # Cards grid
-        dbc.Row(cards, className="g-4 mt-2")
+        dbc.Row(build_courses2_cards(df), id="results-grid", className="g-4 mt-2")
     ], className="e-books-section")
@@ -0,0 +1,144 @@
+import re
+from dash import html
+from db import get_connection
+
+# Columns indexed for full-text search, in bm25 weight order
+FTS_COLUMNS = {
+    'courses': ('course_name_', 'dispcipline', 'website_name', 'description'),
+    'courses2': ('subjects', 'grade', 'website_name'),
+    'ebooks': ('website', 'subject', 'states', 'preference'),
+    'schemes': ('name', 'benefits', 'eligiblity_criteria'),
+}
+
+# Title-like columns count more than long descriptions
+BM25_WEIGHTS = {
+    'courses': (10.0, 4.0, 2.0, 1.0),
+    'courses2': (10.0, 4.0, 2.0),
+    'ebooks': (4.0, 10.0, 4.0, 1.0),
+    'schemes': (10.0, 2.0, 1.0),
+}
+
+# Snippet markers; render_snippet() turns them into <mark> elements
+MARK_START = '\x02'
+MARK_END = '\x03'
+SNIPPET_TOKENS = 12
+
+SEARCH_LIMIT = 1000
+
+
+def create_triggers(cursor, table):
+    """Triggers that keep a table's FTS index in step with its rows"""
+    fts = f"{table}_fts"
+    columns = FTS_COLUMNS[table]
+    col_list = ", ".join(columns)
+    new_cols = ", ".join(f"new.{c}" for c in columns)
+    old_cols = ", ".join(f"old.{c}" for c in columns)
+
+    cursor.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN
+        INSERT INTO {fts}(rowid, {col_list}) VALUES (new.rowid, {new_cols});
+    END
+    """)
+    cursor.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN
+        INSERT INTO {fts}({fts}, rowid, {col_list}) VALUES ('delete', old.rowid, {old_cols});
+    END
+    """)
+    cursor.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE ON {table} BEGIN
+        INSERT INTO {fts}({fts}, rowid, {col_list}) VALUES ('delete', old.rowid, {old_cols});
+        INSERT INTO {fts}(rowid, {col_list}) VALUES (new.rowid, {new_cols});
+    END
+    """)
+
+
+def drop_triggers(cursor, table):
+    """Stop indexing row by row, ahead of a bulk load and rebuild()"""
+    for suffix in ('ai', 'ad', 'au'):
+        cursor.execute(f"DROP TRIGGER IF EXISTS {table}_fts_{suffix}")
+
+
+def rebuild(cursor, table):
+    """Re-index every row of a table"""
+    fts = f"{table}_fts"
+    cursor.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+def init_search_index():
+    """Create the FTS5 tables and the triggers that keep them in sync"""
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    for table, columns in FTS_COLUMNS.items():
+        fts = f"{table}_fts"
+        col_list = ", ".join(columns)
+
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (fts,))
+        exists = cursor.fetchone() is not None
+
+        cursor.execute(f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+            {col_list},
+            content='{table}',
+            tokenize='unicode61 remove_diacritics 2',
+            prefix='2 3'
+        )
+        """)
+        create_triggers(cursor, table)
+
+        # Index rows that were already in the table
+        if not exists:
+            rebuild(cursor, table)
+
+    conn.commit()
+    conn.close()
+
+
+def build_match_query(search_query):
+    """Turn free text into an FTS5 query: every word must match, as a prefix"""
+    terms = re.findall(r"\w+", search_query or "")
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def search(table_name, search_query, filters=None, limit=SEARCH_LIMIT):
+    """Return (rowid, snippet) pairs for the best matches, best first
+
+    `filters` ({column: value}, column equality) are applied in the same
+    query, before the limit, so a narrow filter still gets its best matches.
+    """
+    if table_name not in FTS_COLUMNS:
+        raise ValueError(f"No search index for table: {table_name}")
+
+    match = build_match_query(search_query)
+    if not match:
+        return []
+
+    fts = f"{table_name}_fts"
+    weights = ", ".join(str(w) for w in BM25_WEIGHTS[table_name])
+    filters = filters or {}
+    join = f'JOIN "{table_name}" ON "{table_name}".rowid = {fts}.rowid' if filters else ''
+    conditions = "".join(f' AND "{table_name}"."{column}" = ?' for column in filters)
+    conn = get_connection()
+    try:
+        cursor = conn.execute(f"""
+        SELECT {fts}.rowid,
+               snippet({fts}, -1, ?, ?, '...', {SNIPPET_TOKENS})
+        FROM {fts} {join}
+        WHERE {fts} MATCH ?{conditions}
+        ORDER BY bm25({fts}, {weights})
+        LIMIT ?
+        """, (MARK_START, MARK_END, match, *filters.values(), limit))
+        return cursor.fetchall()
+    finally:
+        conn.close()
+
+
+def render_snippet(snippet):
+    """Convert a marked-up snippet into Dash children with highlighted terms"""
+    children = []
+    for i, part in enumerate(re.split(f"{MARK_START}|{MARK_END}", snippet or "")):
+        if not part:
+            continue
+        # Odd parts sit between a start and an end marker
+        children.append(html.Mark(part) if i % 2 else part)
+    return children
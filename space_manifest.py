@@ -0,0 +1,116 @@
+from db import get_connection
+
+# My Space lists every file and folder a user owns from space_entries, one
+# row per item, kept current by triggers on the owning tables. Top-level
+# items have folder_id 0; files inside a folder carry the folder's id.
+#
+# For each source table: (kind, folder_id, name, description, file name)
+# as SQL over the trigger row, written with ROW as the row alias.
+SOURCES = {
+    'documents': ('document', '0', 'ROW.name', 'ROW.description', 'ROW.file_path'),
+    'study_materials': ('material', '0', 'ROW.name', 'ROW.description', 'ROW.file_path'),
+    'folders': ('folder', '0', 'ROW.name', 'ROW.description', 'NULL'),
+    'folder_files': ('folder_file', 'ROW.folder_id', 'ROW.file_path', 'NULL', 'ROW.file_path'),
+}
+
+ENTRY_COLUMNS = 'kind, item_id, folder_id, name, description, file_name, blob_hash, size, modified'
+
+
+def _entry_select(table, row):
+    """SELECT producing the space_entries row for `row` of `table`"""
+    kind, folder_id, name, description, file_name = SOURCES[table]
+    blob_hash = 'NULL' if table == 'folders' else 'ROW.blob_hash'
+    sql = f"""
+        SELECT ROW.user_id, '{kind}', ROW.id, {folder_id}, {name}, {description}, {file_name},
+               {blob_hash}, (SELECT size FROM blobs WHERE hash = {blob_hash}), ROW.upload_date"""
+    return sql.replace('ROW', row)
+
+
+def _rebuild(cursor, table):
+    """Refill a table's entries from scratch; triggers keep them current afterwards"""
+    kind = SOURCES[table][0]
+    cursor.execute("DELETE FROM space_entries WHERE kind = ?", (kind,))
+    cursor.execute(f"INSERT INTO space_entries (user_id, {ENTRY_COLUMNS}) {_entry_select(table, 't')} FROM {table} t")
+
+
+def init_space_manifest():
+    """Create the My Space manifest and the triggers that maintain it
+
+    Runs as a schema migration, after the blob store is set up.
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS space_entries (
+        user_id INTEGER NOT NULL,
+        kind TEXT NOT NULL,
+        item_id INTEGER NOT NULL,
+        folder_id INTEGER NOT NULL DEFAULT 0,
+        name TEXT,
+        description TEXT,
+        file_name TEXT,
+        blob_hash TEXT,
+        size INTEGER,
+        modified TEXT,
+        PRIMARY KEY (kind, item_id)
+    )
+    ''')
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_space_entries_user
+    ON space_entries (user_id, folder_id, modified)
+    ''')
+
+    for table, (kind, *_) in SOURCES.items():
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = ?", (f"{table}_space_ai",))
+        seeded = cursor.fetchone() is not None
+
+        cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_space_ai AFTER INSERT ON {table} BEGIN
+            INSERT OR REPLACE INTO space_entries (user_id, {ENTRY_COLUMNS}) {_entry_select(table, 'new')};
+        END
+        """)
+        cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_space_au AFTER UPDATE ON {table} BEGIN
+            INSERT OR REPLACE INTO space_entries (user_id, {ENTRY_COLUMNS}) {_entry_select(table, 'new')};
+        END
+        """)
+        cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_space_ad AFTER DELETE ON {table} BEGIN
+            DELETE FROM space_entries WHERE kind = '{kind}' AND item_id = old.id;
+        END
+        """)
+
+        if not seeded:
+            _rebuild(cursor, table)
+
+    conn.commit()
+    conn.close()
+
+
+def _fetch(sql, params):
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(sql, params)
+    columns = [d[0] for d in cursor.description]
+    rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+    conn.close()
+    return rows
+
+
+def get_entries(user_id):
+    """A user's documents, study materials and folders, newest first"""
+    return _fetch(f'''
+        SELECT {ENTRY_COLUMNS} FROM space_entries
+        WHERE user_id = ? AND folder_id = 0
+        ORDER BY modified DESC
+    ''', (user_id,))
+
+
+def get_folder_entries(user_id, folder_id):
+    """A folder's own entry followed by its files by name; empty if not the user's"""
+    return _fetch(f'''
+        SELECT {ENTRY_COLUMNS} FROM space_entries
+        WHERE user_id = ? AND (folder_id = ? OR (kind = 'folder' AND item_id = ?))
+        ORDER BY kind != 'folder', name
+    ''', (user_id, folder_id, folder_id))
@@ -0,0 +1,102 @@
+"""Report how long each module takes to import when the app starts.
+
+Usage: python login.py --profile-startup [--top N] [--json FILE]
+       python startup_profile.py [module] [--top N] [--json FILE]
+
+Imports the app (login by default) in a fresh interpreter run with
+-X importtime, so nothing is already in sys.modules, and lists the project's
+modules and the heaviest packages they pull in by cumulative import time.
+Importing login does no startup work (schema migration, layout and roadmap
+warm-up run in login.startup()), so this is the cost of the imports alone.
+--json writes the per-module numbers to a file, to compare runs and catch
+regressions.
+"""
+import argparse
+import glob
+import json
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_TOP = 15
+
+# "import time:  self [us] | cumulative | imported package"
+IMPORT_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|\s+(\S+)$')
+
+
+def project_modules():
+    """Names of the modules in the project directory"""
+    return {os.path.splitext(os.path.basename(p))[0] for p in glob.glob(os.path.join(ROOT, '*.py'))}
+
+
+def import_times(module):
+    """[(name, self us, cumulative us)] for a fresh import of a module"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise ValueError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+
+    times = []
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            self_us, cumulative_us, name = match.groups()
+            times.append((name, int(self_us), int(cumulative_us)))
+    return times
+
+
+def summarize(times, module, top=DEFAULT_TOP):
+    """(total us, project rows, package rows) from import_times()"""
+    ours = project_modules()
+    total = next((cumulative for name, _, cumulative in times if name == module), 0)
+    project = sorted((row for row in times if row[0] in ours),
+                     key=lambda row: -row[2])
+
+    # Top-level packages, charged to whichever module imported them first
+    packages = {}
+    for name, _, cumulative in times:
+        if '.' not in name and name not in ours:
+            packages[name] = max(packages.get(name, 0), cumulative)
+    heaviest = sorted(packages.items(), key=lambda item: -item[1])[:top]
+    return total, project, heaviest
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report per-module import times at startup")
+    parser.add_argument('module', nargs='?', default='login')
+    parser.add_argument('--top', type=int, default=DEFAULT_TOP, help="number of packages to list")
+    parser.add_argument('--json', metavar='FILE', help="also write the numbers to FILE")
+    args = parser.parse_args(argv)
+
+    try:
+        times = import_times(args.module)
+    except ValueError as e:
+        print(f"Error profiling startup: {e}")
+        return 1
+    total, project, heaviest = summarize(times, args.module, args.top)
+
+    print(f"import {args.module}: {total / 1000:.0f} ms")
+    print("\nProject modules (ms, self / cumulative)")
+    for name, self_us, cumulative in project:
+        print(f"  {name:<28} {self_us / 1000:8.1f} {cumulative / 1000:8.1f}")
+    print("\nHeaviest packages (ms, cumulative)")
+    for name, cumulative in heaviest:
+        print(f"  {name:<28} {cumulative / 1000:8.1f}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({
+                'module': args.module,
+                'total_us': total,
+                'modules': {name: {'self_us': s, 'cumulative_us': c} for name, s, c in project},
+                'packages': dict(heaviest),
+            }, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,188 @@
+import pandas as pd
+from db import get_connection
+
+# Tables whose row counts are kept in table_counts
+TRACKED_TABLES = (
+    'users', 'certificates', 'courses', 'courses2', 'ebooks',
+    'schemes', 'resumes', 'study_plans', 'documents', 'folders'
+)
+
+# Columns whose value distributions are kept in value_counts
+DISTRIBUTION_COLUMNS = {
+    'courses': ('dispcipline',),
+    'courses2': ('subjects',),
+    'ebooks': ('states', 'preference'),
+}
+
+# Near-unique columns whose number of distinct non-empty values is kept in
+# table_counts, under '<table>.<column>'. The triggers need each value's
+# count to see it appear or vanish, so these are in value_counts as well.
+DISTINCT_COLUMNS = {
+    'schemes': ('name',),
+}
+
+
+def _counted_columns(table):
+    return DISTRIBUTION_COLUMNS.get(table, ()) + DISTINCT_COLUMNS.get(table, ())
+
+
+def _table_exists(cursor, name, kind='table'):
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = ? AND name = ?", (kind, name))
+    return cursor.fetchone() is not None
+
+
+def seed_counts(cursor, table):
+    """Recount a table from scratch; triggers keep it current afterwards"""
+    cursor.execute("DELETE FROM table_counts WHERE table_name = ?", (table,))
+    # scan-ok: runs when a table's triggers are created, and after bulk loads
+    cursor.execute(f"INSERT INTO table_counts (table_name, row_count) SELECT ?, COUNT(*) FROM {table}", (table,))
+    cursor.execute("DELETE FROM value_counts WHERE table_name = ?", (table,))
+    for col in _counted_columns(table):
+        cursor.execute(f"""
+        INSERT INTO value_counts (table_name, column_name, value, row_count)
+        SELECT ?, ?, COALESCE({col}, ''), COUNT(*) FROM {table} GROUP BY COALESCE({col}, '')
+        """, (table, col))
+    for col in DISTINCT_COLUMNS.get(table, ()):
+        cursor.execute("DELETE FROM table_counts WHERE table_name = ?", (f"{table}.{col}",))
+        cursor.execute("""
+        INSERT INTO table_counts (table_name, row_count)
+        SELECT ?, COUNT(*) FROM value_counts
+        WHERE table_name = ? AND column_name = ? AND value != '' AND row_count > 0
+        """, (f"{table}.{col}", table, col))
+
+
+def _value_count_sql(table, col, row, delta):
+    return f"""
+            INSERT INTO value_counts (table_name, column_name, value, row_count)
+            VALUES ('{table}', '{col}', COALESCE({row}.{col}, ''), {delta})
+            ON CONFLICT (table_name, column_name, value)
+            DO UPDATE SET row_count = row_count + ({delta});""" + _distinct_count_sql(table, col, row, delta)
+
+
+def _distinct_count_sql(table, col, row, delta):
+    # Runs after the value's own count has changed: a value counts as a new
+    # distinct one when it reaches 1, and stops counting when it reaches 0
+    if col not in DISTINCT_COLUMNS.get(table, ()):
+        return ''
+    return f"""
+            UPDATE table_counts SET row_count = row_count + ({delta})
+            WHERE table_name = '{table}.{col}' AND COALESCE({row}.{col}, '') != ''
+              AND (SELECT row_count FROM value_counts
+                   WHERE table_name = '{table}' AND column_name = '{col}'
+                     AND value = {row}.{col}) = {1 if delta > 0 else 0};"""
+
+
+def create_triggers(cursor, table):
+    """Triggers that keep a table's counts current"""
+    columns = _counted_columns(table)
+    cursor.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS {table}_stats_ai AFTER INSERT ON {table} BEGIN
+        UPDATE table_counts SET row_count = row_count + 1 WHERE table_name = '{table}';
+        {''.join(_value_count_sql(table, col, 'new', 1) for col in columns)}
+    END
+    """)
+    cursor.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS {table}_stats_ad AFTER DELETE ON {table} BEGIN
+        UPDATE table_counts SET row_count = row_count - 1 WHERE table_name = '{table}';
+        {''.join(_value_count_sql(table, col, 'old', -1) for col in columns)}
+    END
+    """)
+    if columns:
+        cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_stats_au AFTER UPDATE OF {', '.join(columns)} ON {table} BEGIN
+            {''.join(_value_count_sql(table, col, 'old', -1) for col in columns)}
+            {''.join(_value_count_sql(table, col, 'new', 1) for col in columns)}
+        END
+        """)
+
+
+def drop_triggers(cursor, table):
+    """Stop counting row by row, ahead of a bulk load and seed_counts()"""
+    for suffix in ('ai', 'ad', 'au'):
+        cursor.execute(f"DROP TRIGGER IF EXISTS {table}_stats_{suffix}")
+
+
+def init_stats():
+    """Create the materialized stats tables and the triggers that maintain them"""
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS table_counts (
+        table_name TEXT PRIMARY KEY,
+        row_count INTEGER NOT NULL DEFAULT 0
+    )
+    ''')
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS value_counts (
+        table_name TEXT NOT NULL,
+        column_name TEXT NOT NULL,
+        value TEXT NOT NULL,
+        row_count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (table_name, column_name, value)
+    )
+    ''')
+
+    for table in TRACKED_TABLES:
+        # Catalog tables ship with the database rather than coming from
+        # schema.py; one that is missing stays uncounted (reported as 0)
+        if not _table_exists(cursor, table):
+            continue
+
+        seeded = _table_exists(cursor, f"{table}_stats_ai", 'trigger')
+        create_triggers(cursor, table)
+
+        if not seeded:
+            seed_counts(cursor, table)
+
+    conn.commit()
+    conn.close()
+
+
+def get_table_counts():
+    """Row count of every tracked table (0 for tables not created yet)"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT table_name, row_count FROM table_counts")
+    counts = dict(cursor.fetchall())
+    conn.close()
+    return {table: counts.get(table, 0) for table in TRACKED_TABLES}
+
+
+def get_value_counts(table, column):
+    """Distribution of a column as a DataFrame of (value, count), empty values dropped"""
+    conn = get_connection()
+    df = pd.read_sql_query(
+        "SELECT value, row_count AS count FROM value_counts "
+        "WHERE table_name = ? AND column_name = ? AND value != '' AND row_count > 0",
+        conn, params=(table, column)
+    )
+    conn.close()
+    return df
+
+
+def distinct_count(table, column):
+    """Number of distinct non-empty values in a DISTINCT_COLUMNS column
+
+    For near-unique columns such as scheme names, which are kept out of the
+    facet index; the triggers keep the count, so this is a single row read.
+    """
+    conn = get_connection()
+    cursor = conn.execute("SELECT row_count FROM table_counts WHERE table_name = ?", (f"{table}.{column}",))
+    row = cursor.fetchone()
+    conn.close()
+    return row[0] if row else 0
+
+
+def add_distinct_counts():
+    """Start counting DISTINCT_COLUMNS in databases whose triggers predate them"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    for table in DISTINCT_COLUMNS:
+        if not _table_exists(cursor, table):
+            continue
+        drop_triggers(cursor, table)
+        create_triggers(cursor, table)
+        seed_counts(cursor, table)
+    conn.commit()
+    conn.close()
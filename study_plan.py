@@ -2,7 +2,7 @@ import dash
 from dash import html, dcc, callback_context
 import dash_bootstrap_components as dbc
 from dash.dependencies import Input, Output, State
-import sqlite3
+from db import get_connection
 from flask import session as flask_session
 import os
 import datetime
@@ -400,25 +400,9 @@ def register_callbacks(app):
             if not topics_list:
                 return html.Div("Please enter at least one topic", style={"color": "red"}), False
                 
-            conn = sqlite3.connect('data/USDH.db')
+            conn = get_connection()
             cursor = conn.cursor()
             
-            # Create study plans table if it doesn't exist
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS study_plans (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER,
-                    subject TEXT,
-                    topics TEXT,
-                    duration INTEGER,
-                    hours_per_day INTEGER,
-                    preferences TEXT,
-                    notes TEXT,
-                    created_date TEXT,
-                    FOREIGN KEY (user_id) REFERENCES users (id)
-                )
-            ''')
-            
             # Insert the study plan
             cursor.execute('''
                 INSERT INTO study_plans (
@@ -576,7 +560,7 @@ def register_callbacks(app):
             if not user_id:
                 return html.Div("Session expired"), None
                 
-            conn = sqlite3.connect('data/USDH.db')
+            conn = get_connection()
             cursor = conn.cursor()
             
             # Delete the study plan
@@ -607,7 +591,7 @@ def register_callbacks(app):
             if not user_id:
                 return None
                 
-            conn = sqlite3.connect('data/USDH.db')
+            conn = get_connection()
             cursor = conn.cursor()
             
             # Get study plans
@@ -648,7 +632,7 @@ def register_callbacks(app):
 def get_study_plans_list(user_id):
     """Get user's study plans list"""
     try:
-        conn = sqlite3.connect('data/USDH.db')
+        conn = get_connection()
         cursor = conn.cursor()
         
         # Get study plans
@@ -0,0 +1,216 @@
+import math
+import re
+from db import get_connection
+import stats
+
+# The admin DataTables page, sort and filter on the server
+# (page_action/sort_action/filter_action='custom'): each callback asks for
+# one page and only those rows leave the database. The DataTable filter
+# language is translated to SQL here. Text comparisons are case-insensitive
+# unless the table sends the case-sensitive ("s") form of an operator, and
+# the filter/sort columns have COLLATE NOCASE indexes (schema.py).
+PAGE_SIZE = 10
+
+FILTER_PART = re.compile(
+    r'^\{(?P<column>[^}]+)\}\s+'
+    r'(?P<operator>is (?:not )?(?:blank|nil)|[si]?(?:contains|datestartswith|eq|ne|lt|le|gt|ge|!=|<=|>=|=|<|>))'
+    r'\s*(?P<value>.*)$'
+)
+
+COMPARISONS = {
+    '=': '=', 'eq': '=', '!=': '!=', 'ne': '!=',
+    '<': '<', 'lt': '<', '<=': '<=', 'le': '<=',
+    '>': '>', 'gt': '>', '>=': '>=', 'ge': '>=',
+}
+
+UNARY = {
+    'is blank': '("{c}" IS NULL OR "{c}" = \'\')',
+    'is not blank': '("{c}" IS NOT NULL AND "{c}" != \'\')',
+    'is nil': '"{c}" IS NULL',
+    'is not nil': '"{c}" IS NOT NULL',
+}
+
+_columns = {}
+
+
+def table_columns(table_name):
+    """Column names of a table, id first"""
+    if table_name not in _columns:
+        conn = get_connection()
+        try:
+            rows = conn.execute(f'PRAGMA table_info("{table_name}")').fetchall()
+        finally:
+            conn.close()
+        if not rows:
+            raise ValueError(f"Unknown table: {table_name}")
+        _columns[table_name] = [row[1] for row in rows]
+    return _columns[table_name]
+
+
+def _parse_value(raw):
+    """A filter operand: quoted text as is, bare numbers as numbers"""
+    raw = raw.strip()
+    if len(raw) >= 2 and raw[0] == raw[-1] and raw[0] in '"\'`':
+        return raw[1:-1].replace('\\' + raw[0], raw[0])
+    try:
+        return int(raw)
+    except ValueError:
+        pass
+    try:
+        return float(raw)
+    except ValueError:
+        return raw
+
+
+def _split_filter(filter_query):
+    """The parts of a filter_query between " && ", skipping any inside quotes or {}
+
+    A quote only opens a value at the start of a word, so a bare value like
+    O'Reilly keeps its apostrophe.
+    """
+    parts, start, closing = [], 0, None
+    text = filter_query or ''
+    i = 0
+    while i < len(text):
+        ch = text[i]
+        if closing:
+            if ch == '\\' and closing != '}':
+                i += 1
+            elif ch == closing:
+                closing = None
+        elif ch == '{':
+            closing = '}'
+        elif ch in '"\'`' and (i == 0 or text[i - 1] == ' '):
+            closing = ch
+        elif text.startswith(' && ', i):
+            parts.append(text[start:i])
+            i += len(' && ')
+            start = i
+            continue
+        i += 1
+    if closing:
+        raise ValueError(f"Unclosed {closing} in filter: {text}")
+    parts.append(text[start:])
+    return parts
+
+
+def _like_pattern(value):
+    return str(value).replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def parse_filter(table_name, filter_query):
+    """(SQL conditions, parameters) for a DataTable filter_query
+
+    Column filters are joined with " && " (quoted values may contain it);
+    anything else is rejected with a ValueError rather than guessed at.
+    """
+    columns = table_columns(table_name)
+    conditions, params = [], []
+    for part in _split_filter(filter_query):
+        part = part.strip()
+        if not part:
+            continue
+        match = FILTER_PART.match(part)
+        if not match or match.group('column') not in columns:
+            raise ValueError(f"Unsupported filter: {part}")
+        column, operator = match.group('column'), match.group('operator')
+
+        if operator in UNARY:
+            conditions.append(UNARY[operator].format(c=column))
+            continue
+
+        value = _parse_value(match.group('value'))
+        sensitive = False
+        if operator[0] in 'si' and (operator[1:] in COMPARISONS or operator[1:] in ('contains', 'datestartswith')):
+            sensitive = operator[0] == 's'
+            operator = operator[1:]
+
+        if operator == 'contains':
+            if sensitive:
+                conditions.append(f'instr("{column}", ?) > 0')
+                params.append(str(value))
+            else:
+                conditions.append(f'"{column}" LIKE ? ESCAPE \'\\\'')
+                params.append(f"%{_like_pattern(value)}%")
+        elif operator == 'datestartswith':
+            conditions.append(f'"{column}" LIKE ? ESCAPE \'\\\'')
+            params.append(f"{_like_pattern(value)}%")
+        else:
+            # Numbers compare as numbers; text uses the NOCASE indexes
+            collate = '' if sensitive or not isinstance(value, str) else ' COLLATE NOCASE'
+            conditions.append(f'"{column}" {COMPARISONS[operator]} ?{collate}')
+            params.append(value)
+    return conditions, params
+
+
+def _order_by(table_name, sort_by):
+    """ORDER BY for a DataTable sort_by, ending on id so paging is stable"""
+    columns = table_columns(table_name)
+    terms, direction = [], 'ASC'
+    for sort in sort_by or []:
+        column = sort.get('column_id')
+        if column not in columns:
+            raise ValueError(f"Unknown sort column: {column}")
+        direction = 'DESC' if sort.get('direction') == 'desc' else 'ASC'
+        if column == 'id':
+            break
+        terms.append(f'"{column}" COLLATE NOCASE {direction}')
+    # Same direction as the last key, so an index on it can be walked backwards
+    terms.append(f'id {direction}')
+    return ", ".join(terms)
+
+
+def _count(cursor, table_name, where='', params=()):
+    """Rows matching a WHERE clause; unfiltered totals come from table_counts"""
+    if not where and table_name in stats.TRACKED_TABLES:
+        cursor.execute("SELECT row_count FROM table_counts WHERE table_name = ?", (table_name,))
+        row = cursor.fetchone()
+        return row[0] if row else 0
+    cursor.execute(f'SELECT COUNT(*) FROM "{table_name}" {where}', params)
+    return cursor.fetchone()[0]
+
+
+def fetch_page(table_name, page_current=0, page_size=PAGE_SIZE, sort_by=None, filter_query=None, filters=None):
+    """(records, page count, page shown) for one page of a table
+
+    filters holds extra {column: value} equality filters, e.g. from the
+    dropdowns above a table; empty values and "all" are ignored.
+    """
+    conditions, params = parse_filter(table_name, filter_query)
+    columns = table_columns(table_name)
+    for column, value in (filters or {}).items():
+        if value and value != 'all':
+            if column not in columns:
+                raise ValueError(f"Unknown filter column: {column}")
+            conditions.append(f'"{column}" = ? COLLATE NOCASE')
+            params.append(value)
+
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    page_current = max(page_current or 0, 0)
+    page_size = page_size or PAGE_SIZE
+
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        total = _count(cursor, table_name, where, params)
+        page_count = max(math.ceil(total / page_size), 1)
+        # Stay on the last page when rows disappear from under it
+        page_current = min(page_current, page_count - 1)
+        cursor.execute(
+            f'SELECT * FROM "{table_name}" {where} ORDER BY {_order_by(table_name, sort_by)} LIMIT ? OFFSET ?',
+            params + [page_size, page_current * page_size]
+        )
+        names = [d[0] for d in cursor.description]
+        records = [dict(zip(names, row)) for row in cursor.fetchall()]
+    finally:
+        conn.close()
+    return records, page_count, page_current
+
+
+def row_count(table_name):
+    """Rows in a table"""
+    conn = get_connection()
+    try:
+        return _count(conn.cursor(), table_name)
+    finally:
+        conn.close()
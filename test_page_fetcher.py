@@ -0,0 +1,141 @@
+"""Course page fetching against a stub HTTP server on localhost
+
+Run with: python -m pytest test_page_fetcher.py  (or python -m unittest)
+
+Uses a scratch database, never data/USDH.db.
+"""
+import os
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import db
+import schema
+import page_fetcher
+import view_course
+
+PAGE = b"""<html><head><script>var tracking = 1;</script><style>p {}</style></head>
+<body><nav>Home | About</nav><h1>Intro to Databases</h1>
+<p>Tables,   rows and
+indexes.</p><footer>Copyright</footer></body></html>"""
+ETAG = '"v1"'
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Serves /course with an ETag, /missing as a 404 and /slow after a delay"""
+    requests_seen = []
+
+    def do_GET(self):
+        StubHandler.requests_seen.append((self.path, dict(self.headers)))
+        if self.path.startswith('/missing'):
+            self.send_error(404)
+            return
+        if self.path.startswith('/slow'):
+            StubHandler.release.wait(5)
+        if self.headers.get('If-None-Match') == ETAG:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(PAGE)))
+        self.send_header('ETag', ETAG)
+        self.end_headers()
+        self.wfile.write(PAGE)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def setUpModule():
+    global _db_dir, _server
+    _db_dir = tempfile.TemporaryDirectory()
+    db.DB_PATH = os.path.join(_db_dir.name, 'test.db')
+    schema.create_page_cache()
+
+    _server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    threading.Thread(target=_server.serve_forever, daemon=True).start()
+
+
+def tearDownModule():
+    _server.shutdown()
+    _server.server_close()
+    db.close_all()
+    _db_dir.cleanup()
+
+
+def stub_url(path):
+    return f"http://127.0.0.1:{_server.server_port}{path}"
+
+
+class PageFetcherTest(unittest.TestCase):
+    def setUp(self):
+        StubHandler.requests_seen = []
+        StubHandler.release = threading.Event()
+
+    def test_page_is_fetched_cleaned_and_cached(self):
+        url = stub_url('/course/1')
+        self.assertEqual(view_course.fetch_course_content(url, wait=5),
+                         "Intro to Databases Tables, rows and indexes.")
+
+        # Served from the cache, without another request
+        self.assertEqual(view_course.fetch_course_content(url),
+                         "Intro to Databases Tables, rows and indexes.")
+        self.assertEqual(len(StubHandler.requests_seen), 1)
+
+    def test_refresh_is_conditional(self):
+        url = stub_url('/course/2')
+        page_fetcher.refresh(url).result(timeout=5)
+        page_fetcher.refresh(url).result(timeout=5)
+
+        self.assertEqual(len(StubHandler.requests_seen), 2)
+        self.assertNotIn('If-None-Match', StubHandler.requests_seen[0][1])
+        self.assertEqual(StubHandler.requests_seen[1][1].get('If-None-Match'), ETAG)
+        # The 304 keeps the stored text
+        content, error = page_fetcher.get_page(url)
+        self.assertEqual(content, "Intro to Databases Tables, rows and indexes.")
+        self.assertIsNone(error)
+
+    def test_missing_page_is_fetched_in_background(self):
+        url = stub_url('/slow/3')
+        self.assertEqual(view_course.fetch_course_content(url), view_course.LOADING_MESSAGE)
+
+        # Further reads join the running refresh instead of queueing another
+        self.assertEqual(view_course.fetch_course_content(url), view_course.LOADING_MESSAGE)
+        future = page_fetcher.refresh(url)
+        StubHandler.release.set()
+        future.result(timeout=5)
+        self.assertEqual(len(StubHandler.requests_seen), 1)
+        self.assertEqual(view_course.fetch_course_content(url),
+                         "Intro to Databases Tables, rows and indexes.")
+
+    def test_slow_host_does_not_hold_the_workers(self):
+        # More slow pages than workers, all on one host
+        slow = [page_fetcher.refresh(stub_url(f'/slow/{i}'))
+                for i in range(10, 10 + page_fetcher.FETCH_WORKERS + 2)]
+
+        # A page on another host (same server, other name) is still fetched
+        other = f"http://localhost:{_server.server_port}/course/5"
+        page_fetcher.refresh(other).result(timeout=4)
+        self.assertEqual(sum(path.startswith('/slow') for path, _ in StubHandler.requests_seen),
+                         page_fetcher.PER_HOST_LIMIT)
+
+        StubHandler.release.set()
+        for future in slow:
+            future.result(timeout=5)
+        self.assertEqual(page_fetcher._running, {})
+
+    def test_failed_fetch_is_reported(self):
+        url = stub_url('/missing/4')
+        content = view_course.fetch_course_content(url, wait=5)
+        self.assertTrue(content.startswith("Unable to load course content"))
+        self.assertIn('404', page_fetcher.get_page(url)[1])
+
+    def test_invalid_url_is_not_fetched(self):
+        self.assertEqual(view_course.fetch_course_content('javascript:alert(1)'), "Invalid URL provided.")
+        self.assertEqual(StubHandler.requests_seen, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
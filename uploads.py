@@ -0,0 +1,200 @@
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from dash import html, dcc
+import dash_bootstrap_components as dbc
+from blobs import ingest, user_usage
+
+# Resumable chunked uploads. The browser sends each file in CHUNK_SIZE pieces
+# which are appended straight to UPLOAD_DIR/<id>.part; the Dash callbacks
+# only ever see the upload id and hand the finished file to the blob store.
+UPLOAD_DIR = 'tmp/uploads'
+CHUNK_SIZE = 4 * 1024 * 1024
+MAX_CHUNK_SIZE = 8 * 1024 * 1024
+COPY_BUFFER = 1024 * 1024
+MAX_FILE_SIZE = 500 * 1024 * 1024
+USER_QUOTA = 2 * 1024 * 1024 * 1024
+UPLOAD_TTL = 24 * 3600
+
+_UPLOAD_ID = re.compile(r'^[0-9a-f]{32}$')
+_lock = threading.Lock()
+_upload_locks = {}
+
+
+def _paths(upload_id):
+    if not _UPLOAD_ID.match(upload_id or ''):
+        raise ValueError("Invalid upload id")
+    base = os.path.join(UPLOAD_DIR, upload_id)
+    return f"{base}.json", f"{base}.part"
+
+
+def _read_meta(upload_id, user_id):
+    meta_path, part_path = _paths(upload_id)
+    try:
+        with open(meta_path) as f:
+            meta = json.load(f)
+    except FileNotFoundError:
+        raise ValueError("Upload not found")
+    if meta['user_id'] != user_id:
+        raise ValueError("Upload not found")
+    meta['offset'] = os.path.getsize(part_path)
+    return meta
+
+
+def _upload_lock(upload_id):
+    with _lock:
+        return _upload_locks.setdefault(upload_id, threading.Lock())
+
+
+def _remove(upload_id):
+    for path in _paths(upload_id):
+        if os.path.exists(path):
+            os.remove(path)
+    with _lock:
+        _upload_locks.pop(upload_id, None)
+
+
+def _prune():
+    """Drop partial uploads that have not been touched for UPLOAD_TTL"""
+    if not os.path.isdir(UPLOAD_DIR):
+        return
+    cutoff = time.time() - UPLOAD_TTL
+    for name in os.listdir(UPLOAD_DIR):
+        upload_id, ext = os.path.splitext(name)
+        if ext == '.part' and os.path.getmtime(os.path.join(UPLOAD_DIR, name)) < cutoff:
+            try:
+                _remove(upload_id)
+            except (ValueError, OSError) as e:
+                print(f"Error removing stale upload {upload_id}: {e}")
+
+
+def _pending_bytes(user_id):
+    """Bytes reserved by the user's unfinished uploads"""
+    total = 0
+    if not os.path.isdir(UPLOAD_DIR):
+        return total
+    for name in os.listdir(UPLOAD_DIR):
+        if name.endswith('.json'):
+            try:
+                with open(os.path.join(UPLOAD_DIR, name)) as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if meta.get('user_id') == user_id:
+                total += meta['size']
+    return total
+
+
+def create_upload(user_id, filename, size):
+    """Start an upload after checking the size limit and the user's quota"""
+    if not filename:
+        raise ValueError("Missing file name")
+    if size < 0 or size > MAX_FILE_SIZE:
+        raise ValueError(f"Files are limited to {MAX_FILE_SIZE // (1024 * 1024)} MB")
+
+    _prune()
+    if user_usage(user_id) + _pending_bytes(user_id) + size > USER_QUOTA:
+        raise ValueError("Storage quota exceeded")
+
+    upload_id = uuid.uuid4().hex
+    meta_path, part_path = _paths(upload_id)
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    open(part_path, 'wb').close()
+    with open(meta_path, 'w') as f:
+        json.dump({
+            'user_id': user_id,
+            'filename': os.path.basename(filename),
+            'size': size,
+            'created_at': time.time(),
+        }, f)
+    return get_status(user_id, upload_id)
+
+
+def get_status(user_id, upload_id):
+    """Where a client should resume an upload from"""
+    meta = _read_meta(upload_id, user_id)
+    return {
+        'upload_id': upload_id,
+        'filename': meta['filename'],
+        'size': meta['size'],
+        'offset': meta['offset'],
+        'chunk_size': CHUNK_SIZE,
+        'complete': meta['offset'] == meta['size'],
+    }
+
+
+def append_chunk(user_id, upload_id, offset, stream, length):
+    """Append one chunk read from stream; offset must match what is on disk
+
+    A mismatched offset (a retried or out-of-order chunk) is not an error:
+    the current status is returned and the client resumes from there.
+    """
+    if length is None or length > MAX_CHUNK_SIZE:
+        raise ValueError(f"Chunks are limited to {MAX_CHUNK_SIZE // (1024 * 1024)} MB")
+
+    with _upload_lock(upload_id):
+        meta = _read_meta(upload_id, user_id)
+        if offset != meta['offset']:
+            return get_status(user_id, upload_id)
+        if offset + length > meta['size']:
+            raise ValueError("Chunk runs past the end of the file")
+
+        _, part_path = _paths(upload_id)
+        with open(part_path, 'ab') as f:
+            remaining = length
+            while remaining:
+                block = stream.read(min(COPY_BUFFER, remaining))
+                if not block:
+                    break
+                f.write(block)
+                remaining -= len(block)
+            if remaining:
+                # Connection dropped mid-chunk; keep only whole chunks
+                f.truncate(offset)
+
+    return get_status(user_id, upload_id)
+
+
+def claim_upload(user_id, upload_id):
+    """Take a finished upload: returns (path, original file name)
+
+    The upload is forgotten, so the caller owns the file at path and must
+    move or delete it.
+    """
+    with _upload_lock(upload_id):
+        meta = _read_meta(upload_id, user_id)
+        if meta['offset'] != meta['size']:
+            raise ValueError(f"Upload of {meta['filename']} is not complete")
+        meta_path, part_path = _paths(upload_id)
+        os.remove(meta_path)
+    with _lock:
+        _upload_locks.pop(upload_id, None)
+    return part_path, meta['filename']
+
+
+def store_upload(cursor, user_id, upload_id):
+    """Register a finished upload with the blob store; returns (blob hash, file name, path)
+
+    Call in the transaction that inserts the row owning the file, then
+    blobs.place(path, blob_hash) once it has committed. If the transaction
+    rolls back instead, the claimed file is left for _prune.
+    """
+    path, filename = claim_upload(user_id, upload_id)
+    return ingest(cursor, path), filename, path
+
+
+def upload_field(id, children=None, style=None, multiple=False, accept=None):
+    """Drop-in for dcc.Upload that sends files in chunks (assets/chunked_upload.js)
+
+    The script takes the picked files before dcc.Upload can read them into
+    base64. When they are on the server, dcc.Store(id) receives
+    {"upload_ids": [...], "filenames": [...]} or {"error": message}.
+    """
+    return html.Div([
+        dcc.Upload(id=f"{id}-picker", children=children, style=style, multiple=multiple, accept=accept),
+        dbc.Progress(id=f"{id}-progress", value=0, className="mt-2"),
+        dcc.Store(id=id),
+    ], className="chunked-upload", **{"data-store": id, "data-progress": f"{id}-progress"})
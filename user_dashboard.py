@@ -1,26 +1,34 @@
 import dash
-from dash import html, dcc, callback_context, no_update, ALL
+from dash import html, dcc, callback_context, no_update, ALL, Patch
 import dash_bootstrap_components as dbc
 from dash.dependencies import Input, Output, State
-import sqlite3
-import pandas as pd
+from db import get_connection
 from flask import session
-import plotly.graph_objs as go
-import plotly.express as px
 from dash.exceptions import PreventUpdate
 import random
-import matplotlib
-matplotlib.use('Agg')  # Set the backend before importing pyplot
-import matplotlib.pyplot as plt
-import io
-import base64
-import numpy as np
 from datetime import datetime, date
 import json
-from ebooks_formatter import format_ebooks_table
-from courses_formatter import format_courses_table
+import threading
+import uuid
+from collections import OrderedDict
+from ebooks_formatter import format_ebooks_table, build_ebook_cards
+from courses_formatter import format_courses_table, build_course_cards
 from school_courses_formatter import format_courses2_table
 from themes import get_theme_colors, get_theme_styles
+from search import render_snippet
+from formatter_utils import CARD_CACHE_SIZE, iter_rows
+from functools import lru_cache
+import catalog
+import layouts
+import stats
+import roadmaps
+import uploads
+import blobs
+from uploads import upload_field
+
+# Results are rendered one page at a time; "Load more" appends the next page
+PAGE_SIZE_OPTIONS = [12, 24, 48, 96]
+DEFAULT_PAGE_SIZE = 24
 
 def user_dashboard():
     # New Profile Settings Dropdown with nested options
@@ -94,7 +102,16 @@ def user_dashboard():
                 dbc.Col([
                     dbc.Button("Search", id="search-button", color="success", className="ms-2"),
                     dbc.Button("Reset", id="reset-button", color="secondary", className="ms-2"),
-                ], width=6, className="d-flex"),
+                ], width=4, className="d-flex"),
+                dbc.Col([
+                    dcc.Dropdown(
+                        id="results-page-size",
+                        options=[{"label": f"{n} per page", "value": n} for n in PAGE_SIZE_OPTIONS],
+                        value=DEFAULT_PAGE_SIZE,
+                        clearable=False,
+                        searchable=False
+                    ),
+                ], width=2),
             ], className="mb-3"),
             html.Div(id="filter-area", className="mb-3"),
         ], id="search-filter-area", className="mb-3"),
@@ -212,7 +229,7 @@ def user_dashboard():
         dbc.ModalBody([
             html.Div([
                 # Chat messages container with enhanced styling
-                html.Div(id="chat-messages", className="chat-messages mb-4", style={
+                html.Div(id="chat-messages", children=[], className="chat-messages mb-4", style={
                     'height': '400px',
                     'overflowY': 'auto',
                     'padding': '25px',
@@ -223,6 +240,18 @@ def user_dashboard():
                     'background': 'linear-gradient(to bottom, #ffffff, #f8f9fa)'
                 }),
                 
+                # Course picker for roadmaps, shown by the Course Roadmap option
+                html.Div([
+                    dcc.Dropdown(
+                        id="roadmap-course-picker",
+                        options=[],
+                        placeholder="Search for a course...",
+                        searchable=True,
+                        clearable=True,
+                        optionHeight=50
+                    )
+                ], id="roadmap-picker-container", className="mb-4", style={'display': 'none'}),
+                
                 # Options container with enhanced styling
                 html.Div([
                     html.Div([
@@ -436,7 +465,7 @@ def user_dashboard():
                             dbc.Row([
                                 dbc.Col([
                                     dbc.Label("Certificate File (PDF/JPEG)", style={'color': '#0ff'}),
-                                    dcc.Upload(
+                                    upload_field(
                                         id='certificate-upload',
                                         children=html.Div([
                                             'Drag and Drop or ',
@@ -626,192 +655,13 @@ def user_dashboard():
     return dashboard_layout
 
 
-# Register callbacks for the user dashboard
-def register_callbacks(app):
-    # Callback to update filters based on each other
-    @app.callback(
-        [Output("website-filter", "options"),
-         Output("website-filter", "value")],
-        [Input("discipline-filter", "value")],
-        [State("current-table", "data")]
-    )
-    def update_website_options(discipline, current_table):
-        if current_table != "courses":
-            return [], None
-            
-        try:
-            conn = sqlite3.connect('data/USDH.db')
-            
-            # Build query based on discipline filter
-            if discipline:
-                query = "SELECT DISTINCT website_name FROM courses WHERE dispcipline = ?"
-                params = [discipline]
-            else:
-                query = "SELECT DISTINCT website_name FROM courses"
-                params = []
-            
-            # Get unique websites
-            cursor = conn.cursor()
-            if params:
-                cursor.execute(query, params)
-            else:
-                cursor.execute(query)
-            
-            websites = [w[0] for w in cursor.fetchall() if w[0]]  # Filter out None/empty values
-            conn.close()
-            
-            return [{"label": w, "value": w} for w in sorted(websites)], None
-            
-        except Exception as e:
-            print(f"Error updating website options: {e}")
-            return [], None
+def user_dashboard_page():
+    """The cached dashboard layout plus this page load's filter state"""
+    return [layouts.get(user_dashboard), dcc.Store(id="filter-state", data=new_filter_state())]
 
-    # Callback for applying combined filters
-    @app.callback(
-        Output("table-content", "children", allow_duplicate=True),
-        [Input("discipline-filter", "value"),
-         Input("website-filter", "value")],
-        [State("current-table", "data"),
-         State("search-input", "value")],
-        prevent_initial_call=True
-    )
-    def apply_combined_filters(discipline, website, current_table, search_query):
-        if current_table != "courses":
-            return dash.no_update
-            
-        try:
-            conn = sqlite3.connect('data/USDH.db')
-            
-            # Start with base query
-            query = "SELECT * FROM courses"
-            where_clauses = []
-            params = []
-            
-            # Add search condition if exists
-            if search_query:
-                cursor = conn.cursor()
-                cursor.execute("PRAGMA table_info(courses)")
-                columns = [col[1] for col in cursor.fetchall()]
-                search_conditions = " OR ".join([f"{col} LIKE ?" for col in columns])
-                where_clauses.append(f"({search_conditions})")
-                params.extend([f"%{search_query}%" for _ in columns])
-            
-            # Apply discipline filter
-            if discipline:
-                where_clauses.append("dispcipline = ?")
-                params.append(discipline)
-            
-            # Apply website filter
-            if website:
-                where_clauses.append("website_name = ?")
-                params.append(website)
-            
-            # Combine where clauses
-            if where_clauses:
-                query += " WHERE " + " AND ".join(where_clauses)
-                
-            df = pd.read_sql(query, conn, params=params)
-            conn.close()
-            
-            return format_courses_table(df)
-            
-        except Exception as e:
-            return html.Div([
-                html.H3("Error Applying Filters", className="text-danger"),
-                html.P(f"Error: {str(e)}")
-            ])
-
-    # Callback for ebooks filters
-    @app.callback(
-        [Output("ebook-state-filter", "options"),
-         Output("ebook-state-filter", "value")],
-        [Input("ebook-subject-filter", "value")],
-        [State("current-table", "data")]
-    )
-    def update_state_options(subject, current_table):
-        if current_table != "ebooks":
-            return [], None
-            
-        try:
-            conn = sqlite3.connect('data/USDH.db')
-            
-            # Build query based on subject filter
-            if subject:
-                query = "SELECT DISTINCT states FROM ebooks WHERE subject = ?"
-                params = [subject]
-            else:
-                query = "SELECT DISTINCT states FROM ebooks"
-                params = []
-            
-            cursor = conn.cursor()
-            if params:
-                cursor.execute(query, params)
-            else:
-                cursor.execute(query)
-            
-            states = [s[0] for s in cursor.fetchall() if s[0]]
-            conn.close()
-            
-            return [{"label": s, "value": s} for s in sorted(states)], None
-            
-        except Exception as e:
-            print(f"Error updating state options: {e}")
-            return [], None
 
-    # Callback for applying combined ebooks filters
-    @app.callback(
-        Output("table-content", "children", allow_duplicate=True),
-        [Input("ebook-subject-filter", "value"),
-         Input("ebook-state-filter", "value")],
-        [State("current-table", "data"),
-         State("search-input", "value")],
-        prevent_initial_call=True
-    )
-    def apply_combined_ebook_filters(subject, state, current_table, search_query):
-        if current_table != "ebooks":
-            return dash.no_update
-            
-        try:
-            conn = sqlite3.connect('data/USDH.db')
-            
-            # Start with base query
-            query = "SELECT * FROM ebooks"
-            where_clauses = []
-            params = []
-            
-            # Add search condition if exists
-            if search_query:
-                cursor = conn.cursor()
-                cursor.execute("PRAGMA table_info(ebooks)")
-                columns = [col[1] for col in cursor.fetchall()]
-                search_conditions = " OR ".join([f"{col} LIKE ?" for col in columns])
-                where_clauses.append(f"({search_conditions})")
-                params.extend([f"%{search_query}%" for _ in columns])
-            
-            # Apply subject filter
-            if subject:
-                where_clauses.append("subject = ?")
-                params.append(subject)
-            
-            # Apply state filter
-            if state:
-                where_clauses.append("states = ?")
-                params.append(state)
-            
-            # Combine where clauses
-            if where_clauses:
-                query += " WHERE " + " AND ".join(where_clauses)
-                
-            df = pd.read_sql(query, conn, params=params)
-            conn.close()
-            
-            return format_ebooks_table(df)
-            
-        except Exception as e:
-            return html.Div([
-                html.H3("Error Applying Filters", className="text-danger"),
-                html.P(f"Error: {str(e)}")
-            ])
+# Register callbacks for the user dashboard
+def register_callbacks(app):
     # Update username display
     @app.callback(
         Output("username-display", "children"),
@@ -821,21 +671,19 @@ def register_callbacks(app):
         username = session.get("username", "User")
         return f"Hello, {username}"
     
-    # Initialize default view on page load
+    # Initialize default view on page load; the results themselves come from
+    # run_catalog_query, which fires on the initial filter-state
     @app.callback(
-        [Output("table-content", "children"),
-         Output("filter-area", "children")],
+        Output("filter-area", "children"),
         [Input("callback-trigger", "children")]
     )
     def initialize_default_view(_):
         # Load courses table as default
-        table_content = load_table_content("courses", None)
-        filter_dropdowns = get_filter_dropdowns("courses")
-        return table_content, filter_dropdowns
+        return get_filter_dropdowns("courses")
     
     # Handle table button clicks
     @app.callback(
-        [Output("table-content", "children", allow_duplicate=True),
+        [Output("filter-state", "data", allow_duplicate=True),
          Output("welcome-content", "style"),
          Output("current-table", "data"),
          Output("filter-area", "children", allow_duplicate=True)],
@@ -847,12 +695,10 @@ def register_callbacks(app):
          Input("card-courses-btn", "n_clicks"),
          Input("card-courses2-btn", "n_clicks"),
          Input("card-schemes-btn", "n_clicks")],
-        [State("current-table", "data")],
         prevent_initial_call=True
     )
     def update_table_content(ebooks_clicks, courses_clicks, courses2_clicks, schemes_clicks,
-                             card_ebooks_clicks, card_courses_clicks, card_courses2_clicks, card_schemes_clicks,
-                             current_table):
+                             card_ebooks_clicks, card_courses_clicks, card_courses2_clicks, card_schemes_clicks):
         ctx = callback_context
         
         # Determine which button was clicked
@@ -876,14 +722,17 @@ def register_callbacks(app):
         
         if button_id in table_mapping:
             table_name = table_mapping[button_id]
-            return load_table_content(table_name, None), {"display": "none"}, table_name, get_filter_dropdowns(table_name)
+            state = filter_state_patch(table=table_name, search=None, filters={})
+            return state, {"display": "none"}, table_name, get_filter_dropdowns(table_name)
         
         # Fallback - keep current state
         return dash.no_update, dash.no_update, dash.no_update, dash.no_update
     
     # Handle search and reset actions
     @app.callback(
-        Output("table-content", "children", allow_duplicate=True),
+        [Output("filter-state", "data", allow_duplicate=True),
+         Output("search-input", "value"),
+         Output("filter-area", "children", allow_duplicate=True)],
         [Input("search-button", "n_clicks"),
          Input("reset-button", "n_clicks")],
         [State("current-table", "data"),
@@ -893,18 +742,113 @@ def register_callbacks(app):
     def handle_search_reset(search_clicks, reset_clicks, current_table, search_query):
         ctx = callback_context
         if not ctx.triggered:
-            return dash.no_update
+            return dash.no_update, dash.no_update, dash.no_update
             
         button_id = ctx.triggered[0]["prop_id"].split(".")[0]
         
         if button_id == "reset-button":
-            # Reset the search (reload without filters)
-            return load_table_content(current_table, None)
+            # Clear the search box and the filter dropdowns along with the query
+            return filter_state_patch(search=None, filters={}), "", get_filter_dropdowns(current_table)
         elif button_id == "search-button":
-            # Apply search filter
-            return load_table_content(current_table, search_query)
+            # Search within the current filters
+            return filter_state_patch(search=search_query or None), dash.no_update, dash.no_update
             
-        return dash.no_update
+        return dash.no_update, dash.no_update, dash.no_update
+    
+    # Re-render the current results when the page size changes
+    @app.callback(
+        Output("filter-state", "data", allow_duplicate=True),
+        [Input("results-page-size", "value")],
+        prevent_initial_call=True
+    )
+    def change_page_size(page_size):
+        return filter_state_patch(page_size=page_size)
+    
+    # The filter dropdowns narrow each other through the facet index: the one
+    # that changed keeps its value, and the others lose values that no longer
+    # match. One filter-state update per change, however many dropdowns move.
+    @app.callback(
+        [Output({"type": "catalog-filter", "column": ALL}, "options"),
+         Output({"type": "catalog-filter", "column": ALL}, "value"),
+         Output("filter-state", "data", allow_duplicate=True)],
+        [Input({"type": "catalog-filter", "column": ALL}, "value")],
+        [State({"type": "catalog-filter", "column": ALL}, "id"),
+         State("current-table", "data")],
+        prevent_initial_call=True
+    )
+    def update_filters(values, ids, current_table):
+        triggered = callback_context.triggered_id
+        if not triggered or not ids:
+            raise PreventUpdate
+        
+        selected = {i["column"]: v for i, v in zip(ids, values)}
+        changed = triggered["column"]
+        try:
+            def choices(column):
+                others = {c: v for c, v in selected.items() if c != column}
+                return sorted(v for v in catalog.facet_values(current_table, column, others) if v)
+            
+            for column, value in selected.items():
+                if column != changed and value and value not in choices(column):
+                    selected[column] = None
+            options = [[{"label": c, "value": c} for c in choices(i["column"])] for i in ids]
+            new_values = [selected[i["column"]] for i in ids]
+            return options, new_values, filter_state_patch(filters=selected)
+        except Exception as e:
+            print(f"Error updating filters: {e}")
+            raise PreventUpdate
+    
+    # The query planner: every change to the filter state runs exactly one
+    # catalog query. Responses overtaken by a newer state are dropped.
+    @app.callback(
+        Output("table-content", "children"),
+        [Input("filter-state", "data")]
+    )
+    def run_catalog_query(state):
+        if not state or not claim_query(state["client"], state["seq"]):
+            raise PreventUpdate
+        
+        content = load_table_content(state["table"], state["search"], state["filters"], state["page_size"])
+        if not is_latest_query(state["client"], state["seq"]):
+            raise PreventUpdate
+        return content
+    
+    # Append the next page of results without resending the ones already shown
+    @app.callback(
+        [Output("results-grid", "children"),
+         Output("results-count", "children"),
+         Output("load-more-btn", "style")],
+        [Input("load-more-btn", "n_clicks")],
+        [State("results-query", "data")],
+        prevent_initial_call=True
+    )
+    def load_more_results(n_clicks, query):
+        if not n_clicks or not query:
+            raise PreventUpdate
+        
+        try:
+            formatter = get_result_formatters(query["table"])
+            if not formatter:
+                raise PreventUpdate
+            
+            df = catalog.query(query["table"], query["search"], query["filters"])
+            page_size = query["page_size"]
+            
+            # Each click fetches its own window, so repeated clicks never overlap
+            start = page_size * n_clicks
+            page = df.iloc[start:start + page_size]
+            shown = min(start + page_size, len(df))
+            
+            patched_grid = Patch()
+            patched_grid.extend(formatter[1](page))
+            
+            button_style = {} if shown < len(df) else {"display": "none"}
+            return patched_grid, f"Showing {shown} of {len(df)}", button_style
+        except PreventUpdate:
+            raise
+        except Exception as e:
+            print(f"Error loading more results: {e}")
+            raise PreventUpdate
     
     # Update statistics based on current table
     @app.callback(
@@ -919,27 +863,27 @@ def register_callbacks(app):
             return "0", "0", "N/A", "N/A"
             
         try:
-            conn = sqlite3.connect('data/USDH.db')
-            df = pd.read_sql(f"SELECT * FROM {table_name}", conn)
-            conn.close()
-            
-            total_items = len(df)
+            # Precomputed when the catalog loads, so this is O(1), as are
+            # the counts below
+            total_items = catalog.row_count(table_name)
             
             # Different category metrics based on table
             if table_name == "ebooks":
-                categories = df['subject'].nunique() if 'subject' in df.columns else 0
+                categories = catalog.distinct_count("ebooks", "subject")
                 special_title = "States"
-                special_value = df['states'].nunique() if 'states' in df.columns else 0
+                special_value = catalog.distinct_count("ebooks", "states")
             elif table_name == "courses":
-                categories = df['dispcipline'].nunique() if 'dispcipline' in df.columns else 0
+                categories = catalog.distinct_count("courses", "dispcipline")
                 special_title = "Courses"
                 special_value = total_items
             elif table_name == "courses2":
-                categories = df['subjects'].nunique() if 'subjects' in df.columns else 0
+                categories = catalog.distinct_count("courses2", "subjects")
                 special_title = "Grades"
-                special_value = df['grade'].nunique() if 'grade' in df.columns else 0
+                special_value = catalog.distinct_count("courses2", "grade")
             elif table_name == "schemes":
-                categories = df['name'].nunique() if 'name' in df.columns else 0
+                # Names are near-unique, so their distinct count is kept by
+                # triggers rather than in the facet index (stats.DISTINCT_COLUMNS)
+                categories = stats.distinct_count("schemes", "name")
                 special_title = "Benefits"
                 special_value = total_items
             else:
@@ -952,87 +896,6 @@ def register_callbacks(app):
             print(f"Error updating statistics: {e}")
             return "Error", "Error", "Error", "Error"
     
-    # Filter dropdown callbacks
-    @app.callback(
-        Output("table-content", "children", allow_duplicate=True),
-        [Input("subject-filter", "value"),
-         Input("grade-filter", "value"),
-         Input("discipline-filter", "value"),
-         Input("ebook-subject-filter", "value"),
-         Input("ebook-state-filter", "value")],
-        [State("current-table", "data"),
-         State("search-input", "value")],
-        prevent_initial_call=True
-    )
-    def apply_filters(subject, grade, discipline, ebook_subject, ebook_state, current_table, search_query):
-        try:
-            conn = sqlite3.connect('data/USDH.db')
-            
-            # Start with base query
-            query = f"SELECT * FROM {current_table}"
-            where_clauses = []
-            params = []
-            
-            # Add search condition if exists
-            if search_query:
-                cursor = conn.cursor()
-                cursor.execute(f"PRAGMA table_info({current_table})")
-                columns = [col[1] for col in cursor.fetchall()]
-                search_conditions = " OR ".join([f"{col} LIKE ?" for col in columns])
-                where_clauses.append(f"({search_conditions})")
-                params.extend([f"%{search_query}%" for _ in columns])
-            
-            # Apply subject filter
-            if subject:
-                where_clauses.append("subjects = ?")
-                params.append(subject)
-            
-            # Apply grade filter
-            if grade:
-                where_clauses.append("grade = ?")
-                params.append(grade)
-            
-            # Apply discipline filter
-            if discipline:
-                where_clauses.append("dispcipline = ?")
-                params.append(discipline)
-            
-            # Apply ebook subject filter
-            if ebook_subject:
-                where_clauses.append("subject = ?")
-                params.append(ebook_subject)
-            
-            # Apply ebook state filter
-            if ebook_state:
-                where_clauses.append("states = ?")
-                params.append(ebook_state)
-            
-            # Combine where clauses
-            if where_clauses:
-                query += " WHERE " + " AND ".join(where_clauses)
-                
-            df = pd.read_sql(query, conn, params=params)
-            conn.close()
-            
-            # Format based on current table type
-            if current_table == "courses2":
-                return format_courses2_table(df)
-            elif current_table == "courses":
-                return format_courses_table(df)
-            elif current_table == "ebooks":
-                return format_ebooks_table(df)
-            else:
-                return html.Div([
-                    html.H3(f"{current_table.capitalize()} Table", className="mb-3"),
-                    dbc.Table.from_dataframe(df, striped=True, bordered=True, hover=True, responsive=True)
-                ])
-                    
-        except Exception as e:
-            return html.Div([
-                html.H3("Error Applying Filters", className="text-danger"),
-                html.P(f"Error: {str(e)}")
-            ])
-    
     # Profile dropdown toggle (existing)
     @app.callback(
         Output("profile-dropdown", "className"),
@@ -1092,21 +955,22 @@ def register_callbacks(app):
     @app.callback(
         [Output("certificate-upload-output", "children"),
          Output("certificate-upload-status", "children")],
-        [Input("certificate-upload", "contents")],
-        [State("certificate-upload", "filename")]
+        [Input("certificate-upload", "data")]
     )
-    def handle_certificate_upload(contents, filename):
-        if contents is None:
+    def handle_certificate_upload(upload):
+        if upload is None:
             return "", ""
             
-        if filename is None:
-            return "", html.Div("No file selected", style={"color": "red"})
+        if upload.get("error"):
+            return "", html.Div(upload["error"], style={"color": "red"})
+            
+        filename = upload["filenames"][0]
             
         # Check file extension
         if not filename.lower().endswith(('.pdf', '.jpg', '.jpeg')):
             return "", html.Div("Please upload a PDF or JPEG file", style={"color": "red"})
             
-        return html.Div(f"Selected file: {filename}", style={"color": "#0ff"}), ""
+        return html.Div(f"Uploaded file: {filename}", style={"color": "#0ff"}), ""
 
     # Callback to handle certificate upload submission
     @app.callback(
@@ -1116,15 +980,14 @@ def register_callbacks(app):
         [State("certificate-name", "value"),
          State("certificate-org", "value"),
          State("certificate-date", "value"),
-         State("certificate-upload", "contents"),
-         State("certificate-upload", "filename")],
+         State("certificate-upload", "data")],
         prevent_initial_call=True
     )
-    def handle_certificate_submission(n_clicks, name, org, date, contents, filename):
+    def handle_certificate_submission(n_clicks, name, org, date, upload):
         if not n_clicks:
             return dash.no_update, dash.no_update
             
-        if not all([name, org, date, contents, filename]):
+        if not all([name, org, date]) or not upload or not upload.get("upload_ids"):
             return dash.no_update, html.Div("Please fill in all fields and upload a file", style={"color": "red"})
             
         try:
@@ -1133,57 +996,34 @@ def register_callbacks(app):
             if not user_id:
                 return dash.no_update, html.Div("Session expired. Please log in again.", style={"color": "red"})
                 
-            # Create certificates directory if it doesn't exist
-            import os
-            cert_dir = os.path.join("static", "certificates", str(user_id))
-            os.makedirs(cert_dir, exist_ok=True)
-            
-            # Save certificate file
-            import base64
-            
-            # Decode base64 content
-            content_type, content_string = contents.split(',')
-            decoded = base64.b64decode(content_string)
-            
-            # Generate unique filename
-            current_time = datetime.now().strftime("%Y%m%d_%H%M%S")
-            file_extension = os.path.splitext(filename)[1].lower()
-            new_filename = f"{current_time}{file_extension}"
-            filepath = os.path.join(cert_dir, new_filename)
-            
-            # Save file
-            with open(filepath, 'wb') as f:
-                f.write(decoded)
+            # Check file extension
+            if not upload["filenames"][0].lower().endswith(('.pdf', '.jpg', '.jpeg')):
+                return dash.no_update, html.Div("Please upload a PDF or JPEG file", style={"color": "red"})
                 
             # Save certificate details to database
-            conn = sqlite3.connect('data/USDH.db')
-            cursor = conn.cursor()
-            
-            # Create certificates table if it doesn't exist
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS certificates (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER,
-                    name TEXT,
-                    organization TEXT,
-                    issue_date TEXT,
-                    file_path TEXT,
-                    upload_date TEXT,
-                    FOREIGN KEY (user_id) REFERENCES users (id)
-                )
-            ''')
-            
-            # Get current timestamp for upload_date
-            current_timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            
-            # Insert certificate record
-            cursor.execute('''
-                INSERT INTO certificates (user_id, name, organization, issue_date, file_path, upload_date)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (user_id, name, org, date, new_filename, current_timestamp))
+            conn = get_connection()
+            try:
+                cursor = conn.cursor()
+                
+                # Register the uploaded file with the blob store; it is already on disk
+                blob_hash, filename, path = uploads.store_upload(cursor, user_id, upload["upload_ids"][0])
+                
+                # Get current timestamp for upload_date
+                current_timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                
+                # Insert certificate record
+                cursor.execute('''
+                    INSERT INTO certificates (user_id, name, organization, issue_date, file_path, blob_hash, upload_date)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', (user_id, name, org, date, filename, blob_hash, current_timestamp))
+                
+                conn.commit()
+            finally:
+                # Rolls back whatever was not committed
+                conn.close()
             
-            conn.commit()
-            conn.close()
+            # The row is committed, so the file can go into the store
+            blobs.place(path, blob_hash)
             
             return False, html.Div("Certificate uploaded successfully!", style={"color": "green"})
             
@@ -1225,24 +1065,10 @@ def register_callbacks(app):
             if not user_id:
                 return html.Div("Session expired. Please log in again.", style={"color": "red"})
                 
-            # Connect to database and create certificates table if it doesn't exist
-            conn = sqlite3.connect('data/USDH.db')
+            # Connect to database
+            conn = get_connection()
             cursor = conn.cursor()
             
-            # Create certificates table if it doesn't exist
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS certificates (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER,
-                    name TEXT,
-                    organization TEXT,
-                    issue_date TEXT,
-                    file_path TEXT,
-                    upload_date TEXT,
-                    FOREIGN KEY (user_id) REFERENCES users (id)
-                )
-            ''')
-            
             # Fetch certificates
             cursor.execute('''
                 SELECT id, name, organization, issue_date, file_path, upload_date
@@ -1260,7 +1086,7 @@ def register_callbacks(app):
             certificate_cards = []
             for cert in certificates:
                 cert_id, name, org, issue_date, file_path, upload_date = cert
-                cert_url = f"/static/certificates/{user_id}/{file_path}"
+                cert_url = f"/files/certificates/{cert_id}"
                 
                 card = dbc.Card([
                     dbc.CardHeader([
@@ -1352,7 +1178,7 @@ def register_callbacks(app):
                 return "Session expired", "Please log in again"
                 
             # Connect to database
-            conn = sqlite3.connect('data/USDH.db')
+            conn = get_connection()
             cursor = conn.cursor()
             
             # Fetch user details
@@ -1402,7 +1228,7 @@ def register_callbacks(app):
                 return html.Div("Session expired. Please log in again.", style={"color": "red"}), None, None, None
                 
             # Connect to database
-            conn = sqlite3.connect('data/USDH.db')
+            conn = get_connection()
             cursor = conn.cursor()
             
             # Verify current password
@@ -1452,7 +1278,7 @@ def register_callbacks(app):
                 return html.Div("Session expired. Please log in again.", style={"color": "red"}), None, dash.no_update, dash.no_update
                 
             # Connect to database
-            conn = sqlite3.connect('data/USDH.db')
+            conn = get_connection()
             cursor = conn.cursor()
             
             # Check if username already exists
@@ -1516,7 +1342,7 @@ def register_callbacks(app):
                 return html.Div("Session expired. Please log in again.", style={"color": "red"}), None, dash.no_update
                 
             # Connect to database
-            conn = sqlite3.connect('data/USDH.db')
+            conn = get_connection()
             cursor = conn.cursor()
             
             # Check if email already exists for another user
@@ -1616,10 +1442,9 @@ def register_callbacks(app):
          Input("chat-career-roadmap-option", "n_clicks"),
          Input("chat-career-guidance-option", "n_clicks"),
          Input("chat-help-option", "n_clicks")],
-        [State("chat-messages", "children")],
         prevent_initial_call=True
     )
-    def handle_chat_options(roadmap_clicks, career_roadmap_clicks, career_guidance_clicks, help_clicks, current_messages):
+    def handle_chat_options(roadmap_clicks, career_roadmap_clicks, career_guidance_clicks, help_clicks):
         ctx = callback_context
         if not ctx.triggered:
             return dash.no_update, dash.no_update, dash.no_update, dash.no_update, dash.no_update, dash.no_update
@@ -1627,64 +1452,15 @@ def register_callbacks(app):
         trigger_id = ctx.triggered[0]["prop_id"].split(".")[0]
         responses = get_chatbot_responses()
         
-        if current_messages is None:
-            current_messages = []
-        
         if trigger_id == "chat-roadmap-option":
-            # Fetch courses from both UG/PG and school courses tables
-            try:
-                conn = sqlite3.connect('data/USDH.db')
-                
-                # Get UG/PG courses
-                ug_pg_df = pd.read_sql("SELECT course_name_ as name, 'UG/PG' as type FROM courses", conn)
-                
-                # Get school courses - updated query to get unique subjects
-                school_df = pd.read_sql("SELECT DISTINCT subjects as name, 'School' as type FROM courses2 WHERE subjects IS NOT NULL", conn)
-                
-                conn.close()
-                
-                # Combine both dataframes
-                all_courses = pd.concat([ug_pg_df, school_df], ignore_index=True)
-                
-                # Create course selection buttons with type indicators
-                course_options = [
-                    html.Div([
-                        html.H5("Select a Course for Roadmap", 
-                                style={'color': '#2c3e50', 'marginBottom': '15px'}),
-                        html.P("Choose a course to see its detailed learning path:", 
-                               style={'color': '#34495e', 'marginBottom': '20px'})
-                    ], className="chat-message bot-message mb-3"),
-                    dbc.Row([
-                        dbc.Col([
-                            dbc.Button(
-                                [
-                                    html.Div(course['name'], className="course-name"),
-                                    html.Small(f"({course['type']})", 
-                                             style={'display': 'block', 'fontSize': '0.8em', 'opacity': '0.8'})
-                                ],
-                                id={"type": "roadmap-course", "index": f"{course['type']}_{course['name']}"},
-                                className="w-100 mb-2 chat-option-btn",
-                                style={
-                                    'background': 'linear-gradient(135deg, #3498db, #2980b9)',
-                                    'border': 'none',
-                                    'padding': '12px 20px',
-                                    'borderRadius': '12px',
-                                    'fontWeight': '600',
-                                    'letterSpacing': '0.5px',
-                                    'transition': 'all 0.3s ease',
-                                    'boxShadow': '0 4px 15px rgba(52, 152, 219, 0.2)'
-                                }
-                            )
-                        ]) for _, course in all_courses.iterrows()
-                    ])
-                ]
-                return current_messages + course_options, dash.no_update, dash.no_update, dash.no_update, dash.no_update, dash.no_update
-            except Exception as e:
-                error_message = html.Div([
-                    html.Div("Sorry, I couldn't load the courses. Please try again later.", 
-                             className="chat-message bot-message")
-                ], className="d-flex justify-content-start mb-2")
-                return current_messages + [error_message], dash.no_update, dash.no_update, dash.no_update, dash.no_update, dash.no_update
+            # Courses are picked from the search box under the transcript
+            course_prompt = html.Div([
+                html.H5("Select a Course for Roadmap", 
+                        style={'color': '#2c3e50', 'marginBottom': '15px'}),
+                html.P("Search for a course below to see its detailed learning path:", 
+                       style={'color': '#34495e', 'marginBottom': '20px'})
+            ], className="chat-message bot-message mb-3")
+            return append_messages(course_prompt), dash.no_update, dash.no_update, dash.no_update, dash.no_update, dash.no_update
         
         elif trigger_id == "chat-career-roadmap-option":
             career_options = html.Div([
@@ -1811,17 +1587,13 @@ def register_callbacks(app):
                 ], className="career-roadmap-container chat-message bot-message")
             ], className="d-flex justify-content-start mb-3")
 
-            # Initialize current_messages if None
-            if current_messages is None:
-                current_messages = []
-            
             # Add user message first
             user_message = html.Div([
                 html.Div("Show me career roadmaps", className="chat-message user-message")
             ], className="d-flex justify-content-end mb-3")
             
             # Return both user message and career options
-            return current_messages + [user_message, career_options], dash.no_update, dash.no_update, dash.no_update, dash.no_update, dash.no_update
+            return append_messages(user_message, career_options), dash.no_update, dash.no_update, dash.no_update, dash.no_update, dash.no_update
         
         elif trigger_id == "chat-career-guidance-option":
             guidance_message = html.Div([
@@ -1888,7 +1660,7 @@ def register_callbacks(app):
                     ])
                 ], className="chat-message bot-message")
             ], className="d-flex justify-content-start mb-2")
-            return current_messages + [guidance_message], dash.no_update, dash.no_update, dash.no_update, dash.no_update, dash.no_update
+            return append_messages(guidance_message), dash.no_update, dash.no_update, dash.no_update, dash.no_update, dash.no_update
         
         elif trigger_id == "chat-help-option":
             help_message = html.Div([
@@ -2042,27 +1814,22 @@ def register_callbacks(app):
                 ], className="chat-message bot-message")
             ], className="d-flex justify-content-start mb-3")
 
-            # Initialize current_messages if None
-            if current_messages is None:
-                current_messages = []
-            
             # Add user message first
             user_message = html.Div([
                 html.Div("I need help", className="chat-message user-message")
             ], className="d-flex justify-content-end mb-3")
             
             # Return both user message and help options
-            return current_messages + [user_message, help_message], dash.no_update, dash.no_update, dash.no_update, dash.no_update, dash.no_update
+            return append_messages(user_message, help_message), dash.no_update, dash.no_update, dash.no_update, dash.no_update, dash.no_update
 
     # Add callback for help options
     @app.callback(
         [Output("chat-messages", "children", allow_duplicate=True),
          Output("url", "pathname", allow_duplicate=True)],
         [Input({"type": "help-option", "index": ALL}, "n_clicks")],
-        [State("chat-messages", "children")],
         prevent_initial_call=True
     )
-    def handle_help_options(n_clicks, current_messages):
+    def handle_help_options(n_clicks):
         ctx = callback_context
         if not ctx.triggered:
             return dash.no_update, dash.no_update
@@ -2076,9 +1843,6 @@ def register_callbacks(app):
         button_id = json.loads(trigger["prop_id"].split(".")[0])
         option = button_id["index"]
         
-        if current_messages is None:
-            current_messages = []
-        
         # Define responses and redirects for each option
         options = {
             "study-materials": {
@@ -2113,7 +1877,7 @@ def register_callbacks(app):
                 html.Div(response["message"], className="chat-message bot-message")
             ], className="d-flex justify-content-start mb-2")
             
-            return current_messages + [bot_message], response["redirect"]
+            return append_messages(bot_message), response["redirect"]
         
         return dash.no_update, dash.no_update
 
@@ -2128,32 +1892,43 @@ def register_callbacks(app):
             return "/live"
         return dash.no_update
 
+    # Show the course picker when the roadmap option is chosen
+    @app.callback(
+        Output("roadmap-picker-container", "style"),
+        [Input("chat-roadmap-option", "n_clicks")],
+        prevent_initial_call=True
+    )
+    def show_roadmap_picker(n_clicks):
+        if not n_clicks:
+            return dash.no_update
+        return {'display': 'block'}
+    
+    # The picker only ever holds one page of matches, searched on the server
+    @app.callback(
+        Output("roadmap-course-picker", "options"),
+        [Input("roadmap-course-picker", "search_value")],
+        [State("roadmap-course-picker", "value")]
+    )
+    def search_roadmap_courses(search_value, selected):
+        try:
+            return roadmap_course_options(search_value, selected)
+        except Exception as e:
+            print(f"Error searching roadmap courses: {e}")
+            return dash.no_update
+    
     # Add callback for roadmap course selection
     @app.callback(
         Output("chat-messages", "children", allow_duplicate=True),
-        [Input({"type": "roadmap-course", "index": ALL}, "n_clicks")],
-        [State("chat-messages", "children")],
+        [Input("roadmap-course-picker", "value")],
         prevent_initial_call=True
     )
-    def show_course_roadmap(n_clicks, current_messages):
-        ctx = callback_context
-        if not ctx.triggered:
-            return dash.no_update
-        
-        # Get the triggered button's index
-        trigger = ctx.triggered[0]
-        if not trigger["value"]:  # If no click occurred
+    def show_course_roadmap(course_name):
+        if not course_name:
             return dash.no_update
         
-        # Get the button that was clicked
-        button_id = json.loads(trigger["prop_id"].split(".")[0])
-        course_name = button_id["index"]
-        
-        if current_messages is None:
-            current_messages = []
-        
-        # Generate roadmap image
-        roadmap_base64 = create_roadmap_image(course_name)
+        # Roadmap images are rendered and cached by the roadmaps service
+        course_type, actual_name = course_name.split('_', 1)
+        roadmap_url = roadmaps.get_roadmap_url(course_type, actual_name)
         
         # Create roadmap message with enhanced styling
         roadmap_message = html.Div([
@@ -2163,7 +1938,7 @@ def register_callbacks(app):
                 html.P("Here's your personalized learning path:", 
                        style={'color': '#34495e', 'marginBottom': '20px'}),
                 html.Img(
-                    src=f"data:image/png;base64,{roadmap_base64}",
+                    src=roadmap_url,
                     style={
                         'width': '100%',
                         'maxWidth': '800px',
@@ -2172,7 +1947,8 @@ def register_callbacks(app):
                         'boxShadow': '0 4px 15px rgba(0, 0, 0, 0.1)',
                         'border': '1px solid #e9ecef'
                     }
-                ),
+                ) if roadmap_url else html.P("Roadmap not available for this course.",
+                                             style={'color': '#34495e'}),
                 html.Div([
                     html.P("Key Features:", style={'color': '#2c3e50', 'fontWeight': 'bold', 'marginTop': '20px'}),
                     html.Ul([
@@ -2190,29 +1966,28 @@ def register_callbacks(app):
             })
         ], className="d-flex justify-content-start mb-3")
         
-        return current_messages + [roadmap_message]
+        return append_messages(roadmap_message)
 
     @app.callback(
         Output("chat-messages", "children", allow_duplicate=True),
         [Input({"type": "career-roadmap", "index": ALL}, "n_clicks")],
-        [State("chat-messages", "children")],
         prevent_initial_call=True
     )
-    def show_career_roadmap(n_clicks, current_messages):
+    def show_career_roadmap(n_clicks):
         if not n_clicks:
-            return current_messages
+            return dash.no_update
         
         ctx = callback_context
         if not ctx.triggered:
-            return current_messages
+            return dash.no_update
         
         button_id = ctx.triggered[0]["prop_id"].split(".")[0]
         if not button_id:
-            return current_messages
+            return dash.no_update
         
-        # Add user's selection to chat
-        current_messages = current_messages or []
-        current_messages.append(
+        # Add user's selection to chat; only the new messages are sent
+        messages = Patch()
+        messages.append(
             html.Div(
                 "I want to explore career roadmaps",
                 className="chat-message user-message"
@@ -2343,7 +2118,7 @@ def register_callbacks(app):
         ])
         
         # Add bot response with options
-        current_messages.append(
+        messages.append(
             html.Div([
                 html.Div(
                     "I'll help you explore different career paths. Please select a career category and specific role to view its roadmap.",
@@ -2353,7 +2128,7 @@ def register_callbacks(app):
             ])
         )
         
-        return current_messages
+        return messages
 
     @app.callback(
         Output("chat-messages", "children", allow_duplicate=True),
@@ -2361,17 +2136,16 @@ def register_callbacks(app):
          Input({"type": "business-career", "index": ALL}, "n_clicks"),
          Input({"type": "creative-career", "index": ALL}, "n_clicks"),
          Input({"type": "healthcare-career", "index": ALL}, "n_clicks")],
-        [State("chat-messages", "children")],
         prevent_initial_call=True
     )
-    def show_career_details(tech_clicks, business_clicks, creative_clicks, healthcare_clicks, current_messages):
+    def show_career_details(tech_clicks, business_clicks, creative_clicks, healthcare_clicks):
         ctx = callback_context
         if not ctx.triggered:
-            return current_messages
+            return dash.no_update
         
         button_id = ctx.triggered[0]["prop_id"].split(".")[0]
         if not button_id:
-            return current_messages
+            return dash.no_update
         
         # Get the career type and specific role
         career_type = button_id.split("-")[0]  # tech, business, creative, or healthcare
@@ -2569,7 +2343,8 @@ def register_callbacks(app):
         ], className="roadmap-visualization")
         
         # Add the roadmap to chat
-        current_messages.append(
+        messages = Patch()
+        messages.append(
             html.Div([
                 html.Div(
                     f"Here's the career roadmap for {roadmap['title']}:",
@@ -2579,7 +2354,7 @@ def register_callbacks(app):
             ])
         )
         
-        return current_messages
+        return messages
 
     # Update the CSS styles
     app.index_string = '''
@@ -2944,55 +2719,96 @@ def register_callbacks(app):
     '''
 
 # Helper functions
-def load_table_content(table_name, search_query=None):
-    """Load content from the database and return formatted HTML table"""
+def get_result_formatters(table_name):
+    """Return (page formatter, item builder) for a catalog table, or None"""
+    formatters = {
+        "ebooks": (format_ebooks_table, build_ebook_cards),
+        "courses": (format_courses_table, build_course_cards),
+        "courses2": (format_courses2_table, build_courses2_rows),
+        "schemes": (format_schemes_table, build_scheme_cards),
+    }
+    return formatters.get(table_name)
+
+def load_more_controls(shown, total):
+    """Result counter and "Load more" button shown under a results page"""
+    return html.Div([
+        html.Span(f"Showing {shown} of {total}", id="results-count", className="text-muted me-3"),
+        dbc.Button("Load more", id="load-more-btn", color="primary", outline=True, n_clicks=0,
+                   className="load-more-btn",
+                   style={} if shown < total else {"display": "none"})
+    ], className="load-more-area d-flex justify-content-center align-items-center my-4")
+
+# The dashboard's query is one filter-state store: (table, search, filters,
+# page size) plus a sequence number bumped by every change. Each page load
+# gets its own client id (user_dashboard_page), and run_catalog_query
+# remembers the newest sequence number per client so slower, older queries
+# can be discarded.
+MAX_QUERY_CLIENTS = 1000
+_latest_queries = OrderedDict()     # client id -> newest sequence number seen
+_queries_lock = threading.Lock()
+
+def new_filter_state(table_name="courses"):
+    """Initial filter-state store data for a dashboard page"""
+    return {
+        "client": uuid.uuid4().hex,
+        "seq": 0,
+        "table": table_name,
+        "search": None,
+        "filters": {},
+        "page_size": DEFAULT_PAGE_SIZE
+    }
+
+def filter_state_patch(**changes):
+    """Patch setting filter-state fields and bumping its sequence number"""
+    state = Patch()
+    for key, value in changes.items():
+        state[key] = value
+    state["seq"] += 1
+    return state
+
+def claim_query(client, seq):
+    """Record a query as its client's newest; False if a newer one was already seen"""
+    with _queries_lock:
+        if seq < _latest_queries.get(client, -1):
+            return False
+        _latest_queries[client] = seq
+        _latest_queries.move_to_end(client)
+        while len(_latest_queries) > MAX_QUERY_CLIENTS:
+            _latest_queries.popitem(last=False)
+        return True
+
+def is_latest_query(client, seq):
+    """Whether no newer query started for the client while this one ran"""
+    with _queries_lock:
+        return _latest_queries.get(client, seq) == seq
+
+def load_table_content(table_name, search_query=None, filters=None, page_size=None):
+    """Load the first page of a catalog table and return formatted results"""
     try:
-        conn = sqlite3.connect('data/USDH.db')
-        
-        # Apply search if provided
-        if search_query:
-            # Get column names first
-            cursor = conn.cursor()
-            cursor.execute(f"PRAGMA table_info({table_name})")
-            columns = [col[1] for col in cursor.fetchall()]
-            
-            # Build search query with proper column name handling
-            search_conditions = []
-            params = []
-            for col in columns:
-                # Skip problematic column name in the search
-                if col == '_ug/pg':
-                    continue
-                search_conditions.append(f'"{col}" LIKE ?')
-                params.append(f"%{search_query}%")
-            
-            # Combine conditions with OR
-            where_clause = " OR ".join(search_conditions)
-            query = f'SELECT * FROM "{table_name}" WHERE {where_clause}'
-            
-            df = pd.read_sql(query, conn, params=params)
-        else:
-            # For regular queries, use double quotes around table name
-            query = f'SELECT * FROM "{table_name}"'
-            df = pd.read_sql(query, conn)
-            
-        conn.close()
+        # Served from the in-memory catalog; search matches any column
+        df = catalog.query(table_name, search_query, filters)
+        page_size = page_size or DEFAULT_PAGE_SIZE
         
         # Use the appropriate formatter based on table name
-        if table_name == "ebooks":
-            from ebooks_formatter import format_ebooks_table
-            return format_ebooks_table(df)
-        elif table_name == "courses":
-            return format_courses_table(df)
-        elif table_name == "courses2":
-            return format_courses2_table(df)
-        elif table_name == "schemes":
-            return format_schemes_table(df)
-        else:
+        formatter = get_result_formatters(table_name)
+        if not formatter:
             return html.Div([
                 html.H3(f"{table_name.capitalize()} Table", className="mb-3"),
                 dbc.Table.from_dataframe(df, striped=True, bordered=True, hover=True, responsive=True)
             ])
+        
+        # Only the first page is rendered; "Load more" appends the rest
+        page = df.iloc[:page_size]
+        return html.Div([
+            formatter[0](page, len(df)),
+            load_more_controls(len(page), len(df)),
+            dcc.Store(id="results-query", data={
+                "table": table_name,
+                "search": search_query,
+                "filters": filters or {},
+                "page_size": page_size
+            })
+        ])
             
     except Exception as e:
         print(f"Error in load_table_content: {str(e)}")  # Add better error logging
@@ -3001,7 +2817,32 @@ def load_table_content(table_name, search_query=None):
             html.P(f"Error: {str(e)}")
         ])
 
-def format_courses2_table(df):
+COURSES2_ROW_COLUMNS = ('subjects', 'grade', 'video_link', 'search_snippet')
+
+@lru_cache(maxsize=CARD_CACHE_SIZE)
+def build_courses2_row(i, subjects, grade, video_link, search_snippet):
+    """Build the table row for one school course"""
+    return html.Tr([
+        html.Td([
+            subjects,
+            html.Div(render_snippet(search_snippet), className="search-snippet small text-muted")
+            if search_snippet else None
+        ]),
+        html.Td(grade),
+        html.Td(
+            dbc.Button("Show Details", 
+                      href=video_link,  # Open link directly
+                      target="_blank",  # Open in new tab
+                      color="primary",
+                      size="sm")
+        )
+    ])
+
+def build_courses2_rows(df):
+    """Build the table rows for a page of school courses"""
+    return [build_courses2_row(*row) for row in iter_rows(df, COURSES2_ROW_COLUMNS)]
+
+def format_courses2_table(df, total=None):
     """Format the courses2 table with minimal info and show details button"""
     table_header = [
         html.Thead(
@@ -3013,25 +2854,11 @@ def format_courses2_table(df):
         )
     ]
     
-    rows = []
-    for i, row in df.iterrows():
-        rows.append(html.Tr([
-            html.Td(row['subjects']),
-            html.Td(row['grade']),
-            html.Td(
-                dbc.Button("Show Details", 
-                          href=row['video_link'],  # Open link directly
-                          target="_blank",  # Open in new tab
-                          color="primary",
-                          size="sm")
-            )
-        ]))
-    
-    table_body = [html.Tbody(rows)]
+    table_body = [html.Tbody(build_courses2_rows(df), id="results-grid")]
     
     return html.Div([
         html.H3("School Courses (Grades 1-12)", className="mb-3"),
-        html.P(f"Showing {len(df)} educational resources", className="text-muted mb-3"),
+        html.P(f"Found {total if total is not None else len(df)} educational resources", className="text-muted mb-3"),
         dbc.Table(table_header + table_body, 
                  bordered=True, 
                  hover=True, 
@@ -3040,46 +2867,52 @@ def format_courses2_table(df):
                  className="align-middle")
     ])
 
-def format_schemes_table(df):
+SCHEME_CARD_COLUMNS = ('name', 'benefits', 'eligiblity_criteria', 'for_more_info', 'search_snippet')
+
+@lru_cache(maxsize=CARD_CACHE_SIZE)
+def build_scheme_card(i, name, benefits, eligibility_criteria, for_more_info, search_snippet):
+    """Build the card for one scheme"""
+    return dbc.Card([
+        dbc.CardHeader(html.H5(name, className="scheme-title")),
+        dbc.CardBody([
+            # Highlighted match when the list comes from a search
+            html.P(render_snippet(search_snippet), className="search-snippet small text-muted")
+            if search_snippet else None,
+            html.H6("Benefits:", className="card-subtitle mb-2 text-muted"),
+            html.P(benefits, className="card-text"),
+            html.H6("Eligibility Criteria:", className="card-subtitle mb-2 text-muted mt-3"),
+            html.P(eligibility_criteria, className="card-text"),
+            html.A("More Information", href=for_more_info, target="_blank", 
+                   className="btn btn-primary mt-3")
+        ])
+    ], className="mb-4 scheme-card")
+
+def build_scheme_cards(df):
+    """Build the cards for a page of schemes"""
+    return [build_scheme_card(*row) for row in iter_rows(df, SCHEME_CARD_COLUMNS)]
+
+def format_schemes_table(df, total=None):
     """Format the schemes table with interactive elements"""
-    cards = []
-    for i, row in df.iterrows():
-        card = dbc.Card([
-            dbc.CardHeader(html.H5(row['name'], className="scheme-title")),
-            dbc.CardBody([
-                html.H6("Benefits:", className="card-subtitle mb-2 text-muted"),
-                html.P(row['benefits'], className="card-text"),
-                html.H6("Eligibility Criteria:", className="card-subtitle mb-2 text-muted mt-3"),
-                html.P(row['eligiblity_criteria'], className="card-text"),
-                html.A("More Information", href=row['for_more_info'], target="_blank", 
-                       className="btn btn-primary mt-3")
-            ])
-        ], className="mb-4 scheme-card")
-        cards.append(card)
-    
     return html.Div([
         html.H3("Educational Schemes and Benefits", className="mb-3"),
-        html.P(f"Showing {len(df)} schemes", className="text-muted mb-3"),
-        html.Div(cards)
+        html.P(f"Found {total if total is not None else len(df)} schemes", className="text-muted mb-3"),
+        html.Div(build_scheme_cards(df), id="results-grid")
     ])
 
 def get_filter_dropdowns(table_name):
     """Create filter dropdowns based on table columns"""
     try:
-        conn = sqlite3.connect('data/USDH.db')
-        df = pd.read_sql(f"SELECT * FROM {table_name}", conn)
-        conn.close()
-        
+        # Option lists come from the catalog's facet index
         filters = []
         
         if table_name == "courses2":
             # Filters for school courses
-            subjects = sorted([s for s in df['subjects'].unique() if pd.notna(s)])
+            subjects = sorted(catalog.facet_values(table_name, "subjects"))
             filters.append(
                 dbc.Col([
                     html.Label("Filter by Subject:", style={'color': '#0ff', 'marginBottom': '5px'}),
                     dcc.Dropdown(
-                        id="subject-filter",
+                        id={"type": "catalog-filter", "column": "subjects"},
                         options=[{"label": s, "value": s} for s in subjects],
                         placeholder="Select subject",
                         className="mb-2 cyber-dropdown",
@@ -3088,12 +2921,12 @@ def get_filter_dropdowns(table_name):
                 ], width=4)
             )
             
-            grades = sorted([g for g in df['grade'].unique() if pd.notna(g)])
+            grades = sorted(catalog.facet_values(table_name, "grade"))
             filters.append(
                 dbc.Col([
                     html.Label("Filter by Grade:", style={'color': '#0ff', 'marginBottom': '5px'}),
                     dcc.Dropdown(
-                        id="grade-filter",
+                        id={"type": "catalog-filter", "column": "grade"},
                         options=[{"label": g, "value": g} for g in grades],
                         placeholder="Select grade",
                         className="mb-2 cyber-dropdown",
@@ -3104,12 +2937,12 @@ def get_filter_dropdowns(table_name):
         
         elif table_name == "courses":
             # Filters for UG/PG courses
-            disciplines = sorted([d for d in df['dispcipline'].unique() if pd.notna(d)])
+            disciplines = sorted(catalog.facet_values(table_name, "dispcipline"))
             filters.append(
                 dbc.Col([
                     html.Label("Filter by Discipline:", style={'color': '#0ff', 'marginBottom': '5px'}),
                     dcc.Dropdown(
-                        id="discipline-filter",
+                        id={"type": "catalog-filter", "column": "dispcipline"},
                         options=[{"label": d, "value": d} for d in disciplines],
                         placeholder="Select discipline",
                         className="mb-2 cyber-dropdown",
@@ -3119,12 +2952,12 @@ def get_filter_dropdowns(table_name):
             )
             
             # Add website filter
-            websites = sorted([w for w in df['website_name'].unique() if pd.notna(w)])
+            websites = sorted(catalog.facet_values(table_name, "website_name"))
             filters.append(
                 dbc.Col([
                     html.Label("Filter by Website:", style={'color': '#0ff', 'marginBottom': '5px'}),
                     dcc.Dropdown(
-                        id="website-filter",
+                        id={"type": "catalog-filter", "column": "website_name"},
                         options=[{"label": w, "value": w} for w in websites],
                         placeholder="Select website",
                         className="mb-2 cyber-dropdown",
@@ -3135,12 +2968,12 @@ def get_filter_dropdowns(table_name):
         
         elif table_name == "ebooks":
             # Filters for e-books
-            subjects = sorted([s for s in df['subject'].unique() if pd.notna(s)])
+            subjects = sorted(catalog.facet_values(table_name, "subject"))
             filters.append(
                 dbc.Col([
                     html.Label("Filter by Subject:", style={'color': '#0ff', 'marginBottom': '5px'}),
                     dcc.Dropdown(
-                        id="ebook-subject-filter",
+                        id={"type": "catalog-filter", "column": "subject"},
                         options=[{"label": s, "value": s} for s in subjects],
                         placeholder="Select subject",
                         className="mb-2 cyber-dropdown",
@@ -3149,12 +2982,12 @@ def get_filter_dropdowns(table_name):
                 ], width=4)
             )
             
-            states = sorted([st for st in df['states'].unique() if pd.notna(st)])
+            states = sorted(catalog.facet_values(table_name, "states"))
             filters.append(
                 dbc.Col([
                     html.Label("Filter by State:", style={'color': '#0ff', 'marginBottom': '5px'}),
                     dcc.Dropdown(
-                        id="ebook-state-filter",
+                        id={"type": "catalog-filter", "column": "states"},
                         options=[{"label": st, "value": st} for st in states],
                         placeholder="Select state",
                         className="mb-2 cyber-dropdown",
@@ -3169,6 +3002,52 @@ def get_filter_dropdowns(table_name):
         print(f"Error creating filters: {e}")
         return []
 
+def append_messages(*messages):
+    """Patch appending messages to the chat transcript
+
+    Chat callbacks never read the transcript back: each turn sends only
+    its new messages, however long the conversation (and however many
+    roadmap images it holds) has grown.
+    """
+    patch = Patch()
+    patch.extend(list(messages))
+    return patch
+
+# Roadmap picker search. The course list is built once per catalog version;
+# a search returns at most ROADMAP_PICKER_LIMIT options, so the dropdown's
+# payload does not grow with the catalog.
+ROADMAP_PICKER_LIMIT = 50
+_roadmap_courses = (None, [])   # (catalog version, [(lower-cased label, option)])
+
+def get_roadmap_courses():
+    """Picker options for every UG/PG course and school subject"""
+    global _roadmap_courses
+    version = catalog.get_version()
+    if _roadmap_courses[0] != version:
+        names = [("UG/PG", name) for name in catalog.get_table("courses")["course_name_"].dropna()]
+        names += [("School", subject) for subject in catalog.get_table("courses2")["subjects"].dropna().unique()]
+        courses = []
+        for course_type, name in names:
+            label = f"{name} ({course_type})"
+            courses.append((label.lower(), {"label": label, "value": f"{course_type}_{name}"}))
+        _roadmap_courses = (version, courses)
+    return _roadmap_courses[1]
+
+def roadmap_course_options(search_value=None, selected=None):
+    """Up to ROADMAP_PICKER_LIMIT options matching search_value, keeping the selected one"""
+    term = (search_value or "").strip().lower()
+    options = []
+    for key, option in get_roadmap_courses():
+        if term in key:
+            options.append(option)
+            if len(options) == ROADMAP_PICKER_LIMIT:
+                break
+    # The dropdown can only show a value that is among its options
+    if selected and all(option["value"] != selected for option in options):
+        course_type, name = selected.split('_', 1)
+        options.insert(0, {"label": f"{name} ({course_type})", "value": selected})
+    return options
+
 def get_chatbot_responses():
     """Get predefined chatbot responses"""
     return {
@@ -3258,198 +3137,6 @@ def get_chatbot_responses():
         ]
     }
 
-def create_roadmap_image(course_name):
-    """Create a course roadmap visualization"""
-    plt.figure(figsize=(12, 8))
-    
-    # Split course name to get type and actual name
-    course_type, actual_name = course_name.split('_', 1)
-    
-    try:
-        if course_type == "School":
-            # Get school course details
-            conn = sqlite3.connect('data/USDH.db')
-            df = pd.read_sql("SELECT * FROM courses2 WHERE subjects = ?", conn, params=(actual_name,))
-            conn.close()
-            
-            if df.empty:
-                return None
-                
-            # Define school course stages based on grade levels
-            stages = [
-                ("Foundation (Grades 1-5)", [
-                    "Basic Concepts",
-                    "Fundamental Skills",
-                    "Core Topics",
-                    "Basic Applications"
-                ]),
-                ("Intermediate (Grades 6-8)", [
-                    "Advanced Topics",
-                    "Problem Solving",
-                    "Practical Applications",
-                    "Critical Thinking"
-                ]),
-                ("Advanced (Grades 9-10)", [
-                    "Complex Concepts",
-                    "Advanced Applications",
-                    "Project Work",
-                    "Research Skills"
-                ]),
-                ("Senior Level (Grades 11-12)", [
-                    "Specialized Topics",
-                    "Advanced Problem Solving",
-                    "Research Projects",
-                    "Exam Preparation"
-                ]),
-                ("Mastery", [
-                    "Comprehensive Review",
-                    "Practice Tests",
-                    "Performance Analysis",
-                    "Career Guidance"
-                ])
-            ]
-        else:
-            # Get UG/PG course details
-            conn = sqlite3.connect('data/USDH.db')
-            df = pd.read_sql("SELECT * FROM courses WHERE course_name_ = ?", conn, params=(actual_name,))
-            conn.close()
-            
-            if df.empty:
-                return None
-                
-            # Define roadmap stages based on course type
-            roadmap_data = {
-                "Computer Science": [
-                    ("Fundamentals", ["Programming Basics", "Data Structures", "Algorithms"]),
-                    ("Core Concepts", ["OOP", "Database", "Networking"]),
-                    ("Advanced Topics", ["Web Dev", "AI/ML", "Cloud Computing"]),
-                    ("Specialization", ["Full Stack", "Data Science", "Cybersecurity"]),
-                    ("Career Ready", ["Projects", "Internships", "Industry Skills"])
-                ],
-                "Data Science": [
-                    ("Foundation", ["Statistics", "Programming", "Math"]),
-                    ("Tools & Tech", ["Python", "SQL", "Data Viz"]),
-                    ("Core Skills", ["Data Analysis", "ML Basics", "Big Data"]),
-                    ("Advanced", ["Deep Learning", "NLP", "Computer Vision"]),
-                    ("Expertise", ["Projects", "Kaggle", "Research"])
-                ],
-                "Digital Marketing": [
-                    ("Basics", ["Marketing 101", "Digital Foundations", "Analytics"]),
-                    ("Channels", ["Social Media", "Email", "SEO"]),
-                    ("Strategy", ["Content Marketing", "PPC", "Brand Building"]),
-                    ("Advanced", ["Marketing Tech", "Automation", "CRM"]),
-                    ("Professional", ["Campaigns", "Portfolio", "Certification"])
-                ]
-            }
-            
-            # Determine course type based on name
-            course_type = "Computer Science"  # Default
-            if "data" in actual_name.lower() or "analytics" in actual_name.lower():
-                course_type = "Data Science"
-            elif "marketing" in actual_name.lower() or "business" in actual_name.lower():
-                course_type = "Digital Marketing"
-            
-            stages = roadmap_data.get(course_type, roadmap_data["Computer Science"])
-        
-        # Create coordinates for the roadmap
-        num_stages = len(stages)
-        y_positions = np.linspace(0, 10, num_stages)
-        
-        # Set style with a modern dark theme
-        plt.style.use('dark_background')
-        fig, ax = plt.subplots(figsize=(12, 8))
-        fig.patch.set_facecolor('#1a1a1a')
-        ax.set_facecolor('#1a1a1a')
-        
-        # Define colors
-        primary_color = '#3498db'  # Blue
-        secondary_color = '#2ecc71'  # Green
-        accent_color = '#e74c3c'  # Red
-        text_color = '#ecf0f1'  # Light gray
-        
-        # Add gradient background
-        gradient = np.linspace(0, 1, 100).reshape(10, 10)
-        ax.imshow(gradient, extent=[-2, 4, -1, 11], aspect='auto', cmap='Blues', alpha=0.1)
-        
-        # Plot stages with enhanced styling
-        for idx, (stage, topics) in enumerate(stages):
-            # Main stage node with glow effect
-            ax.scatter(0, y_positions[idx], s=400, c=primary_color, zorder=5, alpha=0.8)
-            ax.scatter(0, y_positions[idx], s=300, c=primary_color, zorder=6)
-            
-            # Stage text with shadow effect
-            ax.text(0.5, y_positions[idx], stage, fontsize=14, color=text_color,
-                    verticalalignment='center', fontweight='bold',
-                    bbox=dict(facecolor='#2c3e50', alpha=0.7, edgecolor='none', pad=5),
-                    zorder=7)
-            
-            # Topics for each stage with enhanced styling
-            for i, topic in enumerate(topics):
-                topic_x = 2
-                topic_y = y_positions[idx] + (i - len(topics)/2 + 0.5) * 0.4
-                
-                # Topic node with gradient effect
-                ax.scatter(topic_x, topic_y, s=250, c=secondary_color, alpha=0.8, zorder=5)
-                ax.scatter(topic_x, topic_y, s=200, c=secondary_color, zorder=6)
-                
-                # Topic text with modern styling
-                ax.text(topic_x + 0.5, topic_y, topic, fontsize=11, color=text_color,
-                        verticalalignment='center',
-                        bbox=dict(facecolor='#34495e', alpha=0.7, edgecolor='none', pad=3),
-                        zorder=7)
-                
-                # Connect topic to stage with animated line
-                ax.plot([0.3, topic_x-0.2], [y_positions[idx], topic_y],
-                       c=primary_color, alpha=0.4, linestyle='--', linewidth=2)
-        
-        # Connect main stages with gradient lines
-        for i in range(num_stages-1):
-            ax.plot([0, 0], [y_positions[i], y_positions[i+1]],
-                    c=primary_color, linewidth=3, alpha=0.6)
-        
-        # Add decorative elements
-        ax.grid(True, linestyle='--', alpha=0.1)
-        
-        # Add decorative circles in the background
-        for i in range(5):
-            circle = plt.Circle((0, y_positions[i]), 0.5, color=primary_color, alpha=0.1)
-            ax.add_artist(circle)
-        
-        # Customize appearance
-        ax.set_title(f'{actual_name} Learning Roadmap', 
-                     color=text_color, pad=20, fontsize=16, fontweight='bold',
-                     bbox=dict(facecolor='#2c3e50', alpha=0.7, edgecolor='none', pad=10))
-        
-        # Remove axes
-        ax.set_xticks([])
-        ax.set_yticks([])
-        ax.spines['top'].set_visible(False)
-        ax.spines['right'].set_visible(False)
-        ax.spines['bottom'].set_visible(False)
-        ax.spines['left'].set_visible(False)
-        
-        # Add a subtle border
-        ax.add_patch(plt.Rectangle((-2, -1), 6, 12, fill=False, color=primary_color, alpha=0.3, linewidth=2))
-        
-        # Add decorative elements
-        for i in range(3):
-            x = np.random.uniform(-1.5, 3.5)
-            y = np.random.uniform(0, 9)
-            size = np.random.uniform(50, 150)
-            ax.scatter(x, y, s=size, c=accent_color, alpha=0.1, zorder=0)
-        
-        # Save to base64 with high DPI and transparent background
-        buf = io.BytesIO()
-        plt.savefig(buf, format='png', bbox_inches='tight', 
-                    facecolor=fig.get_facecolor(), transparent=True, dpi=300)
-        plt.close()
-        buf.seek(0)
-        return base64.b64encode(buf.read()).decode('utf-8')
-        
-    except Exception as e:
-        print(f"Error creating roadmap: {e}")
-        return None
-
 # Update the chatbot modal layout
 def create_chatbot_modal():
     return dbc.Modal([
@@ -3486,7 +3173,7 @@ def create_chatbot_modal():
         dbc.ModalBody([
             html.Div([
                 # Chat messages container
-                html.Div(id="chat-messages", className="chat-messages mb-4"),
+                html.Div(id="chat-messages", children=[], className="chat-messages mb-4"),
                 
                 # Options container
                 html.Div([
@@ -3578,32 +3265,3 @@ def create_chatbot_modal():
         })
     ], id="chatbot-modal", is_open=False, backdrop="static", keyboard=False,
        size="lg", contentClassName="cyber-modal")
-
-def init_course_progress_db():
-    """Initialize the course progress tracking table"""
-    try:
-        conn = sqlite3.connect('data/USDH.db')
-        cursor = conn.cursor()
-        
-        # Create course_progress table if it doesn't exist
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS course_progress (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            course_id INTEGER NOT NULL,
-            status TEXT NOT NULL,  -- 'ongoing' or 'completed'
-            start_date TEXT,
-            completion_date TEXT,
-            FOREIGN KEY (user_id) REFERENCES users (id),
-            UNIQUE(user_id, course_id)
-        )
-        ''')
-        
-        conn.commit()
-        conn.close()
-    except Exception as e:
-        print(f"Error initializing course progress table: {e}")
-
-# Call this function when the app starts
-init_course_progress_db()
-
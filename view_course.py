@@ -2,59 +2,37 @@ import dash
 from dash import html, dcc, callback_context
 import dash_bootstrap_components as dbc
 from dash.dependencies import Input, Output, State, ALL
-import sqlite3
 import pandas as pd
-import requests
-from bs4 import BeautifulSoup
-import re
-from urllib.parse import urlparse
-import time
+from db import get_connection
+import page_fetcher
+from page_fetcher import is_valid_url
 import json
 from datetime import datetime
 from flask import session
 
-def is_valid_url(url):
-    """Check if the URL is valid"""
-    try:
-        result = urlparse(url)
-        return all([result.scheme, result.netloc])
-    except:
-        return False
+# The course page shows the text of the course's own page. Until the fetcher
+# has it, the page polls the cache every PAGE_POLL_INTERVAL ms, at most
+# PAGE_POLL_LIMIT times.
+LOADING_MESSAGE = "Course content is loading. Please check back in a moment."
+PAGE_POLL_INTERVAL = 2000
+PAGE_POLL_LIMIT = 30
+PAGE_PREVIEW_CHARS = 1500
 
-def clean_html_content(html_content):
-    """Clean and format HTML content for display"""
-    try:
-        soup = BeautifulSoup(html_content, 'html.parser')
-        
-        # Remove unwanted elements
-        for element in soup.find_all(['script', 'style', 'iframe', 'nav', 'header', 'footer']):
-            element.decompose()
-        
-        # Clean up the content
-        content = soup.get_text()
-        content = re.sub(r'\s+', ' ', content)  # Remove extra whitespace
-        content = content.strip()
-        
-        return content if content else "No content available."
-    except Exception as e:
-        print(f"Error cleaning content: {str(e)}")
-        return "Error processing content."
+def fetch_course_content(url, wait=0):
+    """Cleaned text of a course page from the page cache
 
-def fetch_course_content(url):
-    """Fetch course content with proper error handling"""
+    Never fetches inline: a page that is not cached yet is fetched in the
+    background (see page_fetcher) and shows a placeholder until it arrives.
+    """
     if not is_valid_url(url):
         return "Invalid URL provided."
     
-    try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        return clean_html_content(response.text)
-    except requests.exceptions.RequestException as e:
-        print(f"Error fetching content: {str(e)}")
-        return f"Unable to load course content. Please try opening the link in a new tab."
+    content, error = page_fetcher.get_page(url, wait=wait)
+    if content is not None:
+        return content
+    if error:
+        return "Unable to load course content. Please try opening the link in a new tab."
+    return LOADING_MESSAGE
 
 def view_course():
     return html.Div([
@@ -77,6 +55,15 @@ def view_course():
                 ])
             ]),
 
+            # Text of the course's own page, filled in once it is fetched
+            dbc.Row([
+                dbc.Col([
+                    html.Div(id="course-page-text", className="course-page-text mt-4")
+                ])
+            ]),
+            dcc.Interval(id="course-page-poll", interval=PAGE_POLL_INTERVAL,
+                         max_intervals=PAGE_POLL_LIMIT),
+
             # Modal for showing action status
             dbc.Modal([
                 dbc.ModalHeader(dbc.ModalTitle("Course Status")),
@@ -118,18 +105,17 @@ def register_callbacks(app):
             course_type = path_parts[-2]  # 'course' or 'course2'
             course_id = path_parts[-1]
             
-            # Connect to database and fetch course details
-            conn = sqlite3.connect('data/USDH.db')
             table_name = "courses" if course_type == "course" else "courses2"
-            df = pd.read_sql(f"SELECT * FROM {table_name}", conn)
-            conn.close()
             
-            # Find the course by index
+            # Fetch the single course row by primary key
             try:
                 course_index = int(course_id)
-                if course_index >= len(df):
-                    raise ValueError("Course index out of range")
-                course = df.iloc[course_index]
+                conn = get_connection()
+                df = pd.read_sql(f"SELECT * FROM {table_name} WHERE id = ?", conn, params=(course_index,))
+                conn.close()
+                if df.empty:
+                    raise ValueError("Course not found")
+                course = df.iloc[0]
             except (ValueError, IndexError):
                 return html.Div([
                     html.H3("Course Not Found", className="text-danger"),
@@ -238,5 +224,48 @@ def register_callbacks(app):
                 html.P(f"An error occurred while loading the course details: {str(e)}")
             ])
 
+    # Show the course's own page, polling the page cache until it arrives
+    @app.callback(
+        [Output("course-page-text", "children"),
+         Output("course-page-poll", "disabled")],
+        [Input("url", "pathname"),
+         Input("course-page-poll", "n_intervals")]
+    )
+    def display_course_page(pathname, n_intervals):
+        # Only UG/PG courses link to a course page; school resources are videos
+        path_parts = (pathname or '').split('/')
+        if len(path_parts) != 3 or path_parts[1] != "course":
+            return None, True
+            
+        try:
+            conn = get_connection()
+            try:
+                cursor = conn.cursor()
+                cursor.execute("SELECT course_link FROM courses WHERE id = ?", (int(path_parts[2]),))
+                row = cursor.fetchone()
+            finally:
+                conn.close()
+        except Exception as e:
+            print(f"Error loading course link: {str(e)}")
+            return None, True
+        if not row or not row[0]:
+            return None, True
+            
+        content = fetch_course_content(row[0])
+        if content == LOADING_MESSAGE:
+            return html.Div([
+                dbc.Spinner(size="sm", spinner_class_name="me-2"),
+                content
+            ], className="text-muted"), False
+            
+        if len(content) > PAGE_PREVIEW_CHARS:
+            content = content[:PAGE_PREVIEW_CHARS].rsplit(' ', 1)[0] + "..."
+        return dbc.Card([
+            dbc.CardBody([
+                html.H5("From the Course Page", className="mb-3"),
+                html.P(content, className="mb-0")
+            ])
+        ]), True
+
     # Course status buttons callback
     
\ No newline at end of file